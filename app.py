@@ -1,23 +1,32 @@
 import sys
 import os
 from src.pipeline.training_pipeline import TrainingPipeline
-from src.exception import AppException
+from src.exception import AppException, ServiceSaturatedError
 from src.utils.main_utils import decode_image, encode_into_base64
 import uvicorn
 from fastapi import FastAPI, File, Form, UploadFile, Depends, HTTPException, Response
-from fastapi.responses import StreamingResponse
-from typing import List
-from uuid import UUID, uuid4, Annotated
+from fastapi.responses import StreamingResponse, JSONResponse
+from typing import List, Annotated
+from uuid import UUID, uuid4
 import requests
 # from flask import Flask, request
 from pydantic import BaseModel
-from tkinter import Image
 from PIL import Image
 import numpy as np
 import io
 import tensorflow as tf
 import ultralytics
 import cv2
+from src.constant.serving import SERVING_MODEL_PATH
+from src.entity.config_entity import (BatchingConfig, InferenceExecutorConfig, RequestCaptureConfig,
+                                     VideoPipelineConfig, LiveStreamConfig, VideoSourceConfig, DetectionModelConfig)
+from src.serving.batching import MicroBatcher
+from src.serving.inference_executor import InferenceExecutor
+from src.serving.request_capture import RequestCaptureSink
+from src.serving.live_stream import LiveStreamHub
+from src.serving.model_registry import DetectionModel, model_registry
+from src.video.motion import MotionGate, BoxPropagator
+from src.serving.keras_classifier import load_model, decode_and_preprocess, predict_batch
 
 class DataRequest(BaseModel):
     name: str
@@ -29,59 +38,90 @@ async def parse_form_data(
 ) -> DataRequest:
     return DataRequest(name=name, uuid=uuid)
 
-def preprocess_image(image: Image.Image) -> np.array:
-    # preprocess the image to the format expected by the model
-    image = image.resize((224, 224))  # Example: resize to 224x224
-    image_array = np.array(image)
-    image_array = image_array / 255.0  # Example: normalize the image
-    image_array = np.expand_dims(image_array, axis=0)  # Add batch dimension
-    return image_array
-
-def detect_number_plate_frame(frame):
-    results = model(frame)
-    detections = results.xyxy[0]  # Get xyxy format bounding boxes
-
-    for detection in detections:
-        x1, y1, x2, y2, conf, cls = detection
-        if conf > 0.5:  # Confidence threshold
-            label = model.names[int(cls)]
-            if label == "license plate":
-                color = (0, 255, 0)
-                cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
-                cv2.putText(frame, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-            
+def detect_number_plate_boxes(frame, model: DetectionModel) -> np.ndarray:
+    detections = model.detect(frame)
+    keep = detections.confidence > 0.5  # Confidence threshold
+    class_names = detections.data.get('class_name')
+    if class_names is not None:
+        keep &= np.asarray(class_names) == "license plate"
+    return detections.xyxy[keep].astype(np.float32).reshape(-1, 4)
+
+def draw_number_plate_boxes(frame, boxes: np.ndarray):
+    color = (0, 255, 0)
+    for x1, y1, x2, y2 in boxes:
+        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
+        cv2.putText(frame, "license plate", (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
     return frame
 
-def generate_frames():
+def detect_number_plate_frame(frame, model):
+    return draw_number_plate_boxes(frame, detect_number_plate_boxes(frame, model))
 
-    cap = cv2.VideoCapture(0)
+def make_frame_processor(adaptive: bool = False):
+    # runs on the live stream worker thread, so the first stream loads the detector off the event loop; the
+    # registry serves DETECTION_MODEL_ONNX_PATH (e.g. the INT8 graph), local weights or the hosted model
+    model = model_registry.get(DetectionModelConfig())
 
-    if not cap.isOpened():
-        raise RuntimeError("Could not start camera.")
-    
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            raise RuntimeError("Could not read frame from camera.")
-        
-        frame = detect_number_plate_frame(frame)
-
-        # Encode frame as JPEG
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n\r\n')
-    
-    cap.release()
+    # in adaptive mode the detector only runs every few frames or on motion, boxes follow optical flow in between
+    video_pipeline_config = VideoPipelineConfig()
+    motion_gate = MotionGate(video_pipeline_config.detect_every, video_pipeline_config.motion_threshold) if adaptive else None
+    propagator = BoxPropagator()
+    state = {'boxes': np.empty((0, 4), dtype=np.float32)}
+
+    def process(frame):
+        if motion_gate is None or motion_gate.should_detect(frame):
+            state['boxes'] = detect_number_plate_boxes(frame, model)
+            propagator.reset(frame)
+        else:
+            state['boxes'] = propagator.propagate_boxes(frame, state['boxes'])
+        return draw_number_plate_boxes(frame, state['boxes'])
+
+    return process
+
+
+
+# Each inference worker loads the pre-trained model once
+inference_executor = InferenceExecutor(load_model, SERVING_MODEL_PATH, InferenceExecutorConfig())
 
 
+async def predict_on_executor(batch: np.array) -> np.array:
+    return await inference_executor.run(predict_batch, batch, uses_model=True)
 
-# Load your pre-trained model
-model = tf.keras.models.load_model("path_to_your_model.h5")
+
+# coalesce concurrent predict requests into a single forward pass
+batching_config = BatchingConfig(max_concurrent_batches=inference_executor.inference_executor_config.max_workers)
+batcher = MicroBatcher(predict_on_executor, batching_config)
+
+# optionally keep a sample of uploads for retraining, written off the request path
+capture_sink = RequestCaptureSink(RequestCaptureConfig())
+
+# one capture + inference worker per source, shared by every viewer of /api/v1/live. LIVE_STREAM_SOURCE may
+# also be a recording, an image folder, an rtsp:// url or `synthetic` for load tests without a camera
+live_stream_config = LiveStreamConfig()
+live_stream_hub = LiveStreamHub(make_frame_processor, live_stream_config, VideoSourceConfig())
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+async def start_inference():
+    inference_executor.start()
+    await batcher.start()
+    capture_sink.start()
+
+
+@app.on_event("shutdown")
+async def stop_inference():
+    await batcher.stop()
+    inference_executor.shutdown()
+    capture_sink.stop()
+    live_stream_hub.shutdown()
+
+
+@app.exception_handler(ServiceSaturatedError)
+async def service_saturated_handler(request, exc: ServiceSaturatedError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
 @app.route("/api/v1/train")
 async def train():
     try:
@@ -113,16 +153,13 @@ async def predict(
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Uploaded file is not an image")
     
-    # Read the image file
+    # Read the image file, then decode and preprocess it on the inference executor
     image_bytes = await file.read()
-    image = Image.open(io.BytesIO(image_bytes))
-    image.save("data/inputImage.jpg")
-
-    # preprocess the image
-    preprocessed_image = preprocessed_image(image)
+    capture_sink.offer(image_bytes, file.content_type)
+    preprocessed_image = await inference_executor.run(decode_and_preprocess, image_bytes)
     
-    # Make a prediction using the trained model
-    prediction = model.predict(preprocessed_image)
+    # Make a prediction using the trained model, batched with any concurrent requests
+    prediction = await batcher.submit(preprocessed_image)
     predicted_class = np.argmax(prediction, axis=1)[0]
     
     # Return the prediction as a JSON response
@@ -134,9 +171,30 @@ async def predict(
     }
 
 
+@app.get('/api/v1/metrics/batching')
+async def batching_metrics():
+    return batcher.metrics()
+
+
+@app.get('/api/v1/metrics/executor')
+async def executor_metrics():
+    return inference_executor.metrics()
+
+
+@app.get('/api/v1/metrics/capture')
+async def capture_metrics():
+    return capture_sink.metrics()
+
+
+@app.get('/api/v1/metrics/live')
+async def live_metrics():
+    return live_stream_hub.metrics()
+
+
 @app.get('/api/v1/live')
-async def live():
-    return StreamingResponse(generate_frames(), media_type='multipart/x-mixed-replace; boundary=frame')
+async def live(adaptive: bool = False):
+    return StreamingResponse(live_stream_hub.stream(live_stream_config.source, adaptive),
+                             media_type='multipart/x-mixed-replace; boundary=frame')
 
 
 if __name__ == '__main__':
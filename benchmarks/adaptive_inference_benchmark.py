@@ -0,0 +1,52 @@
+"""
+Measures the detector invocation rate and the box drift of adaptive (motion-gated) inference
+against running the detector on every frame of a recorded clip.
+
+Usage:
+    python benchmarks/adaptive_inference_benchmark.py data/test_video_3.mp4 --weights yolov8s.pt --detect-every 5
+
+The detector runs once per frame in the full-rate pass; the adaptive pass reuses those results on the
+frames where the gate fires, so both passes see identical detections on detector frames.
+"""
+import argparse
+
+from src.entity.config_entity import DetectionModelConfig
+from src.serving.model_registry import model_registry
+from src.video.motion import MotionGate, BoxPropagator, evaluate_drift
+from src.video.pipeline import iter_video_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video_file')
+    parser.add_argument('--weights', default=None)
+    parser.add_argument('--detect-every', type=int, default=5)
+    parser.add_argument('--motion-threshold', type=float, default=0.02)
+    args = parser.parse_args()
+
+    model = model_registry.get(DetectionModelConfig(local_path=args.weights))
+    full_rate = [model.detect(frame).xyxy for frame in iter_video_frames(args.video_file)]
+
+    motion_gate = MotionGate(args.detect_every, args.motion_threshold)
+    propagator = BoxPropagator()
+    adaptive = []
+    boxes = None
+    for index, frame in enumerate(iter_video_frames(args.video_file)):
+        if motion_gate.should_detect(frame):
+            boxes = full_rate[index]
+            propagator.reset(frame)
+        else:
+            boxes = propagator.propagate_boxes(frame, boxes)
+        adaptive.append(boxes)
+
+    drift = evaluate_drift(full_rate, adaptive)
+    stats = motion_gate.stats()
+    print(f"frames                   : {stats['frames']}")
+    print(f"detector invocation rate : {stats['detector_invocation_rate']:.1%} "
+          f"({stats['motion_triggered']} motion triggered)")
+    print(f"mean IoU vs full rate    : {drift['mean_iou']:.3f}")
+    print(f"recall@0.5 vs full rate  : {drift['recall']:.1%} over {drift['reference_boxes']} boxes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares the time to read one epoch of preprocessed training images from the per-file layout
+(one re-encoded image per sample, decoded with cv2.imread) against the packed shard layout
+(raw pixels memory-mapped from a few large files), in file order and in shuffled order.
+
+Usage:
+    python benchmarks/dataset_shards_benchmark.py --images 5000 --size 640
+
+Both layouts are written from the same generated images. The page cache is warm after writing, so
+this measures open/decode overhead rather than disk bandwidth; drop the caches between the write and
+read phases (as root: sync; echo 3 > /proc/sys/vm/drop_caches) to include cold reads.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+from src.utils.shards import ShardWriter, ShardReader
+
+
+def epoch(read, count, order):
+    started_at = time.perf_counter()
+    batch_slot = None
+    for position in order:
+        image = read(position)
+        # copy into a batch slot, as a data loader would, so mapped pages are actually read
+        if batch_slot is None:
+            batch_slot = np.empty_like(image)
+        np.copyto(batch_slot, image)
+    return count / (time.perf_counter() - started_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=640)
+    parser.add_argument('--shard-size-mb', type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files_dir = os.path.join(temp_dir, 'files')
+        shards_dir = os.path.join(temp_dir, 'shards')
+        os.makedirs(files_dir)
+        rng = np.random.default_rng(0)
+        coarse = rng.integers(0, 255, (args.size // 16, args.size // 16, 3), dtype=np.uint8)
+        base = cv2.resize(coarse, (args.size, args.size))
+        file_names = [f'{index:06d}.jpg' for index in range(args.images)]
+        with ShardWriter(shards_dir, max_shard_bytes=args.shard_size_mb * 1024 * 1024) as writer:
+            for index, file_name in enumerate(file_names):
+                image = np.roll(base, index, axis=1)
+                cv2.imwrite(os.path.join(files_dir, file_name), image)
+                writer.add(file_name, image)
+
+        reader = ShardReader(shards_dir)
+        sequential = np.arange(args.images)
+        shuffled = rng.permutation(args.images)
+        layouts = {
+            'files': lambda position: cv2.imread(os.path.join(files_dir, file_names[position])),
+            'shards': lambda position: reader[position][0]
+        }
+        for name, read in layouts.items():
+            print(f'{name:7s} sequential {epoch(read, args.images, sequential):9.1f} images/sec   '
+                  f'shuffled {epoch(read, args.images, shuffled):9.1f} images/sec')
+        print(f"shards: {reader.stats()['shards']} files, {reader.stats()['bytes'] / 2 ** 20:.0f} MB; "
+              f"files: {args.images} files, "
+              f"{sum(os.path.getsize(os.path.join(files_dir, f)) for f in file_names) / 2 ** 20:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
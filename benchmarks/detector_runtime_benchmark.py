@@ -0,0 +1,105 @@
+"""
+Compares CPU latency and throughput of the serving paths: the TensorFlow .h5 model app.py loads,
+the trained YOLOv8 weights run by ultralytics, and the same weights exported to ONNX and run by
+onnxruntime at several intra-op thread counts.
+
+Usage:
+    python benchmarks/detector_runtime_benchmark.py --weights artifacts/model_trainer/runs/train/weights/best.pt \
+        --onnx artifacts/model_exporter/model.onnx --keras path_to_your_model.h5 --threads 1 2 4
+
+A path that is not given or a runtime that is not installed is skipped. Latency is one image at a time
+(p50 and p95), throughput is `--batch` images per call. Every path includes its own preprocessing from
+a decoded BGR frame. The .h5 model is the classifier app.py serves, not a detector, so its numbers are
+the cost of the current TensorFlow path rather than a like-for-like comparison.
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+
+def measure(predict, images, batch_size, runs, warmup=3):
+    for _ in range(warmup):
+        predict(images[:1])
+    latencies = []
+    for run in range(runs):
+        started_at = time.perf_counter()
+        predict(images[run % len(images):run % len(images) + 1])
+        latencies.append((time.perf_counter() - started_at) * 1000.0)
+    batches = max(1, runs // batch_size)
+    started_at = time.perf_counter()
+    for _ in range(batches):
+        predict(images[:batch_size])
+    throughput = batches * batch_size / (time.perf_counter() - started_at)
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), throughput
+
+
+def keras_path(model_path):
+    from src.serving.keras_classifier import load_model, predict_batch
+    from src.serving.preprocessing import ImagePreprocessor
+    from PIL import Image
+    model = load_model(model_path)
+    preprocessor = ImagePreprocessor(target_size=(224, 224), max_batch_size=128)
+
+    def predict(images):
+        return predict_batch(model, preprocessor.preprocess_batch([Image.fromarray(image[:, :, ::-1]) for image in images]))
+    return predict
+
+
+def ultralytics_path(weights_path, image_size):
+    from ultralytics import YOLO
+    model = YOLO(weights_path)
+
+    def predict(images):
+        return model(list(images), imgsz=image_size, device='cpu', verbose=False)
+    return predict
+
+
+def onnx_path(model_path, intra_op_threads):
+    from src.serving.onnx_detector import OnnxDetector
+    detector = OnnxDetector(model_path, intra_op_threads=intra_op_threads)
+    return lambda images: detector.predict(list(images))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--weights', help='trained YOLOv8 .pt weights')
+    parser.add_argument('--onnx', help='the exported .onnx graph')
+    parser.add_argument('--keras', default=os.getenv('SERVING_MODEL_PATH'), help='the .h5 model app.py serves')
+    parser.add_argument('--image-size', type=int, default=416)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 0],
+                        help='intra-op thread counts for onnxruntime, 0 is its default of every physical core')
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 255, (max(args.batch, 8), 720, 1280, 3), dtype=np.uint8)
+
+    paths = []
+    if args.keras:
+        paths.append(('tensorflow .h5', lambda: keras_path(args.keras)))
+    if args.weights:
+        paths.append(('ultralytics', lambda: ultralytics_path(args.weights, args.image_size)))
+    if args.onnx:
+        for threads in args.threads:
+            paths.append((f'onnxruntime {threads or "all"} threads', lambda threads=threads: onnx_path(args.onnx, threads)))
+
+    print(f'{"path":28s} {"p50 ms":>9s} {"p95 ms":>9s} {"images/sec":>11s}')
+    for name, load in paths:
+        if not os.path.exists(args.keras if name.startswith('tensorflow') else
+                              args.weights if name == 'ultralytics' else args.onnx):
+            print(f'{name:28s} skipped, model file not found')
+            continue
+        try:
+            predict = load()
+        except ImportError as e:
+            print(f'{name:28s} skipped, {e}')
+            continue
+        p50, p95, throughput = measure(predict, images, args.batch, args.runs)
+        print(f'{name:28s} {p50:9.1f} {p95:9.1f} {throughput:11.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Measures images/sec and peak RSS of feature engineering for an increasing number of worker processes,
+on a generated dataset of JPEG images.
+
+Usage:
+    python benchmarks/feature_engineering_benchmark.py --images 10000 --size 1280x720 --workers 1 2 4 8
+
+Every run writes to a fresh output directory, so runs do not benefit from each other's page cache of
+the outputs; the inputs are shared and warm after the first run.
+"""
+import os
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+from src.entity.config_entity import FeatureEngineeringConfig
+from src.entity.artifacts_entity import DataValidationArtifact
+from src.components.feaature_engineering import FeatureEngineering
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=2000)
+    parser.add_argument('--size', default='1280x720')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=FeatureEngineeringConfig(feature_params={}).chunk_size)
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_path = os.path.join(temp_dir, 'images')
+        os.makedirs(data_path)
+        rng = np.random.default_rng(0)
+        coarse = rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8)
+        image = cv2.resize(coarse, (width, height))
+        for index in range(args.images):
+            cv2.imwrite(os.path.join(data_path, f'{index:06d}.jpg'), np.roll(image, index, axis=1))
+
+        baseline = None
+        for workers in args.workers:
+            feature_engineering_config = FeatureEngineeringConfig(feature_params={'width': 640, 'height': 640},
+                                                                  workers=workers, chunk_size=args.chunk_size)
+            feature_engineering_config.transformed_data_dir = os.path.join(temp_dir, f'out_{workers}')
+            data_validation_artifact = DataValidationArtifact(validation_status=True, data_status=True,
+                                                              vaildated_data_path=data_path)
+            report = FeatureEngineering(feature_engineering_config,
+                                        data_validation_artifact).initiate_feature_engineering().report
+            baseline = baseline or report['images_per_sec']
+            print(f"workers={workers:3d} {report['images_per_sec']:8.1f} images/sec "
+                  f"speedup={report['images_per_sec'] / baseline:5.2f}x "
+                  f"peak_rss={report['peak_rss_mb']:.0f} MB worker_peak_rss={report['worker_peak_rss_mb']:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
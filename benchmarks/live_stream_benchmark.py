@@ -0,0 +1,67 @@
+"""
+Measures the frames/sec each client of the live stream receives while several clients share one
+worker, on any video source. With the default synthetic source no camera, recording or GPU is needed,
+so the numbers are reproducible on a CI box.
+
+Usage:
+    python benchmarks/live_stream_benchmark.py --source synthetic:1280x720 --clients 8 --target-fps 30
+    python benchmarks/live_stream_benchmark.py --source data/test_video_3.mp4 --loop --weights yolov8s.pt
+
+Without --weights every frame is only JPEG-encoded, which isolates the capture and fan-out cost.
+"""
+import time
+import asyncio
+import argparse
+
+from src.entity.config_entity import LiveStreamConfig, VideoSourceConfig, DetectionModelConfig
+from src.serving.live_stream import LiveStreamHub
+from src.serving.model_registry import model_registry
+from src.video.annotation import FrameAnnotator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default='synthetic')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--target-fps', type=float, default=0.0)
+    parser.add_argument('--loop', action='store_true')
+    parser.add_argument('--weights', default=None)
+    args = parser.parse_args()
+
+    def processor_factory(mode):
+        if args.weights is None:
+            return lambda frame: frame
+        model = model_registry.get(DetectionModelConfig(local_path=args.weights))
+        annotator = FrameAnnotator()
+        return lambda frame: annotator.annotate(frame, model.detect(frame))
+
+    hub = LiveStreamHub(processor_factory, LiveStreamConfig(),
+                        VideoSourceConfig(target_fps=args.target_fps, loop=args.loop))
+
+    async def client(deadline):
+        frames = 0
+        async for _ in hub.stream(args.source):
+            frames += 1
+            if time.perf_counter() >= deadline:
+                break
+        return frames
+
+    async def run():
+        deadline = time.perf_counter() + args.seconds
+        return await asyncio.gather(*(client(deadline) for _ in range(args.clients)))
+
+    started_at = time.perf_counter()
+    delivered = asyncio.run(run())
+    elapsed = time.perf_counter() - started_at
+    metrics = hub.metrics()
+    hub.shutdown()
+
+    for index, frames in enumerate(delivered):
+        print(f'client {index}: {frames / elapsed:7.1f} frames/sec')
+    for key, worker in metrics.items():
+        print(f"worker {key}: {worker['frames'] / elapsed:7.1f} frames/sec produced, source {worker['video_source']}")
+
+
+if __name__ == '__main__':
+    main()
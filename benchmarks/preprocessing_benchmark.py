@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of the legacy app.py preprocess_image against ImagePreprocessor.
+
+Usage:
+    python benchmarks/preprocessing_benchmark.py --repeats 50 --source-size 1280x720
+"""
+import io
+import time
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from src.serving.preprocessing import ImagePreprocessor
+
+
+def legacy_preprocess_image(image: Image.Image, target_size) -> np.array:
+    # the original implementation from app.py, parameterised on the target size
+    image = image.resize(target_size)
+    image_array = np.array(image)
+    image_array = image_array / 255.0
+    image_array = np.expand_dims(image_array, axis=0)
+    return image_array
+
+
+def make_jpeg(width: int, height: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    # smooth gradients plus noise compress like a real frame rather than like pure noise
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    pixels = gradient + rng.normal(0, 20, (height, width, 3))
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def time_per_image(fn, payloads, repeats: int) -> float:
+    fn(payloads[0])
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        for payload in payloads:
+            fn(payload)
+    return (time.perf_counter() - started_at) * 1000.0 / (repeats * len(payloads))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--images', type=int, default=8)
+    parser.add_argument('--source-size', default='1280x720')
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.source_size.split('x'))
+    payloads = [make_jpeg(width, height, seed) for seed in range(args.images)]
+
+    print(f'{"target":>8} {"path":<22} {"ms/image":>9} {"speedup":>8}')
+    for target in (224, 640):
+        target_size = (target, target)
+        preprocessor = ImagePreprocessor(target_size=target_size, dtype=np.float32, max_batch_size=args.images)
+        quantized_preprocessor = ImagePreprocessor(target_size=target_size, dtype=np.uint8, max_batch_size=args.images)
+
+        results = {
+            'legacy float64': time_per_image(
+                lambda payload: legacy_preprocess_image(Image.open(io.BytesIO(payload)), target_size),
+                payloads, args.repeats),
+            'float32': time_per_image(preprocessor.preprocess_bytes, payloads, args.repeats),
+            'uint8': time_per_image(quantized_preprocessor.preprocess_bytes, payloads, args.repeats),
+            'float32 batch': time_per_image(
+                lambda batch: preprocessor.preprocess_batch([preprocessor.decode(payload) for payload in batch]),
+                [payloads], args.repeats) / len(payloads),
+        }
+
+        baseline = results['legacy float64']
+        for path, elapsed in results.items():
+            print(f'{target:>8} {path:<22} {elapsed:>9.3f} {baseline / elapsed:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compares the serial decode -> infer -> track loop with the threaded VideoPipeline.
+
+Usage:
+    python benchmarks/video_pipeline_benchmark.py data/test_video_3.mp4 --weights yolov8s.pt --batch-size 4
+
+Without --weights the hosted Roboflow model from DetectionModelConfig is used. The ultralytics and
+Roboflow models are not thread-safe, so with --workers above 1 the workers take turns on the model
+and only the batching and queueing around it overlap.
+"""
+import time
+import argparse
+
+import supervision as sv
+
+from src.entity.config_entity import DetectionModelConfig, VideoPipelineConfig
+from src.serving.model_registry import model_registry
+from src.video.annotation import FrameAnnotator
+from src.video.pipeline import VideoPipeline, iter_video_frames
+
+
+def run_serial(model, video_file: str, annotate: bool) -> float:
+    tracker = sv.ByteTrack()
+    annotator = FrameAnnotator(enabled=annotate)
+    frames = 0
+    started_at = time.perf_counter()
+    for frame in iter_video_frames(video_file):
+        detections = tracker.update_with_detections(model.detect(frame))
+        annotator.annotate(frame, detections)
+        frames += 1
+    return frames / (time.perf_counter() - started_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video_file')
+    parser.add_argument('--weights', default=None)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--headless', action='store_true', help='skip annotation in both runs')
+    args = parser.parse_args()
+
+    model = model_registry.get(DetectionModelConfig(local_path=args.weights))
+
+    serial_fps = run_serial(model, args.video_file, annotate=not args.headless)
+    pipeline = VideoPipeline(
+        model, VideoPipelineConfig(batch_size=args.batch_size, inference_workers=args.workers),
+        annotator=None if args.headless else FrameAnnotator()
+    )
+    summary = pipeline.run(args.video_file)
+
+    print(f'serial   : {serial_fps:7.2f} fps')
+    print(f'pipeline : {summary["fps"]:7.2f} fps ({summary["fps"] / serial_fps:.2f}x)')
+    print(pipeline.stage_timer.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,31 @@
 import os
 import sys
-import zipfile
 import gdown
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 from src.logger import logging
 from src.exception import AppException
 from src.entity.artifacts_entity import DataIngestionArtifact
 from src.entity.config_entity import DataIngestionConfig
+from src.utils.archive import StreamingZipExtractor, extract_zip_parallel, open_url_stream
+from src.utils.download import DownloadManager
+from src.utils.main_utils import link_or_copy
+
+
+def is_google_drive_url(url: str) -> bool:
+    return 'drive.google.com' in url
 
 
 class DataIngestion:
     def __init__(self, data_ingestion_config: DataIngestionConfig = DataIngestionConfig()):
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.download_manager = DownloadManager(
+                data_ingestion_config.download_cache_dir,
+                chunk_size=data_ingestion_config.download_chunk_mb * 1024 * 1024,
+                workers=data_ingestion_config.download_workers
+            )
         except Exception as e:
             raise AppException(e, sys)
     
@@ -20,6 +33,9 @@ class DataIngestion:
         """
     Downloads the data from the specified URL and saves it as a zip file.
 
+    Downloads go through the machine wide download cache, so a dataset url is only fetched once;
+    http(s) downloads resume after an interruption and are checked against `data_sha256` when set.
+
     Parameters:
     self (DataIngestion): The instance of the DataIngestion class.
 
@@ -39,10 +55,23 @@ class DataIngestion:
             data_file_name = 'data.zip'
             zip_file_path = os.path.join(zip_download_dir, data_file_name)
             logging.info(f'Downloading file: {zip_file_path} from {dataset_url}')
-            # manipulating tte string url for gdown since it had some extra stuff in it.
-            file_id = dataset_url.split('/')[-2]
-            prefix = ''
-            gdown.download(prefix+file_id, zip_file_path)
+            sha256 = self.data_ingestion_config.data_sha256 or None
+            if is_google_drive_url(dataset_url):
+                cached = self.download_manager.cached(dataset_url, sha256)
+                if cached is None:
+                    # manipulating tte string url for gdown since it had some extra stuff in it.
+                    file_id = dataset_url.split('/')[-2]
+                    prefix = ''
+                    downloaded_path = f'{zip_file_path}.download'
+                    gdown.download(prefix+file_id, downloaded_path)
+                    self.download_manager.add_file(dataset_url, downloaded_path, sha256)
+                self.download_manager.download(dataset_url, sha256, destination=zip_file_path)
+            elif dataset_url.startswith(('http://', 'https://')):
+                self.download_manager.download(dataset_url, sha256, destination=zip_file_path)
+            else:
+                # file:// or a local path, e.g. a mirror of the dataset; linked rather than copied where possible
+                source_path = url2pathname(urlparse(dataset_url).path) if dataset_url.startswith('file://') else dataset_url
+                link_or_copy(source_path, zip_file_path)
             logging.info(f'Downloaded file: {zip_file_path}')
 
 
@@ -74,10 +103,8 @@ class DataIngestion:
             # Create the feature store directory if it does not exist
             os.makedirs(feature_store_path, exist_ok=True)
 
-            # Open the zip file in read mode
-            with zipfile.ZipFile(zip_file_path, 'r') as zipped_feature_store:
-                # Extract all files from the zip file to the feature store directory
-                zipped_feature_store.extractall(feature_store_path)
+            # Extract the members across threads, skipping the ones already extracted with the same size and CRC
+            extract_zip_parallel(zip_file_path, feature_store_path, self.data_ingestion_config.extract_workers)
 
             # Log the successful extraction
             logging.info(f'Extracted file: {feature_store_path}')
@@ -89,6 +116,33 @@ class DataIngestion:
             # Raise an AppException with the original exception and the current stack trace
             raise AppException(e, sys)
     
+    def stream_data_from_url(self) -> str:
+        """
+    Extracts the archive at the data url while it downloads, without saving the archive itself, so
+    ingestion takes about as long as the download and needs no disk space for the zip file.
+
+    Parameters:
+    self (DataIngestion): The instance of the DataIngestion class.
+
+    Returns:
+    str: The path of the directory where the zip file contents are extracted.
+
+    Raises:
+    AppException: If the download fails, the archive cannot be streamed or a member fails its CRC check.
+    """
+        try:
+            dataset_url = self.data_ingestion_config.data_download_url
+            feature_store_path = self.data_ingestion_config.feature_store_file_path
+            # a cached archive is read from disk instead of being streamed again
+            cached = self.download_manager.cached(dataset_url, self.data_ingestion_config.data_sha256 or None)
+            logging.info(f'Streaming and extracting {cached or dataset_url} into {feature_store_path}')
+            with open_url_stream(cached or dataset_url) as source:
+                StreamingZipExtractor(feature_store_path).extract(source)
+            logging.info(f'Extracted file: {feature_store_path}')
+            return feature_store_path
+        except Exception as e:
+            raise AppException(e, sys)
+
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         """
     Initiates the data ingestion process by downloading the data from the specified URL,
@@ -103,15 +157,22 @@ class DataIngestion:
     Raises:
     AppException: If any error occurs during the data ingestion process.
     """
-        # Download the data from the specified URL
-        zip_file_path = self.download_data_from_url()
-
-        # Extract the contents of the zip file
-        feature_store_path = self.extract_zip_file(zip_file_path)
+        streaming = (self.data_ingestion_config.ingestion_mode == 'stream'
+                     and not is_google_drive_url(self.data_ingestion_config.data_download_url))
+        if streaming:
+            # no archive is kept in streaming mode
+            zip_file_path = None
+            feature_store_path = self.stream_data_from_url()
+        else:
+            # Download the data from the specified URL
+            zip_file_path = self.download_data_from_url()
+
+            # Extract the contents of the zip file
+            feature_store_path = self.extract_zip_file(zip_file_path)
 
         # Create a DataIngestionArtifact object with the paths of the downloaded zip file and the extracted feature store
         data_ingestion_artifact = DataIngestionArtifact(
-            zip_file_path=zip_file_path,
+            data_zip_file_path=zip_file_path,
             feature_store_path=feature_store_path
         )
         # Return the DataIngestionArtifact object
@@ -1,8 +1,8 @@
 import os,sys
-import shutil
 from src.logger import logging
 from src.exception import AppException
 from src.entity.config_entity import DataValidationConfig
+from src.components.dataset_validator import DatasetValidator, write_report
 from src.entity.artifacts_entity import (DataIngestionArtifact,
                                                  DataValidationArtifact)
 
@@ -24,45 +24,65 @@ class DataValidation:
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_config = data_validation_config
+            self._report = None
         except Exception as e:
             raise AppException(e, sys)
         
-    def validate_data_within_files(self)-> bool:
+    def validate_dataset(self) -> dict:
         """
-        Validates the data within the files present in the feature store path.
+        Validates the feature store in a single pass and writes the JSON report and the status file once.
+        The report is kept, so the checks below share one walk of the dataset.
 
         Parameters:
         self (DataValidation): The instance of the DataValidation class.
 
         Returns:
-        bool: Returns True if all the directories within the files are not empty, else returns False.
+        dict: The validation report, see DatasetValidator.validate.
 
         Raises:
         AppException: If any error occurs during the validation process.
         """
         try:
-            isPresent = None
-            all_files_from_ingestion = os.listdir(self.data_ingestion_artifact.feature_store_path) 
-            for file in all_files_from_ingestion:
-                data_folders = os.listdir(file)
-                if len(data_folders) > 1:
-                    for data_folder in data_folders:
-                        if (os.path.getsize(data_folder) == 0):
-                            logging.info(f"The directory {data_folder} is empty")
-                            isPresent = False
-                        else:
-                            logging.info(f"The directory {data_folder} is not empty")
-                            isPresent = True
-                            # return isPresent
-                else:
-                    logging.info("The directory has zero contents")
-                    isPresent = False
-            return isPresent
-
+            if self._report is None:
+                validator = DatasetValidator(
+                    self.data_validation_config.required_file_list,
+                    self.data_validation_config.image_extensions,
+                    workers=self.data_validation_config.workers,
+                    max_errors=self.data_validation_config.max_reported_errors,
+                    deep_check=self.data_validation_config.deep_check,
+                    find_duplicates=self.data_validation_config.find_duplicates,
+                    sample_size=self.data_validation_config.sample_size,
+                    cache_path=self.data_validation_config.cache_file_path,
+                    min_box_pixels=self.data_validation_config.min_box_pixels
+                )
+                report = validator.validate(self.data_ingestion_artifact.feature_store_path)
+                write_report(report, self.data_validation_config.report_file_path)
+                validation_status = report['required_files_present']
+                os.makedirs(os.path.dirname(self.data_validation_config.valid_status_file_dir), exist_ok=True)
+                with open(self.data_validation_config.valid_status_file_dir, 'w') as f:
+                    f.write(f'Validation Status: {validation_status}')
+                logging.info(f'Validation Status: {validation_status}, report: {self.data_validation_config.report_file_path}')
+                self._report = report
+            return self._report
         except Exception as e:
             raise AppException(e, sys)
-        
-    
+
+    def validate_data_within_files(self)-> bool:
+        """
+        Validates the data within the files present in the feature store path.
+
+        Parameters:
+        self (DataValidation): The instance of the DataValidation class.
+
+        Returns:
+        bool: Returns True if every required split holds images and no image or label file is corrupt,
+        malformed or unpaired, else returns False.
+
+        Raises:
+        AppException: If any error occurs during the validation process.
+        """
+        return self.validate_dataset()['data_valid']
+
     def validate_all_files(self)-> bool:
         """
         Validates all files present in the feature store path against the required file list.
@@ -76,48 +96,23 @@ class DataValidation:
         Raises:
         AppException: If any error occurs during the validation process.
         """
-        try:
-            validation_status = None
-            # Get all files from the feature store path
-            all_files_from_ingestion = os.listdir(self.data_ingestion_artifact.feature_store_path)
-
-            for file in all_files_from_ingestion:
-                # Check if the file is in the required file list
-                if file not in self.data_validation_config.required_file_list:
-                    # If not, set validation status to False and log it
-                    validation_status = False
-                    os.makedirs(self.data_validation_config.data_validation_dir, exist_ok=True)
-                    with open(self.data_validation_config.data_validation_dir, 'w') as f:
-                        f.write(f'Validation Status: {validation_status}')
-                    logging.info(f'Validation Status: {validation_status}')
-                else:
-                    # If yes, set validation status to True and log it
-                    validation_status = True
-                    # isPresent = self.validate_data_within_files(file)
-                    os.makedirs(self.data_validation_config.data_validation_dir, exist_ok=True)
-                    with open(self.data_validation_config.data_validation_dir, 'w') as f:
-                        f.write(f'Validation Status: {validation_status}')
-                    logging.info(f'Validation Status: {validation_status}')
-            
-            return validation_status
-        except Exception as e:
-            raise AppException(e, sys)
-        
-   
+        return self.validate_dataset()['required_files_present']
 
     def initiate_validation(self)-> DataValidationArtifact:
 
         try:
             val_status = self.validate_all_files()
             data_status = self.validate_data_within_files()
+            # the validated dataset is handed on by reference, nothing is copied or extracted again
+            feature_store_path = self.data_ingestion_artifact.feature_store_path
             data_validation_artifact = DataValidationArtifact(
                 validation_status=val_status,
-                data_status= data_status
-            )        
+                data_status= data_status,
+                vaildated_data_path=feature_store_path,
+                data_yaml_file_path=os.path.join(feature_store_path, 'data.yaml'),
+                report_file_path=self.data_validation_config.report_file_path
+            )
 
-            if val_status:
-                shutil.copy(self.data_ingestion_artifact.data_zip_file_path, os.getcwd())
-            
             return data_validation_artifact
         except Exception as e:
             raise AppException(e, sys)
@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from src.logger import logging
+from src.utils.manifest import FileManifest
+from src.utils.image_integrity import check_labels_against_image, find_duplicates, inspect_image, wilson_upper_bound
+
+# leading bytes of every image format the pipeline reads
+IMAGE_SIGNATURES = {
+    'jpeg': (b'\xff\xd8\xff',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'bmp': (b'BM',),
+    'webp': (b'RIFF',)
+}
+JPEG_END_OF_IMAGE = b'\xff\xd9'
+# how far from the end a JPEG's end of image marker may sit, some encoders pad after it
+JPEG_TAIL_BYTES = 1024
+
+# files checked per thread pool task, small per file work is not worth a task of its own
+FILES_PER_TASK = 256
+
+# bump whenever inspect_image changes, so results cached by an older version are not reused
+INSPECTION_VERSION = 1
+
+# label findings that are reported but do not make the data invalid: the trainer clips boxes to the
+# image, and exporters routinely produce a few tiny or slightly out of frame boxes
+WARNING_CHECKS = ('label_bounds', 'label_box_size')
+
+
+def check_image_header(file_path: str) -> Optional[str]:
+    """
+    Checks an image from its first and last bytes without decoding it: the file must start with a
+    known signature and a JPEG must still end with its end of image marker, which a truncated
+    download or extraction does not.
+
+    Returns:
+    str: Why the image is corrupt, or None when it looks intact.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(16)
+        if not head:
+            return 'empty file'
+        if head.startswith(IMAGE_SIGNATURES['jpeg']):
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - JPEG_TAIL_BYTES))
+            if JPEG_END_OF_IMAGE not in f.read():
+                return 'truncated JPEG, no end of image marker'
+            return None
+    if head.startswith(IMAGE_SIGNATURES['webp']) and head[8:12] == b'WEBP':
+        return None
+    if head.startswith(IMAGE_SIGNATURES['png'] + IMAGE_SIGNATURES['bmp']):
+        return None
+    return 'unknown image signature'
+
+
+def check_label_file(file_path: str) -> Optional[str]:
+    """
+    Checks a YOLO label file: every non-empty row is a class id followed by a box (4 values) or a
+    polygon (pairs of values), all normalized to [0, 1].
+
+    Returns:
+    str: The first problem found, or None when every row is valid.
+    """
+    with open(file_path, 'r') as f:
+        for line_number, line in enumerate(f, start=1):
+            values = line.split()
+            if not values:
+                continue
+            if len(values) < 5 or len(values) % 2 == 0:
+                return f'line {line_number}: expected a class and 4 box values or polygon pairs, got {len(values)} values'
+            if not values[0].isdigit():
+                return f'line {line_number}: class {values[0]!r} is not a non-negative integer'
+            try:
+                coordinates = [float(value) for value in values[1:]]
+            except ValueError:
+                return f'line {line_number}: coordinates are not numbers'
+            if any(not 0.0 <= value <= 1.0 for value in coordinates):
+                return f'line {line_number}: coordinates are not normalized to [0, 1]'
+    return None
+
+
+def _scan(directory: str) -> List[Tuple[str, str]]:
+    # (name, path) of the files directly inside a directory, an absent directory has none
+    try:
+        with os.scandir(directory) as entries:
+            return [(entry.name, entry.path) for entry in entries if entry.is_file()]
+    except FileNotFoundError:
+        return []
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class DatasetValidator:
+    def __init__(self, required_files: List[str], image_extensions: List[str], workers: int = 8,
+                 max_errors: int = 1000, deep_check: str = 'off', find_duplicates: bool = False,
+                 sample_size: int = 0, cache_path: Optional[str] = None, min_box_pixels: float = 2.0,
+                 duplicate_distance: int = 2, seed: int = 0):
+        """
+        Validates a YOLO dataset in one pass: the required top level entries, the images/ and labels/
+        pairing of every split, image headers and the format of every label file. Directories are
+        listed once with os.scandir and the per file checks run across a thread pool, since they are
+        dominated by small reads.
+
+        The optional deep stage opens every image: it reads its size (from the header, or by decoding
+        it in full), checks the label rows against that size and the `nc` of data.yaml, and hashes the
+        image perceptually to find duplicates, including leaks between splits. With `sample_size` only a
+        random sample of each split is inspected and the report estimates the failure rate of the rest.
+        Results are cached per file content in `cache_path`, so unchanged images are not opened again.
+
+        Parameters:
+        required_files (list): The entries the dataset root must contain, e.g. train, valid and data.yaml.
+        image_extensions (list): The extensions of image files, lower case with the dot.
+        workers (int): The number of threads checking files.
+        max_errors (int): The number of problems, and of warnings, listed in the report, all of them are counted.
+        deep_check (str): "off", "header" or "full", see inspect_image.
+        find_duplicates (bool): Whether the deep stage looks for duplicate images.
+        sample_size (int): Images inspected per split by the deep stage, 0 inspects all of them.
+        cache_path (str): The JSON file deep stage results are cached in, None disables the cache.
+        min_box_pixels (float): The smallest box width or height, in pixels, that is not warned about.
+        duplicate_distance (int): Perceptual hashes at most this many bits apart are duplicates.
+        seed (int): The seed of the sample.
+        """
+        self.required_files = required_files
+        self.image_extensions = tuple(image_extensions)
+        self.workers = workers
+        self.max_errors = max_errors
+        self.deep_check = deep_check
+        self.find_duplicates = find_duplicates
+        self.sample_size = sample_size
+        self.cache_path = cache_path
+        self.min_box_pixels = min_box_pixels
+        self.duplicate_distance = duplicate_distance
+        self.seed = seed
+
+    def validate(self, root: str) -> dict:
+        """
+        Validates the dataset at `root`.
+
+        Returns:
+        dict: The report: whether the required entries are present, per split counts, the problems
+        found, the warnings (see WARNING_CHECKS), whether the data is valid and how long the validation took.
+        """
+        started_at = time.perf_counter()
+        try:
+            with os.scandir(root) as entries:
+                top_level = {entry.name: entry.is_dir() for entry in entries}
+        except FileNotFoundError:
+            top_level = {}
+        # data.yaml is a file, everything else required is a split directory
+        required = {
+            name: name in top_level and top_level[name] == (os.path.splitext(name)[1] == '')
+            for name in self.required_files
+        }
+        split_names = sorted(name for name, is_dir in top_level.items() if is_dir)
+
+        errors: List[Dict[str, str]] = []
+        warnings: List[Dict[str, str]] = []
+        splits = {}
+        pairs = {}
+        deep, duplicates = None, None
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            listings = pool.map(lambda name: (_scan(os.path.join(root, name, 'images')),
+                                              _scan(os.path.join(root, name, 'labels'))), split_names)
+            for split, (images, labels) in zip(split_names, listings):
+                splits[split], pairs[split] = self._validate_split(pool, split, images, labels, errors)
+            if self.deep_check != 'off':
+                deep, duplicates = self._inspect(pool, root, pairs, errors, warnings)
+
+        files_checked = sum(split['images'] + split['labels'] for split in splits.values())
+        elapsed = time.perf_counter() - started_at
+        required_present = all(required.values())
+        report = {
+            'root': os.path.abspath(root),
+            'required_files_present': required_present,
+            'required_files': required,
+            # every required split holds images and no file has a problem
+            'data_valid': required_present and not errors and all(
+                splits[name]['images'] > 0 for name in required if name in splits
+            ),
+            'splits': splits,
+            'deep': deep,
+            'duplicates': duplicates,
+            'error_count': len(errors),
+            'errors': errors[:self.max_errors],
+            'warning_count': len(warnings),
+            'warnings': warnings[:self.max_errors],
+            'files_checked': files_checked,
+            'elapsed_seconds': round(elapsed, 3),
+            'files_per_second': round(files_checked / max(elapsed, 1e-9), 1)
+        }
+        logging.info(f'Validated {files_checked} files of {root} in {elapsed:.2f}s: '
+                     f'required files present {required_present}, {len(errors)} problems, {len(warnings)} warnings')
+        return report
+
+    def _validate_split(self, pool: ThreadPoolExecutor, split: str, images: List[Tuple[str, str]],
+                        labels: List[Tuple[str, str]], errors: List[Dict[str, str]]) -> dict:
+        images = [(name, path) for name, path in images if name.lower().endswith(self.image_extensions)]
+        labels = [(name, path) for name, path in labels if name.endswith('.txt')]
+        image_stems = {os.path.splitext(name)[0] for name, _ in images}
+        label_paths = {os.path.splitext(name)[0]: path for name, path in labels}
+        label_stems = set(label_paths)
+
+        def add_error(check: str, path: str, message: str) -> None:
+            errors.append({'split': split, 'check': check, 'path': path, 'message': message})
+
+        corrupt_images = 0
+        for results in pool.map(lambda chunk: [(path, check_image_header(path)) for _, path in chunk],
+                                _chunks(images, FILES_PER_TASK)):
+            for path, problem in results:
+                if problem is not None:
+                    corrupt_images += 1
+                    add_error('image_header', path, problem)
+
+        invalid_labels = 0
+        for results in pool.map(lambda chunk: [(path, check_label_file(path)) for _, path in chunk],
+                                _chunks(labels, FILES_PER_TASK)):
+            for path, problem in results:
+                if problem is not None:
+                    invalid_labels += 1
+                    add_error('label_format', path, problem)
+
+        orphan_labels = sorted(label_stems - image_stems)
+        for stem in orphan_labels:
+            add_error('pairing', label_paths[stem], 'label file without an image')
+
+        summary = {
+            'images': len(images),
+            'labels': len(labels),
+            # images without a label file are background images to YOLO, reported but not an error
+            'unlabeled_images': len(image_stems - label_stems),
+            'orphan_labels': len(orphan_labels),
+            'corrupt_images': corrupt_images,
+            'invalid_labels': invalid_labels
+        }
+        # the images and their label files, for the deep stage
+        pairs = [(path, label_paths.get(os.path.splitext(name)[0])) for name, path in images]
+        return summary, pairs
+
+    def _inspect(self, pool: ThreadPoolExecutor, root: str, pairs: Dict[str, List[Tuple[str, Optional[str]]]],
+                 errors: List[Dict[str, str]], warnings: List[Dict[str, str]]) -> Tuple[dict, dict]:
+        nc = self._read_nc(root, errors)
+        rng = random.Random(self.seed)
+        samples = []
+        for split, split_pairs in pairs.items():
+            if self.sample_size and len(split_pairs) > self.sample_size:
+                split_pairs = rng.sample(split_pairs, self.sample_size)
+            samples.extend((split, image_path, label_path) for image_path, label_path in split_pairs)
+
+        cache = None
+        if self.cache_path is not None:
+            cache = FileManifest(self.cache_path, {
+                'version': INSPECTION_VERSION, 'deep_check': self.deep_check, 'find_duplicates': self.find_duplicates
+            })
+
+        def inspect(chunk):
+            results = []
+            for split, image_path, label_path in chunk:
+                key = os.path.relpath(image_path, root)
+                cached = cache is not None and 'result' in cache.entries.get(key, {}) and cache.is_fresh(key, image_path)
+                result = cache.entries[key]['result'] if cached else inspect_image(image_path, self.deep_check, self.find_duplicates)
+                label_problems = []
+                # label files are small, they are checked again every run
+                if result['problem'] is None and label_path is not None:
+                    label_problems = check_labels_against_image(label_path, result['width'], result['height'], nc,
+                                                                self.min_box_pixels)
+                results.append((split, key, image_path, label_path, result, cached, label_problems))
+            return results
+
+        failures, from_cache, hashes = 0, 0, {}
+        for results in pool.map(inspect, _chunks(samples, FILES_PER_TASK)):
+            for split, key, image_path, label_path, result, cached, label_problems in results:
+                if cached:
+                    from_cache += 1
+                elif cache is not None:
+                    cache.record(key, image_path, result['sha256'])
+                    cache.entries[key]['result'] = {name: value for name, value in result.items() if name != 'sha256'}
+                if result['problem'] is not None:
+                    errors.append({'split': split, 'check': 'image_decode', 'path': image_path, 'message': result['problem']})
+                label_errors = 0
+                for check, message in label_problems:
+                    problem = {'split': split, 'check': check, 'path': label_path, 'message': message}
+                    if check in WARNING_CHECKS:
+                        warnings.append(problem)
+                    else:
+                        errors.append(problem)
+                        label_errors += 1
+                if result['problem'] is not None or label_errors:
+                    failures += 1
+                if result['dhash'] is not None:
+                    hashes[key] = result['dhash']
+
+        if cache is not None:
+            if not self.sample_size:
+                # a full run sees every image, entries of deleted images can go
+                cache.forget(set(cache.entries) - {os.path.relpath(image_path, root) for _, image_path, _ in samples})
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            cache.save()
+
+        groups = find_duplicates(hashes, self.duplicate_distance) if self.find_duplicates else []
+        deep = {
+            'mode': self.deep_check,
+            'sampled': bool(self.sample_size) and len(samples) < sum(len(split_pairs) for split_pairs in pairs.values()),
+            'images_checked': len(samples),
+            'from_cache': from_cache,
+            'failures': failures,
+            'failure_rate': round(failures / len(samples), 6) if samples else 0.0,
+            # with 95% confidence the failure rate of the whole dataset is at most this
+            'failure_rate_upper_95': round(wilson_upper_bound(failures, len(samples)), 6)
+        }
+        duplicates = {
+            'group_count': len(groups),
+            'images': sum(len(group) for group in groups),
+            # the same picture in two splits inflates validation scores
+            'cross_split_groups': sum(1 for group in groups if len({key.split(os.sep)[0] for key in group}) > 1),
+            'groups': groups[:self.max_errors]
+        }
+        logging.info(f'Inspected {len(samples)} images ({from_cache} from cache): {failures} failures, '
+                     f'{len(groups)} duplicate groups')
+        return deep, duplicates
+
+    @staticmethod
+    def _read_nc(root: str, errors: List[Dict[str, str]]) -> Optional[int]:
+        # the number of classes from data.yaml, None when it cannot be read so classes go unchecked
+        data_yaml_path = os.path.join(root, 'data.yaml')
+        try:
+            with open(data_yaml_path, 'r') as f:
+                data = yaml.safe_load(f) or {}
+            return int(data['nc']) if 'nc' in data else len(data['names'])
+        except FileNotFoundError:
+            return None
+        except (yaml.YAMLError, KeyError, TypeError, ValueError) as e:
+            errors.append({'split': '', 'check': 'data_yaml', 'path': data_yaml_path,
+                           'message': f'no class count: {e!r}'})
+            return None
+
+
+def write_report(report: dict, report_file_path: str) -> None:
+    """
+    Writes a validation report as JSON, replacing the previous one in a single step.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(report_file_path)), exist_ok=True)
+    with open(f'{report_file_path}.tmp', 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(f'{report_file_path}.tmp', report_file_path)
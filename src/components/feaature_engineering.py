@@ -1,17 +1,215 @@
 import os
 import sys
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Tuple
+
 import cv2
 import numpy as np
 from src.exception import AppException
 from src.logger import logging
 from src.entity.config_entity import FeatureEngineeringConfig
 from src.entity.artifacts_entity import  DataValidationArtifact, FeatureEngineeringArtifact
+from src.utils.manifest import FileManifest
+from src.utils.shards import SHARD_INDEX_FILE, label_path_for, read_yolo_labels, write_shard, write_shard_index
+
+# bump whenever transform_image changes, so outputs cached by the manifest are rebuilt
+TRANSFORM_VERSION = 1
+
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of the calling process in MB, or 0.0 where the platform
+    does not report it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def transform_image(image: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    # dividing by 255 and multiplying back before imwrite returned the same uint8 pixels, so the
+    # image stays uint8 and skips the two full size float64 temporaries
+    return cv2.resize(image, size)
+
+
+def transform_chunk(image_files: List[str], data_path: str, transformed_data_path: str,
+                    size: Tuple[int, int]) -> dict:
+    """
+    Reads, transforms and writes one chunk of images. Runs in a worker process, so only file names
+    cross the process boundary and every image is written to disk as soon as it is transformed.
+
+    Returns:
+    dict: The SHA-256 of every source image, hashed from the same read that decodes it, and the
+    worker's peak RSS in MB.
+    """
+    digests = {}
+    for img_file, img in _read_images(image_files, data_path, digests):
+        cv2.imwrite(os.path.join(transformed_data_path, img_file), transform_image(img, size))
+    return {'digests': digests, 'peak_rss_mb': peak_rss_mb()}
+
+
+def transform_shard(shard_path: str, image_files: List[str], data_path: str, size: Tuple[int, int]) -> dict:
+    """
+    Transforms one chunk of images and packs their raw pixels and YOLO labels into a single shard.
+
+    Returns:
+    dict: The source image digests, the worker's peak RSS in MB and the shard's entry for the shard index.
+    """
+    digests = {}
+    samples = (
+        (img_file, transform_image(img, size), read_yolo_labels(label_path_for(os.path.join(data_path, img_file))))
+        for img_file, img in _read_images(image_files, data_path, digests)
+    )
+    shard = write_shard(shard_path, samples)
+    return {'digests': digests, 'peak_rss_mb': peak_rss_mb(), 'shard': shard}
+
+
+def _read_images(image_files: List[str], data_path: str, digests: Dict[str, str]):
+    for img_file in image_files:
+        data = np.fromfile(os.path.join(data_path, img_file), dtype=np.uint8)
+        img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError(f'Could not read image {img_file}')
+        digests[img_file] = hashlib.sha256(data).hexdigest()
+        yield img_file, img
+
+
+def _initialize_worker() -> None:
+    # one OpenCV thread per process, the pool already uses every core
+    cv2.setNumThreads(1)
+
 
 class FeatureEngineering:
     def __init__(self, feature_engineering_config: FeatureEngineeringConfig, data_validation_artifact: DataValidationArtifact):
         self.feature_engineering_config = feature_engineering_config
         self.data_validation_artifact = data_validation_artifact
-    
+
+    def list_images(self, data_path: str) -> List[str]:
+        extensions = self.feature_engineering_config.image_extensions
+        return sorted(
+            entry.name for entry in os.scandir(data_path)
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+        )
+
+    def transform_images(self, image_files: List[str], data_path: str,
+                         transformed_data_path: str) -> Tuple[Dict[str, str], float, List[dict]]:
+        """
+        Transforms the images in chunks across a process pool, keeping at most
+        `workers * max_in_flight_per_worker` chunks submitted at a time so memory stays bounded however
+        large the dataset is. Small datasets are transformed in this process, where a pool would not pay off.
+
+        In the shards output format every chunk is sized to fill one shard of about `shard_size_mb`.
+
+        Returns:
+        Tuple[Dict[str, str], float, List[dict]]: The SHA-256 of every transformed source image, the
+        highest peak RSS in MB of the worker processes (0.0 when no pool was used) and the shards written.
+        """
+        config = self.feature_engineering_config
+        size = (config.feature_params['width'], config.feature_params['height'])
+        if config.output_format == 'shards':
+            chunk_size = max(1, int(config.shard_size_mb * 1024 * 1024) // (size[0] * size[1] * 3))
+            chunks = [image_files[start:start + chunk_size] for start in range(0, len(image_files), chunk_size)]
+            tasks = [
+                (transform_shard, (os.path.join(transformed_data_path, f'shard-{position:05d}'), chunk, data_path, size))
+                for position, chunk in enumerate(chunks)
+            ]
+        else:
+            chunk_size = config.chunk_size
+            chunks = [image_files[start:start + chunk_size] for start in range(0, len(image_files), chunk_size)]
+            tasks = [(transform_chunk, (chunk, data_path, transformed_data_path, size)) for chunk in chunks]
+
+        digests, shards = {}, []
+        worker_peak_rss_mb = 0.0
+
+        def collect(result: dict, from_worker: bool = True) -> None:
+            nonlocal worker_peak_rss_mb
+            digests.update(result['digests'])
+            if 'shard' in result:
+                shards.append(result['shard'])
+            if from_worker:
+                worker_peak_rss_mb = max(worker_peak_rss_mb, result['peak_rss_mb'])
+
+        workers = min(config.workers, len(tasks))
+        if workers <= 1:
+            for task, args in tasks:
+                collect(task(*args), from_worker=False)
+            return digests, 0.0, shards
+
+        max_in_flight = workers * config.max_in_flight_per_worker
+        pending = set()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_initialize_worker) as pool:
+            for task, args in tasks:
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                pending.add(pool.submit(task, *args))
+            for future in wait(pending).done:
+                collect(future.result())
+        return digests, worker_peak_rss_mb, shards
+
+    def plan(self, image_files: List[str], data_path: str, transformed_data_path: str,
+             manifest: FileManifest) -> Tuple[List[str], List[str]]:
+        """
+        Splits the work into the images that have to be transformed and the outputs that no longer
+        have a source image.
+
+        In the shards output format any change rebuilds every shard, because shards are packed in order
+        and cannot be patched in place; label files are then part of the check too.
+
+        Returns:
+        Tuple[List[str], List[str]]: The new or changed source images and the orphaned output files.
+        """
+        manifest_file_name = os.path.basename(manifest.manifest_path)
+        if self.feature_engineering_config.output_format == 'shards':
+            fresh = (
+                self.feature_engineering_config.use_cache
+                and os.path.exists(os.path.join(transformed_data_path, SHARD_INDEX_FILE))
+                and set(manifest.entries) == set(image_files) | set(self._label_keys(image_files, data_path))
+                and all(manifest.is_fresh(key, path) for key, path in self._tracked_files(image_files, data_path))
+            )
+            if fresh:
+                return [], []
+            outputs = sorted(
+                entry.name for entry in os.scandir(transformed_data_path)
+                if entry.is_file() and not entry.name.startswith(manifest_file_name)
+            )
+            return list(image_files), outputs
+
+        stale = [
+            img_file for img_file in image_files
+            if not (self.feature_engineering_config.use_cache
+                    and manifest.is_fresh(img_file, os.path.join(data_path, img_file))
+                    and os.path.exists(os.path.join(transformed_data_path, img_file)))
+        ]
+        sources = set(image_files)
+        orphans = sorted(
+            entry.name for entry in os.scandir(transformed_data_path)
+            if entry.is_file() and entry.name not in sources and not entry.name.startswith(manifest_file_name)
+        )
+        return stale, orphans
+
+    @staticmethod
+    def _label_keys(image_files: List[str], data_path: str) -> Dict[str, str]:
+        labels = {}
+        for img_file in image_files:
+            label_path = label_path_for(os.path.join(data_path, img_file))
+            if os.path.exists(label_path):
+                labels[f'labels/{img_file}'] = label_path
+        return labels
+
+    def _tracked_files(self, image_files: List[str], data_path: str) -> List[Tuple[str, str]]:
+        images = [(img_file, os.path.join(data_path, img_file)) for img_file in image_files]
+        return images + list(self._label_keys(image_files, data_path).items())
+
     def initiate_feature_engineering(self) -> FeatureEngineeringArtifact:
         """
         Initiates the feature engineering process.
@@ -19,7 +217,8 @@ class FeatureEngineering:
         Parameters:
         self (FeatureEngineering): The instance of the FeatureEngineering class.
         Returns:
-        FeatureEngineeringArtifact: An object containing the path to the transformed data.
+        FeatureEngineeringArtifact: An object containing the path to the transformed data and a report
+        with the images/sec and peak RSS of the run.
 
         Raises:
         AppException: If an error occurs during the feature engineering process.
@@ -29,24 +228,59 @@ class FeatureEngineering:
             logging.info('Starting feature engineering')
             # Load validated data
             data_path = self.data_validation_artifact.vaildated_data_path
-            transformed_data_path = os.path.join("artifacts", "transformed_data")
+            transformed_data_path = self.feature_engineering_config.transformed_data_dir
 
             if not os.path.exists(transformed_data_path):
                 os.makedirs(transformed_data_path)
 
-            # Example: Apply transformations (e.g., resize, normalize)
-            for img_file in os.listdir(data_path):
-                img = cv2.imread(os.path.join(data_path, img_file))
-                # Apply transformations (example)
-                img_resized = cv2.resize(img, (self.feature_engineering_config.feature_params['width'], self.feature_engineering_config.feature_params['height']))
-                img_normalized = img_resized / 255.0  # Normalizing
+            started_at = time.perf_counter()
+            image_files = self.list_images(data_path)
+            params = {
+                'feature_params': self.feature_engineering_config.feature_params,
+                'transform_version': TRANSFORM_VERSION,
+                'output_format': self.feature_engineering_config.output_format
+            }
+            if self.feature_engineering_config.output_format == 'shards':
+                params['shard_size_mb'] = self.feature_engineering_config.shard_size_mb
+            manifest = FileManifest(
+                os.path.join(transformed_data_path, self.feature_engineering_config.manifest_file_name), params
+            )
+            stale, orphans = self.plan(image_files, data_path, transformed_data_path, manifest)
+            for orphan in orphans:
+                os.remove(os.path.join(transformed_data_path, orphan))
+            if self.feature_engineering_config.output_format == 'shards':
+                if stale:
+                    # the shards are rebuilt from scratch, so is their manifest
+                    manifest.entries = {}
+            else:
+                manifest.forget(set(manifest.entries) - set(image_files))
+            logging.info(f'Feature engineering: {len(stale)} of {len(image_files)} images to transform, '
+                         f'{len(orphans)} orphaned outputs removed')
 
-                # Save the transformed image
-                transformed_file_path = os.path.join(transformed_data_path, img_file)
-                cv2.imwrite(transformed_file_path, img_normalized * 255)
+            digests, worker_peak_rss_mb, shards = self.transform_images(stale, data_path, transformed_data_path)
+            for img_file, digest in digests.items():
+                manifest.record(img_file, os.path.join(data_path, img_file), digest)
+            if self.feature_engineering_config.output_format == 'shards' and stale:
+                for key, label_path in self._label_keys(image_files, data_path).items():
+                    manifest.record(key, label_path)
+                write_shard_index(transformed_data_path, shards)
+            manifest.save()
+            elapsed = time.perf_counter() - started_at
 
-            feature_engineering_artifact = FeatureEngineeringArtifact(transformed_data_path=transformed_data_path)
+            report = {
+                'images': len(image_files),
+                'transformed': len(stale),
+                'cached': len(image_files) - len(stale),
+                'orphans_removed': len(orphans),
+                'seconds': elapsed,
+                'images_per_sec': len(stale) / elapsed if elapsed else 0.0,
+                'peak_rss_mb': peak_rss_mb(),
+                'worker_peak_rss_mb': worker_peak_rss_mb
+            }
+            feature_engineering_artifact = FeatureEngineeringArtifact(transformed_data_path=transformed_data_path,
+                                                                      report=report)
             logging.info(f"Feature engineering completed. Transformed data saved at {transformed_data_path}")
+            logging.info(f"Feature engineering report: {report}")
 
             return feature_engineering_artifact
         except Exception as e:
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from src.logger import logging
+from src.exception import AppException
+from src.constant.training_pipeline import FEATURE_ENGINEERING_IMAGE_EXTENSIONS
+from src.entity.config_entity import ModelEvaluationConfig
+from src.serving.onnx_detector import Detections, box_iou
+from src.utils.image_cache import DecodedImageCache
+from src.utils.shards import label_path_for, read_yolo_labels
+
+# the IoU thresholds of mAP50-95
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def ground_truth(label_path: str, height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    # YOLO labels are normalized centers and sizes, the detections are xyxy pixels
+    labels = read_yolo_labels(label_path)
+    center, size = labels[:, 1:3] * [width, height], labels[:, 3:5] * [width, height]
+    return np.concatenate([center - size / 2, center + size / 2], axis=1), labels[:, 0].astype(np.int64)
+
+
+def match_predictions(detections: Detections, boxes: np.ndarray, classes: np.ndarray,
+                      iou_thresholds: np.ndarray = IOU_THRESHOLDS) -> np.ndarray:
+    """
+    Returns which detections are true positives at every IoU threshold, (detections, thresholds): each
+    ground truth box is matched at most once, to the detection of its class it overlaps most.
+    """
+    correct = np.zeros((len(detections.xyxy), len(iou_thresholds)), dtype=bool)
+    if not len(detections.xyxy) or not len(boxes):
+        return correct
+    iou = box_iou(boxes, detections.xyxy) * (classes[:, None] == detections.class_id[None, :])
+    for index, threshold in enumerate(iou_thresholds):
+        truth, detection = np.nonzero(iou >= threshold)
+        if not len(truth):
+            continue
+        order = np.argsort(-iou[truth, detection], kind='stable')
+        truth, detection = truth[order], detection[order]
+        _, first = np.unique(detection, return_index=True)
+        truth, detection = truth[np.sort(first)], detection[np.sort(first)]
+        _, first = np.unique(truth, return_index=True)
+        correct[detection[first], index] = True
+    return correct
+
+
+def average_precision(recall: np.ndarray, precision: np.ndarray) -> float:
+    # COCO's 101 point interpolation over the precision envelope
+    if not len(recall):
+        return 0.0
+    envelope = np.flip(np.maximum.accumulate(np.flip(precision)))
+    indices = np.searchsorted(recall, np.linspace(0, 1, 101), side='left')
+    return float(np.where(indices < len(envelope), envelope[np.minimum(indices, len(envelope) - 1)], 0.0).mean())
+
+
+def mean_average_precision(correct: np.ndarray, confidence: np.ndarray, predicted_classes: np.ndarray,
+                           true_classes: np.ndarray) -> Dict[str, object]:
+    """
+    Computes mAP50 and mAP50-95 from the true positive flags of every detection of a dataset.
+
+    Parameters:
+    correct (np.ndarray): (detections, thresholds) true positive flags, see match_predictions.
+    confidence (np.ndarray): The confidence of every detection.
+    predicted_classes (np.ndarray): The class of every detection.
+    true_classes (np.ndarray): The class of every ground truth box.
+
+    Returns:
+    dict: map50, map50_95 and the AP50-95 of every class with ground truth.
+    """
+    order = np.argsort(-confidence, kind='stable')
+    correct, predicted_classes = correct[order], predicted_classes[order]
+    per_class = {}
+    for class_id in np.unique(true_classes):
+        ground_truths = int((true_classes == class_id).sum())
+        hits = correct[predicted_classes == class_id]
+        true_positives = np.cumsum(hits, axis=0)
+        false_positives = np.cumsum(~hits, axis=0)
+        recall = true_positives / ground_truths
+        precision = true_positives / np.maximum(true_positives + false_positives, 1)
+        per_class[int(class_id)] = [average_precision(recall[:, index], precision[:, index])
+                                    for index in range(correct.shape[1])]
+    ap = np.array(list(per_class.values())).reshape(-1, correct.shape[1])
+    return {
+        'map50': float(ap[:, 0].mean()) if len(ap) else 0.0,
+        'map50_95': float(ap.mean()) if len(ap) else 0.0,
+        'per_class_map50_95': {class_id: float(np.mean(values)) for class_id, values in per_class.items()}
+    }
+
+
+class ModelEvaluation:
+    def __init__(self, model_evaluation_config: ModelEvaluationConfig = ModelEvaluationConfig()):
+        """
+        Measures the mAP of a detector on a split of the validated dataset. Images are read through a
+        DecodedImageCache, so evaluating several models on the same split decodes every image once when
+        the split fits in the memory budget.
+        """
+        try:
+            self.model_evaluation_config = model_evaluation_config
+            self.image_cache = DecodedImageCache(memory_budget_bytes=model_evaluation_config.image_cache_memory_mb * 1024 * 1024)
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def image_paths(self, dataset_dir: str) -> List[str]:
+        images_dir = os.path.join(dataset_dir, self.model_evaluation_config.split, 'images')
+        image_paths = sorted(
+            os.path.join(images_dir, name) for name in os.listdir(images_dir)
+            if os.path.splitext(name)[1].lower() in FEATURE_ENGINEERING_IMAGE_EXTENSIONS
+        )
+        return image_paths[:self.model_evaluation_config.max_images or None]
+
+    def evaluate(self, predict: Callable[[List[np.ndarray]], List[Detections]], dataset_dir: str) -> dict:
+        """
+        Evaluates a detector on the configured split.
+
+        Parameters:
+        predict (Callable): Returns the detections of a list of BGR images, e.g. OnnxDetector.predict with
+            a low confidence threshold, as mAP needs the whole precision/recall curve.
+        dataset_dir (str): The validated dataset.
+
+        Returns:
+        dict: map50, map50_95, the AP of every class, the images and boxes evaluated and the seconds taken.
+        """
+        try:
+            started_at = time.perf_counter()
+            image_paths = self.image_paths(dataset_dir)
+            if not image_paths:
+                raise ValueError(f'No {self.model_evaluation_config.split} images to evaluate in {dataset_dir}')
+            correct, confidence, predicted_classes, true_classes = [], [], [], []
+            batch_size = self.model_evaluation_config.batch_size
+            for start in range(0, len(image_paths), batch_size):
+                batch_paths = image_paths[start:start + batch_size]
+                images = [self.image_cache.get(image_path)[0] for image_path in batch_paths]
+                for image_path, image, detections in zip(batch_paths, images, predict(images)):
+                    boxes, classes = ground_truth(label_path_for(image_path), *image.shape[:2])
+                    correct.append(match_predictions(detections, boxes, classes))
+                    confidence.append(detections.confidence)
+                    predicted_classes.append(detections.class_id)
+                    true_classes.append(classes)
+
+            metrics = mean_average_precision(np.concatenate(correct), np.concatenate(confidence),
+                                             np.concatenate(predicted_classes), np.concatenate(true_classes))
+            metrics.update(images=len(image_paths), instances=int(sum(len(classes) for classes in true_classes)),
+                           seconds=time.perf_counter() - started_at, image_cache=self.image_cache.stats())
+            logging.info(f'Evaluated {len(image_paths)} images: mAP50 {metrics["map50"]:.4f}, '
+                         f'mAP50-95 {metrics["map50_95"]:.4f}')
+            return metrics
+        except Exception as e:
+            raise AppException(e, sys)
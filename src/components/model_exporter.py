@@ -0,0 +1,124 @@
+import os
+import sys
+import shutil
+from typing import List
+
+import cv2
+import numpy as np
+
+from src.logger import logging
+from src.exception import AppException
+from src.constant.training_pipeline import FEATURE_ENGINEERING_IMAGE_EXTENSIONS
+from src.entity.config_entity import ModelExporterConfig
+from src.entity.artifacts_entity import DataValidationArtifact, ModelExportArtifact, ModelTrainerArtifact
+from src.serving.onnx_detector import OnnxDetector, compare_outputs, decode_predictions, match_detections
+
+
+def parity_images(dataset_dir: str, count: int) -> List[np.ndarray]:
+    """
+    Returns the first `count` validation images of the dataset, in name order so every export is
+    compared on the same images, or one generated image when the dataset has none.
+    """
+    images_dir = os.path.join(dataset_dir, 'valid', 'images')
+    names = sorted(
+        name for name in (os.listdir(images_dir) if os.path.isdir(images_dir) else [])
+        if os.path.splitext(name)[1].lower() in FEATURE_ENGINEERING_IMAGE_EXTENSIONS
+    )
+    images = [image for image in (cv2.imread(os.path.join(images_dir, name)) for name in names[:count])
+              if image is not None]
+    if not images:
+        images = [np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)]
+    return images
+
+
+def reference_outputs(weights_path: str, batch: np.ndarray) -> np.ndarray:
+    # the trained weights run by pytorch on exactly the batch the exported graph gets
+    import torch
+    from ultralytics import YOLO
+    module = YOLO(weights_path).model.float().eval()
+    with torch.no_grad():
+        output = module(torch.from_numpy(batch))
+    # in eval mode the detect head returns the decoded predictions and the raw feature maps
+    return (output[0] if isinstance(output, (list, tuple)) else output).numpy()
+
+
+class ModelExporter:
+    def __init__(self, model_exporter_config: ModelExporterConfig = ModelExporterConfig()):
+        try:
+            self.model_exporter_config = model_exporter_config
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def export_onnx(self, weights_path: str) -> str:
+        """
+        Exports the trained weights to ONNX at the training image size.
+
+        Returns:
+        str: The path of the exported graph.
+        """
+        from ultralytics import YOLO
+        exported_path = YOLO(weights_path).export(
+            format='onnx',
+            imgsz=self.model_exporter_config.image_size,
+            dynamic=self.model_exporter_config.dynamic,
+            simplify=self.model_exporter_config.simplify
+        )
+        os.makedirs(os.path.dirname(self.model_exporter_config.onnx_file_path), exist_ok=True)
+        shutil.move(str(exported_path), self.model_exporter_config.onnx_file_path)
+        logging.info(f'Exported {weights_path} to {self.model_exporter_config.onnx_file_path}')
+        return self.model_exporter_config.onnx_file_path
+
+    def check_parity(self, weights_path: str, onnx_path: str, images: List[np.ndarray]) -> dict:
+        """
+        Runs the trained weights and the exported graph on the same preprocessed images and compares
+        their raw outputs, then the detections decoded from them.
+
+        Returns:
+        dict: The largest box and score differences, the matched detections and whether the export passed.
+        """
+        detector = OnnxDetector(onnx_path)
+        batch, transforms = detector.preprocess(images)
+        candidate = detector.run(batch)
+        reference = reference_outputs(weights_path, batch)
+
+        parity = compare_outputs(reference, candidate, self.model_exporter_config.parity_box_atol,
+                                 self.model_exporter_config.parity_score_atol)
+        if parity['shape_match']:
+            matches = [
+                match_detections(decode_predictions(expected, transform), decode_predictions(actual, transform))
+                for expected, actual, transform in zip(reference, candidate, transforms)
+            ]
+            parity['detections'] = {
+                name: sum(match[name] for match in matches) for name in ('reference', 'candidate', 'matched')
+            }
+        parity['images'] = len(images)
+        return parity
+
+    def initiate_model_export(self, model_trainer_artifact: ModelTrainerArtifact,
+                              data_validation_artifact: DataValidationArtifact) -> ModelExportArtifact:
+        """
+        Exports the trained model to ONNX for serving with onnxruntime, and checks the exported graph
+        gives the same outputs as the trained weights.
+
+        Parameters:
+        model_trainer_artifact (ModelTrainerArtifact): The artifact resulting from model training.
+        data_validation_artifact (DataValidationArtifact): The validated dataset the parity images come from.
+
+        Returns:
+        ModelExportArtifact: The exported graph and its parity report.
+
+        Raises:
+        AppException: If the export fails or its outputs are out of tolerance.
+        """
+        logging.info('Starting model export')
+        try:
+            weights_path = model_trainer_artifact.trained_model_file_path
+            onnx_path = self.export_onnx(weights_path)
+            images = parity_images(data_validation_artifact.vaildated_data_path, self.model_exporter_config.parity_images)
+            parity = self.check_parity(weights_path, onnx_path, images)
+            logging.info(f'ONNX parity: {parity}')
+            if not parity['passed']:
+                raise ValueError(f'The exported model does not match the trained weights: {parity}')
+            return ModelExportArtifact(onnx_model_file_path=onnx_path, parity=parity)
+        except Exception as e:
+            raise AppException(e, sys)
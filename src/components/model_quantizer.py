@@ -0,0 +1,233 @@
+import os
+import re
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from src.logger import logging
+from src.exception import AppException
+from src.constant.training_pipeline import FEATURE_ENGINEERING_IMAGE_EXTENSIONS
+from src.components.model_evaluation import ModelEvaluation
+from src.entity.config_entity import ModelEvaluationConfig, ModelQuantizerConfig
+from src.entity.artifacts_entity import DataValidationArtifact, ModelExportArtifact, ModelQuantizationArtifact
+from src.serving.onnx_detector import OnnxDetector, preprocess_batch
+from src.utils.main_utils import link_or_copy
+
+# ultralytics names every node after the module it belongs to, the detect head is the last one
+HEAD_MODULE = re.compile(r'^/model\.(\d+)/')
+
+
+def calibration_sample(dataset_dir: str, count: int, seed: int = 0) -> List[str]:
+    """
+    Returns a seeded random sample of `count` training images, so the calibration covers the whole
+    training set rather than the first images of it, and the same sample is drawn on every run.
+    """
+    images_dir = os.path.join(dataset_dir, 'train', 'images')
+    image_paths = sorted(
+        os.path.join(images_dir, name) for name in os.listdir(images_dir)
+        if os.path.splitext(name)[1].lower() in FEATURE_ENGINEERING_IMAGE_EXTENSIONS
+    )
+    if not image_paths:
+        raise ValueError(f'No training images to calibrate on in {dataset_dir}')
+    if count >= len(image_paths):
+        return image_paths
+    chosen = np.random.default_rng(seed).choice(len(image_paths), size=count, replace=False)
+    return [image_paths[index] for index in sorted(chosen)]
+
+
+class CalibrationImages:
+    def __init__(self, image_paths: Sequence[str], input_name: str, image_size: Tuple[int, int]):
+        """
+        Feeds the calibration images to onnxruntime's quantizer one at a time, preprocessed exactly as
+        OnnxDetector preprocesses them in serving. It has the get_next/rewind interface of
+        onnxruntime.quantization.CalibrationDataReader, without importing onnxruntime.
+        """
+        self.image_paths = list(image_paths)
+        self.input_name = input_name
+        self.image_size = image_size
+        self.rewind()
+
+    def __len__(self) -> int:
+        return len(self.image_paths)
+
+    def rewind(self) -> None:
+        self.position = 0
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        while self.position < len(self.image_paths):
+            image = cv2.imread(self.image_paths[self.position])
+            self.position += 1
+            if image is not None:
+                return {self.input_name: preprocess_batch([image], self.image_size)[0]}
+        return None
+
+
+def detect_head_exclusions(nodes: Sequence[Tuple[str, str]]) -> List[str]:
+    """
+    Returns the nodes of a YOLOv8 graph to keep in FP32: everything of the last module, the detect head,
+    except its convolutions. Those are the box distribution (DFL), the sigmoid and the concatenation of
+    boxes and class scores, which are cheap but lose most accuracy when quantized.
+
+    Parameters:
+    nodes (Sequence): The (name, op_type) of every node of the graph, as ultralytics names them,
+        e.g. "/model.22/dfl/conv/Conv".
+    """
+    modules = [int(match.group(1)) for match in (HEAD_MODULE.match(name) for name, _ in nodes) if match]
+    if not modules:
+        return []
+    head = f'/model.{max(modules)}/'
+    return [name for name, op_type in nodes
+            if name.startswith(head) and (op_type != 'Conv' or '/dfl/' in name)]
+
+
+def accuracy_gate(fp32_metrics: dict, int8_metrics: dict, max_map_drop: float) -> dict:
+    # an absolute drop in mAP50-95, what the model is trained and compared on everywhere else
+    drop = fp32_metrics['map50_95'] - int8_metrics['map50_95']
+    return {'map50_95_drop': drop, 'max_map_drop': max_map_drop, 'passed': drop <= max_map_drop}
+
+
+def resident_memory_bytes() -> int:
+    # the resident set size of this process, 0 where /proc is not available
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def profile_model(model_path: str, image_path: str, runs: int) -> dict:
+    """
+    Measures the single image latency of a graph and its memory footprint: the file size and how much
+    the resident memory grows to load it and run it once. Run it in a fresh process: onnxruntime and
+    the allocator keep the memory of sessions freed earlier, which would hide the growth.
+    """
+    # onnxruntime's own import is not part of the model's footprint
+    import onnxruntime
+    image = cv2.imread(image_path)
+    memory_before = resident_memory_bytes()
+    detector = OnnxDetector(model_path)
+    batch, _ = detector.preprocess([image])
+    detector.run(batch)
+    memory_after = resident_memory_bytes()
+
+    latencies = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        detector.run(batch)
+        latencies.append((time.perf_counter() - started_at) * 1000.0)
+    return {
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+        'file_size_mb': os.path.getsize(model_path) / (1024 * 1024),
+        'resident_memory_mb': max(memory_after - memory_before, 0) / (1024 * 1024)
+    }
+
+
+class ModelQuantizer:
+    def __init__(self, model_quantizer_config: ModelQuantizerConfig = ModelQuantizerConfig(),
+                 model_evaluation_config: ModelEvaluationConfig = ModelEvaluationConfig()):
+        try:
+            self.model_quantizer_config = model_quantizer_config
+            self.model_evaluation_config = model_evaluation_config
+            # one evaluation for both models, so the second reads the split from its image cache
+            self.model_evaluation = ModelEvaluation(model_evaluation_config)
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def quantize(self, onnx_path: str, image_paths: Sequence[str]) -> str:
+        """
+        Quantizes the FP32 graph to INT8 with static, calibrated activation ranges: weights are
+        signed INT8, per output channel, activations unsigned INT8 with MinMax ranges, in the QDQ
+        format onnxruntime's CPU kernels fuse into integer convolutions.
+
+        Returns:
+        str: The path of the INT8 graph.
+        """
+        import onnx
+        from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+
+        config = self.model_quantizer_config
+        os.makedirs(config.model_quantizer_dir, exist_ok=True)
+        # shape inference and graph optimization first, so the quantizer sees fused Conv nodes
+        preprocessed_path = os.path.join(config.model_quantizer_dir, 'model.preprocessed.onnx')
+        quant_pre_process(onnx_path, preprocessed_path)
+
+        graph = onnx.load(preprocessed_path).graph
+        excluded = detect_head_exclusions([(node.name, node.op_type) for node in graph.node])
+        detector = OnnxDetector(onnx_path)
+        reader = CalibrationImages(image_paths, detector.input_name, detector.image_size)
+        logging.info(f'Calibrating on {len(reader)} images, {len(excluded)} head nodes kept in FP32')
+        quantize_static(
+            preprocessed_path, config.int8_file_path, reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=config.per_channel,
+            weight_type=QuantType.QInt8,
+            activation_type=QuantType.QUInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=excluded
+        )
+        os.remove(preprocessed_path)
+        return config.int8_file_path
+
+    def evaluate(self, model_path: str, dataset_dir: str) -> dict:
+        detector = OnnxDetector(model_path, conf_threshold=self.model_evaluation_config.conf_threshold,
+                                iou_threshold=self.model_evaluation_config.iou_threshold)
+        return self.model_evaluation.evaluate(detector.predict, dataset_dir)
+
+    def profile(self, model_path: str, image_path: str) -> dict:
+        # a spawned process per model, so neither model's footprint is hidden by memory the other freed
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            return pool.submit(profile_model, model_path, image_path, self.model_quantizer_config.benchmark_runs).result()
+
+    def initiate_model_quantization(self, model_export_artifact: ModelExportArtifact,
+                                    data_validation_artifact: DataValidationArtifact) -> ModelQuantizationArtifact:
+        """
+        Quantizes the exported model to INT8 on a sample of the training images, evaluates both models
+        on the validation split and promotes the INT8 model to serving only when its mAP50-95 is within
+        the configured drop of the FP32 model's.
+
+        Parameters:
+        model_export_artifact (ModelExportArtifact): The FP32 graph the INT8 model is made from.
+        data_validation_artifact (DataValidationArtifact): The validated dataset to calibrate and evaluate on.
+
+        Returns:
+        ModelQuantizationArtifact: The INT8 graph, the graph serving should load and the report of both models.
+
+        Raises:
+        AppException: If the quantization or the evaluation fails.
+        """
+        logging.info('Starting model quantization')
+        try:
+            config = self.model_quantizer_config
+            dataset_dir = data_validation_artifact.vaildated_data_path
+            fp32_path = model_export_artifact.onnx_model_file_path
+            image_paths = calibration_sample(dataset_dir, config.calibration_images, config.seed)
+            int8_path = self.quantize(fp32_path, image_paths)
+
+            fp32_metrics = self.evaluate(fp32_path, dataset_dir)
+            int8_metrics = self.evaluate(int8_path, dataset_dir)
+            gate = accuracy_gate(fp32_metrics, int8_metrics, config.max_map_drop)
+
+            fp32_profile, int8_profile = self.profile(fp32_path, image_paths[0]), self.profile(int8_path, image_paths[0])
+            report = {
+                'fp32': {'metrics': fp32_metrics, **fp32_profile},
+                'int8': {'metrics': int8_metrics, **int8_profile},
+                'gate': gate,
+                'speedup': fp32_profile['latency_p50_ms'] / max(int8_profile['latency_p50_ms'], 1e-9),
+                'size_ratio': int8_profile['file_size_mb'] / max(fp32_profile['file_size_mb'], 1e-9),
+                'calibration_images': len(image_paths)
+            }
+
+            link_or_copy(int8_path if gate['passed'] else fp32_path, config.serving_file_path)
+            logging.info(f'INT8 mAP50-95 drop {gate["map50_95_drop"]:.4f}, {report["speedup"]:.2f}x faster, '
+                         f'{"promoted" if gate["passed"] else "serving stays on FP32"}')
+            return ModelQuantizationArtifact(quantized_model_file_path=int8_path, serving_model_file_path=config.serving_file_path,
+                                             promoted=gate['passed'], report=report)
+        except Exception as e:
+            raise AppException(e, sys)
@@ -1,39 +1,176 @@
 import os,sys
+import threading
 import yaml
+from typing import Callable, Optional
 from src.utils.main_utils import read_yaml_file
 from src.logger import logging
 from src.exception import AppException
 from src.entity.config_entity import ModelTrainerConfig
-from src.entity.artifacts_entity import ModelTrainerArtifact
+from src.entity.artifacts_entity import DataValidationArtifact, ModelTrainerArtifact
+from src.training.launcher import TrainingLauncher, worker_command
+from src.training.calibration import TrainingCalibrator
 
 class ModelTrainer:
-    def __init__(self, model_trainer_config: ModelTrainerConfig = ModelTrainerConfig()):
+    def __init__(self, model_trainer_config: ModelTrainerConfig = ModelTrainerConfig(),
+                 running_alone: Optional[Callable[[], bool]] = None):
         try:
             self.model_trainer_config = model_trainer_config
+            # whether nothing else is using the machine, a calibration timed beside other work is not cached
+            self.running_alone = running_alone
+            self.launcher = None
+            self._cancelled = False
+            self._lock = threading.Lock()
         except Exception as e:
             raise AppException(e, sys)
         
-    def initiate_model_trainer(self)-> ModelTrainerArtifact:
-        logging.info("Starting model Trainer")
-        try:
-            logging.info("unzipping data folder")
-            os.system("unzipping data.zip")
-            os.system("rm data.zip")
-            logging.info("Extracting zip file")
+    def prepare_data_config(self, data_validation_artifact: DataValidationArtifact) -> str:
+        """
+        Writes the data.yaml the trainer reads, pointing at the validated dataset where it was extracted,
+        so training starts without copying or unzipping the archive again.
+
+        Parameters:
+        data_validation_artifact (DataValidationArtifact): The artifact resulting from data validation.
+
+        Returns:
+        str: The path of the written data.yaml.
+        """
+        dataset_dir = os.path.abspath(data_validation_artifact.vaildated_data_path)
+        data_config = read_yaml_file(data_validation_artifact.data_yaml_file_path)
+        # split paths are relative to `path`, the ones in an exported data.yaml are relative to wherever it was exported
+        training_data_config = {
+            'path': dataset_dir,
+            'train': os.path.join('train', 'images'),
+            'val': os.path.join('valid', 'images'),
+            # nc is optional in a data.yaml, ultralytics counts the names when it is missing
+            'nc': data_config.get('nc', len(data_config['names'])),
+            'names': data_config['names']
+        }
+        if os.path.isdir(os.path.join(dataset_dir, 'test', 'images')):
+            training_data_config['test'] = os.path.join('test', 'images')
+        os.makedirs(os.path.dirname(self.model_trainer_config.data_yaml_file_path), exist_ok=True)
+        with open(self.model_trainer_config.data_yaml_file_path, 'w') as f:
+            yaml.safe_dump(training_data_config, f, default_flow_style=False)
+        logging.info(f'Training on {dataset_dir} in place through {self.model_trainer_config.data_yaml_file_path}')
+        return self.model_trainer_config.data_yaml_file_path
+
+    def training_arguments(self, data_yaml_file_path: str) -> dict:
+        """
+        Returns the ultralytics train arguments for this config.
+        """
+        train_arguments = {
+            'model': self.model_trainer_config.model_weight_name,
+            'data': os.path.abspath(data_yaml_file_path),
+            'epochs': self.model_trainer_config.no_epochs,
+            'batch': self.model_trainer_config.batch_size,
+            'imgsz': self.model_trainer_config.image_size,
+            'workers': self.model_trainer_config.workers,
+            # images are cached by the project's image cache, see src/training/cached_dataset.py
+            'cache': False,
+            'project': os.path.abspath(self.model_trainer_config.runs_dir),
+            'name': 'train',
+            'exist_ok': True
+        }
+        if self.model_trainer_config.device:
+            train_arguments['device'] = self.model_trainer_config.device
+        image_cache = self.image_cache_arguments(self.model_trainer_config.cache)
+        if image_cache:
+            train_arguments['image_cache'] = image_cache
+        return train_arguments
+
+    def image_cache_arguments(self, cache: str) -> Optional[dict]:
+        # "ram" uses the memory tier of the image cache, "disk" adds its disk tier
+        if not cache:
+            return None
+        return {
+            'memory_mb': self.model_trainer_config.image_cache_memory_mb,
+            'disk_dir': self.model_trainer_config.image_cache_dir if cache == 'disk' else None
+        }
 
-            with open("data.yaml", "r") as f:
-                num_classes = str(yaml.safe_load(f)['nc'])
+    def run_calibration_probe(self, train_arguments: dict) -> dict:
+        # the calibrator names the image cache mode it probes in `cache`
+        image_cache = self.image_cache_arguments(train_arguments['cache'])
+        train_arguments = dict(train_arguments, cache=False)
+        train_arguments.pop('image_cache', None)
+        if image_cache:
+            train_arguments['image_cache'] = image_cache
+        return self.run_training(train_arguments)
 
-            model_config_file_name = self.model_trainer_config.model_weight_name.split('.')[0]
+    def run_training(self, train_arguments: dict, on_event: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Runs one training in a worker subprocess that cancel() can stop, and returns its report.
+        """
+        with self._lock:
+            self.launcher = TrainingLauncher(worker_command(train_arguments), on_event=on_event)
+            if self._cancelled:
+                self.launcher.cancel()
+        return self.launcher.run()
 
-            config_file = read_yaml_file(f"yolov8/models/{model_config_file_name}.yaml")
+    def calibrate(self, data_validation_artifact: DataValidationArtifact, data_yaml_file_path: str) -> dict:
+        """
+        Picks the batch size, loader workers and cache mode with short probe runs, or from the calibration
+        cached for this machine and dataset, and records them in the config.
 
-            config_file['num_classes'] = int(num_classes)
+        Parameters:
+        data_validation_artifact (DataValidationArtifact): The artifact resulting from data validation.
+        data_yaml_file_path (str): The data.yaml the probes train on.
 
-            with open(f"yolov8/models/custom_{model_config_file_name}.yaml", "w") as f:
-                yaml.safe_dump(config_file, f, default_flow_style=False)
+        Returns:
+        dict: The calibration, see TrainingCalibrator.calibrate.
+        """
+        calibrator = TrainingCalibrator(
+            cache_file_path=self.model_trainer_config.calibration_file_path,
+            probe=self.run_calibration_probe,
+            batch_sizes=self.model_trainer_config.calibration_batch_sizes,
+            fraction=self.model_trainer_config.calibration_fraction,
+            memory_budget_fraction=self.model_trainer_config.memory_budget_fraction,
+            running_alone=self.running_alone
+        )
+        calibration = calibrator.calibrate(self.training_arguments(data_yaml_file_path),
+                                           data_validation_artifact.vaildated_data_path)
+        self.model_trainer_config.batch_size = calibration['batch']
+        self.model_trainer_config.workers = calibration['workers']
+        self.model_trainer_config.cache = calibration['cache']
+        self.model_trainer_config.calibration = calibration
+        return calibration
 
-            os.system(f"python yolov8/train.py --img 416 --batch {self.model_trainer_config.batch_size} --epochs {self.model_trainer_config.no_epochs} --data yolov5/data/data.yaml --cfg yolov5/models/{model_config_file_name}.yaml --weights yolov5/weights/{self.model_trainer_config.model_weight_name} --cache yolov5/cache")
+    def initiate_model_trainer(self, data_validation_artifact: DataValidationArtifact,
+                               on_event: Optional[Callable[[dict], None]] = None) -> ModelTrainerArtifact:
+        """
+        Trains the model in a worker subprocess, logging images/sec and data loader wait for every epoch.
+        When auto_tune is on, the batch size, loader workers and cache mode are calibrated first.
 
+        Parameters:
+        data_validation_artifact (DataValidationArtifact): The artifact resulting from data validation.
+        on_event (Callable): Called with every progress event of the run, e.g. to show progress.
+
+        Returns:
+        ModelTrainerArtifact: The best and last weights, the final metrics and the training report.
+        """
+        logging.info("Starting model Trainer")
+        try:
+            data_yaml_file_path = self.prepare_data_config(data_validation_artifact)
+            calibration = None
+            if self.model_trainer_config.auto_tune:
+                calibration = self.calibrate(data_validation_artifact, data_yaml_file_path)
+            report = self.run_training(self.training_arguments(data_yaml_file_path), on_event=on_event)
+            report['calibration'] = calibration
+
+            model_trainer_artifact = ModelTrainerArtifact(
+                trained_model_file_path=report['best'],
+                last_model_file_path=report['last'],
+                metrics=report['metrics'],
+                report=report
+            )
+            logging.info(f'Model trained at {report["images_per_sec"]:.1f} images/sec: {model_trainer_artifact}')
+            return model_trainer_artifact
         except Exception as e:
             raise AppException(e, sys)
+
+    def cancel(self) -> None:
+        """
+        Stops a running training, initiate_model_trainer then raises.
+        """
+        with self._lock:
+            self._cancelled = True
+            if self.launcher is not None:
+                self.launcher.cancel()
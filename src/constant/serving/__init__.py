@@ -0,0 +1,122 @@
+import os
+
+"""
+Serving related constants start with SERVING VAR NAME
+"""
+SERVING_MODEL_PATH: str = os.getenv("SERVING_MODEL_PATH", "path_to_your_model.h5")
+
+"""
+Dynamic micro-batching related constants start with SERVING_BATCH VAR NAME
+"""
+SERVING_BATCH_MAX_SIZE: int = int(os.getenv("SERVING_BATCH_MAX_SIZE", 32))
+
+SERVING_BATCH_MAX_WAIT_MS: float = float(os.getenv("SERVING_BATCH_MAX_WAIT_MS", 5.0))
+
+SERVING_BATCH_MAX_QUEUE_SIZE: int = int(os.getenv("SERVING_BATCH_MAX_QUEUE_SIZE", 1024))
+
+SERVING_BATCH_MAX_CONCURRENT: int = int(os.getenv("SERVING_BATCH_MAX_CONCURRENT", 1))
+
+SERVING_BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+SERVING_LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+"""
+Inference executor related constants start with SERVING_EXECUTOR VAR NAME
+"""
+SERVING_EXECUTOR_TYPE: str = os.getenv("SERVING_EXECUTOR_TYPE", "thread")
+
+# every worker holds its own copy of the model, and TensorFlow already spreads each op over every core,
+# so a couple of workers overlap decoding with inference without multiplying the model's memory by the cores
+SERVING_EXECUTOR_WORKERS: int = int(os.getenv("SERVING_EXECUTOR_WORKERS", 2))
+
+SERVING_EXECUTOR_MAX_QUEUE_DEPTH: int = int(os.getenv("SERVING_EXECUTOR_MAX_QUEUE_DEPTH", 64))
+
+"""
+Request capture related constants start with SERVING_CAPTURE VAR NAME
+"""
+SERVING_CAPTURE_RATE: float = float(os.getenv("SERVING_CAPTURE_RATE", 0.0))
+
+SERVING_CAPTURE_DIR: str = os.getenv("SERVING_CAPTURE_DIR", os.path.join("data", "captured"))
+
+SERVING_CAPTURE_MAX_QUEUE_SIZE: int = int(os.getenv("SERVING_CAPTURE_MAX_QUEUE_SIZE", 256))
+
+"""
+Detection model related constants start with DETECTION_MODEL VAR NAME
+"""
+DETECTION_MODEL_ID: str = os.getenv("DETECTION_MODEL_ID", "np_detection-xgvjf")
+
+DETECTION_MODEL_VERSION: int = int(os.getenv("DETECTION_MODEL_VERSION", 2))
+
+# when set, weights are loaded from this local path with ultralytics instead of the hosted Roboflow model
+DETECTION_MODEL_LOCAL_PATH: str = os.getenv("DETECTION_MODEL_LOCAL_PATH")
+
+# when set, the graph exported by the training pipeline is run with onnxruntime, ahead of the two above;
+# artifacts/model_quantizer/serving.onnx is the INT8 model when it passed the accuracy gate, else the FP32 one
+DETECTION_MODEL_ONNX_PATH: str = os.getenv("DETECTION_MODEL_ONNX_PATH")
+
+# 0 lets onnxruntime use every physical core; with several models or workers in one process, split the cores
+DETECTION_MODEL_ONNX_INTRA_OP_THREADS: int = int(os.getenv("DETECTION_MODEL_ONNX_INTRA_OP_THREADS", 0))
+
+# the YOLOv8 graph is one chain of operators, running operators side by side only adds overhead
+DETECTION_MODEL_ONNX_INTER_OP_THREADS: int = int(os.getenv("DETECTION_MODEL_ONNX_INTER_OP_THREADS", 1))
+
+DETECTION_MODEL_WARMUP_SIZE = (640, 640)
+
+ROBOFLOW_API_KEY: str = os.getenv("ROBOFLOW_API_KEY", "")
+
+"""
+Video pipeline related constants start with VIDEO_PIPELINE VAR NAME
+"""
+VIDEO_PIPELINE_QUEUE_SIZE: int = 16
+
+VIDEO_PIPELINE_BATCH_SIZE: int = 4
+
+VIDEO_PIPELINE_INFERENCE_WORKERS: int = 1
+
+VIDEO_ADAPTIVE_DETECT_EVERY: int = 5
+
+VIDEO_ADAPTIVE_MOTION_THRESHOLD: float = 0.02
+
+"""
+Offline batch inference related constants start with BATCH_INFERENCE VAR NAME
+"""
+BATCH_INFERENCE_OUTPUT_DIR: str = os.path.join("artifacts", "batch_inference")
+
+BATCH_INFERENCE_WORKERS: int = max(1, (os.cpu_count() or 1) // 2)
+
+# long videos are split into segments of this many frames, 0 processes each file as one shard
+BATCH_INFERENCE_SEGMENT_FRAMES: int = 3000
+
+BATCH_INFERENCE_VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.m4v', '.asf', '.mkv']
+
+"""
+Live stream related constants start with LIVE_STREAM VAR NAME
+"""
+LIVE_STREAM_SOURCE: str = os.getenv("LIVE_STREAM_SOURCE", "0")
+
+LIVE_STREAM_JPEG_QUALITY: int = 80
+
+# keep a source's worker alive this long after its last viewer leaves, so reconnects are instant
+LIVE_STREAM_IDLE_TIMEOUT_S: float = 5.0
+
+LIVE_STREAM_CLIENT_TIMEOUT_S: float = 10.0
+
+"""
+Video source related constants start with VIDEO_SOURCE VAR NAME
+"""
+# 0 reads as fast as the source delivers, otherwise frames are paced to this rate
+VIDEO_SOURCE_TARGET_FPS: float = float(os.getenv("VIDEO_SOURCE_TARGET_FPS", 0))
+
+# restart files and image folders at the end instead of ending the stream
+VIDEO_SOURCE_LOOP: bool = os.getenv("VIDEO_SOURCE_LOOP", "0").lower() in ("1", "true", "yes")
+
+# decoded frames held between the reader thread and the consumer, 0 reads on the consumer thread
+VIDEO_SOURCE_BUFFER_SIZE: int = 4
+
+VIDEO_SOURCE_RECONNECT_ATTEMPTS: int = 5
+
+VIDEO_SOURCE_RECONNECT_BACKOFF_S: float = 0.5
+
+VIDEO_SOURCE_RECONNECT_BACKOFF_MAX_S: float = 8.0
+
+VIDEO_SOURCE_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
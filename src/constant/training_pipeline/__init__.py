@@ -1,5 +1,13 @@
+import os
+
 ARTIFACTS_DIR : str = "artifacts"
 
+# the finished stages of the training pipeline, their fingerprints and artifacts
+TRAINING_PIPELINE_STATE_FILE: str = "pipeline_state.json"
+
+# independent stages run side by side, except the exclusive CPU heavy ones, e.g. feature engineering and training
+TRAINING_PIPELINE_MAX_PARALLEL_STAGES: int = 2
+
 """
 Data Ingestion related constants start with DATA_INGESTION VAR NAME
 """
@@ -9,6 +17,23 @@ DATA_INGESTION_FEATURE_STRORE: str = "feature_strore"
 
 DATA_DOWNLOAD_URL: str = ""
 
+# "download" saves data.zip and then extracts it, "stream" extracts members while the archive downloads
+DATA_INGESTION_MODE: str = os.getenv("DATA_INGESTION_MODE", "download")
+
+DATA_INGESTION_EXTRACT_WORKERS: int = min(8, os.cpu_count() or 1)
+
+# downloads are kept here by content hash, so every run on the machine shares them
+DATA_INGESTION_CACHE_DIR: str = os.getenv(
+    "DATA_INGESTION_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "number-plate-detection", "downloads")
+)
+
+# the expected SHA-256 of the dataset archive, checked when set
+DATA_INGESTION_SHA256: str = os.getenv("DATA_INGESTION_SHA256", "")
+
+DATA_INGESTION_DOWNLOAD_CHUNK_MB: int = 8
+
+DATA_INGESTION_DOWNLOAD_WORKERS: int = 4
+
 """
 Data Validation realted contant start with DATA_VALIDATION VAR NAME
 """
@@ -19,6 +44,55 @@ DATA_VALIDATION_STATUS_FILE = 'status.txt'
 
 DATA_VALIDATION_ALL_REQUIRED_FILES = ["train", "valid", "data.yaml"]
 
+DATA_VALIDATION_REPORT_FILE: str = "report.json"
+
+# the checks are small reads, so more threads than cores keep the disk busy
+DATA_VALIDATION_WORKERS: int = min(32, (os.cpu_count() or 1) * 4)
+
+DATA_VALIDATION_MAX_REPORTED_ERRORS: int = 1000
+
+# "off", "header" (size from the header, 1/8 scale decode for hashing) or "full" (decode every image)
+DATA_VALIDATION_DEEP_CHECK: str = os.getenv("DATA_VALIDATION_DEEP_CHECK", "header")
+
+DATA_VALIDATION_FIND_DUPLICATES: bool = True
+
+# images inspected per split by the deep check, 0 inspects every image
+DATA_VALIDATION_SAMPLE_SIZE: int = int(os.getenv("DATA_VALIDATION_SAMPLE_SIZE", "0"))
+
+DATA_VALIDATION_CACHE_FILE: str = "inspection_cache.json"
+
+# smaller boxes, and boxes out of the frame, are warnings in the report and do not fail validation
+DATA_VALIDATION_MIN_BOX_PIXELS: float = 2.0
+
+
+"""
+Feature Engineering related constant start with FEATURE_ENGINEERING var name
+"""
+FEATURE_ENGINEERING_DIR_NAME: str = "transformed_data"
+
+FEATURE_ENGINEERING_WORKERS: int = os.cpu_count() or 1
+
+# images per task sent to a worker process, large enough to amortise the inter-process overhead
+FEATURE_ENGINEERING_CHUNK_SIZE: int = 64
+
+# chunks submitted but not yet finished, per worker; bounds the memory held by pending results
+FEATURE_ENGINEERING_MAX_IN_FLIGHT_PER_WORKER: int = 2
+
+# the square size images are resized to, the same as the training image size
+FEATURE_ENGINEERING_IMAGE_SIZE: int = 416
+
+FEATURE_ENGINEERING_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.webp']
+
+# records the source hash and parameters of every output, so unchanged images are not transformed again
+FEATURE_ENGINEERING_MANIFEST_FILE: str = "manifest.json"
+
+FEATURE_ENGINEERING_USE_CACHE: bool = True
+
+# "files" writes one re-encoded image per source, "shards" packs raw pixels and labels into memory-mappable shards
+FEATURE_ENGINEERING_OUTPUT_FORMAT: str = "files"
+
+FEATURE_ENGINEERING_SHARD_SIZE_MB: int = 256
+
 
 
 """
@@ -31,3 +105,107 @@ MODEL_TRAINER_PRETRAINED_WEIGHT_NAME: str = "yolov8s.pt"
 MODEL_TRAINER_NO_EPOCHS: int = 1
 
 MODEL_TRAINER_BATCH_SIZE: int = 16
+
+MODEL_TRAINER_IMAGE_SIZE: int = FEATURE_ENGINEERING_IMAGE_SIZE
+
+MODEL_TRAINER_WORKERS: int = min(8, os.cpu_count() or 1)
+
+# "" decodes every image on every epoch, "ram" keeps decoded images in the image cache's memory tier,
+# "disk" also memory-maps them from the image cache directory
+MODEL_TRAINER_CACHE: str = ""
+
+# the memory tier of the image cache, for all the data loader workers together
+MODEL_TRAINER_IMAGE_CACHE_MEMORY_MB: int = int(os.getenv("MODEL_TRAINER_IMAGE_CACHE_MEMORY_MB", "2048"))
+
+# the disk tier is kept by source path, size and modification time, so every run on the machine shares it
+MODEL_TRAINER_IMAGE_CACHE_DIR: str = os.getenv(
+    "MODEL_TRAINER_IMAGE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "number-plate-detection", "images")
+)
+
+# "" lets ultralytics pick, e.g. "cpu" or "0" for the first GPU
+MODEL_TRAINER_DEVICE: str = os.getenv("MODEL_TRAINER_DEVICE", "")
+
+MODEL_TRAINER_RUNS_DIR_NAME: str = "runs"
+
+# times short probe runs to pick the batch size, loader workers and cache mode; the batch size, workers
+# and cache above are used when it is off or every probe fails
+MODEL_TRAINER_AUTO_TUNE: bool = os.getenv("MODEL_TRAINER_AUTO_TUNE", "1") == "1"
+
+# calibrations are kept per machine, dataset, model and image size, so they run once
+MODEL_TRAINER_CALIBRATION_FILE: str = os.getenv(
+    "MODEL_TRAINER_CALIBRATION_FILE",
+    os.path.join(os.path.expanduser("~"), ".cache", "number-plate-detection", "calibration.json")
+)
+
+MODEL_TRAINER_CALIBRATION_BATCH_SIZES = [4, 8, 16, 32, 64]
+
+# the share of the training images each probe trains on
+MODEL_TRAINER_CALIBRATION_FRACTION: float = 0.05
+
+# a configuration whose peak memory goes over this share of the available RAM is not used
+MODEL_TRAINER_MEMORY_BUDGET_FRACTION: float = 0.7
+
+# points the trainer at the validated dataset in place
+MODEL_TRAINER_DATA_FILE: str = "data.yaml"
+
+
+"""
+MODEL EXPORTER related constant start with MODEL_EXPORTER var name
+"""
+MODEL_EXPORTER_DIR_NAME: str = "model_exporter"
+
+MODEL_EXPORTER_ONNX_FILE: str = "model.onnx"
+
+# a dynamic batch dimension lets the serving micro-batcher run a whole batch in one call
+MODEL_EXPORTER_DYNAMIC: bool = True
+
+MODEL_EXPORTER_SIMPLIFY: bool = True
+
+# validation images the exported graph is compared against the trained weights on
+MODEL_EXPORTER_PARITY_IMAGES: int = 8
+
+# box coordinates are letterboxed pixels, scores are in [0, 1], so each gets a tolerance of its own
+MODEL_EXPORTER_PARITY_BOX_ATOL: float = 0.05
+
+MODEL_EXPORTER_PARITY_SCORE_ATOL: float = 1e-3
+
+
+"""
+MODEL EVALUATION related constant start with MODEL_EVALUATION var name
+"""
+MODEL_EVALUATION_SPLIT: str = "valid"
+
+# 0 evaluates every image of the split
+MODEL_EVALUATION_MAX_IMAGES: int = int(os.getenv("MODEL_EVALUATION_MAX_IMAGES", "0"))
+
+MODEL_EVALUATION_BATCH_SIZE: int = 8
+
+# mAP integrates the whole precision/recall curve, so nearly every detection is kept
+MODEL_EVALUATION_CONF_THRESHOLD: float = 0.001
+
+MODEL_EVALUATION_IOU_THRESHOLD: float = 0.7
+
+
+"""
+MODEL QUANTIZER related constant start with MODEL_QUANTIZER var name
+"""
+MODEL_QUANTIZER_DIR_NAME: str = "model_quantizer"
+
+MODEL_QUANTIZER_INT8_FILE: str = "model.int8.onnx"
+
+# the graph serving loads, the INT8 model when it passed the accuracy gate and the FP32 model otherwise
+MODEL_QUANTIZER_SERVING_FILE: str = "serving.onnx"
+
+# training images the activation ranges are calibrated on
+MODEL_QUANTIZER_CALIBRATION_IMAGES: int = int(os.getenv("MODEL_QUANTIZER_CALIBRATION_IMAGES", "200"))
+
+MODEL_QUANTIZER_SEED: int = 0
+
+# the largest absolute drop in mAP50-95 from FP32 the INT8 model is promoted with
+MODEL_QUANTIZER_MAX_MAP_DROP: float = float(os.getenv("MODEL_QUANTIZER_MAX_MAP_DROP", "0.01"))
+
+# one scale per output channel of the conv weights, which keeps most of the FP32 accuracy
+MODEL_QUANTIZER_PER_CHANNEL: bool = True
+
+# single image runs the latency of each model is measured over
+MODEL_QUANTIZER_BENCHMARK_RUNS: int = 20
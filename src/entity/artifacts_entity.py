@@ -8,13 +8,37 @@ class DataIngestionArtifact:
 @dataclass
 class FeatureEngineeringArtifact:
     transformed_data_path: str
+    # images processed, images/sec and peak RSS of the run
+    report: dict = None
 
 @dataclass
 class DataValidationArtifact:
-    validation_status: str
+    validation_status: bool
     data_status: bool
+    # the extracted dataset, training reads it in place instead of a copy of the archive
     vaildated_data_path: str
+    data_yaml_file_path: str = None
+    report_file_path: str = None
 
 @dataclass
 class ModelTrainerArtifact:
     trained_model_file_path : str
+    last_model_file_path: str = None
+    # the final validation metrics, and per epoch images/sec and data loader wait of the run
+    metrics: dict = None
+    report: dict = None
+
+@dataclass
+class ModelExportArtifact:
+    onnx_model_file_path: str
+    # the largest differences between the exported graph and the trained weights, and whether they are in tolerance
+    parity: dict = None
+
+@dataclass
+class ModelQuantizationArtifact:
+    quantized_model_file_path: str
+    # the model serving should load, the INT8 model only when it passed the accuracy gate
+    serving_model_file_path: str
+    promoted: bool = False
+    # the mAP, latency and size of both models
+    report: dict = None
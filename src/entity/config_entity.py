@@ -2,11 +2,16 @@ import os
 from dataclasses import dataclass
 from datetime import datetime
 from src.constant.training_pipeline import *
+from src.constant.serving import *
 
 @dataclass
 class TrainingPipelineConfig:
     artifacts_dir :str = ARTIFACTS_DIR
 
+    state_file_path: str = os.path.join(ARTIFACTS_DIR, TRAINING_PIPELINE_STATE_FILE)
+
+    max_parallel_stages: int = TRAINING_PIPELINE_MAX_PARALLEL_STAGES
+
 training_pipeline_config :TrainingPipelineConfig = TrainingPipelineConfig()
 
 @dataclass
@@ -21,6 +26,18 @@ class DataIngestionConfig:
 
     data_download_url: str = DATA_DOWNLOAD_URL
 
+    ingestion_mode: str = DATA_INGESTION_MODE
+
+    extract_workers: int = DATA_INGESTION_EXTRACT_WORKERS
+
+    download_cache_dir: str = DATA_INGESTION_CACHE_DIR
+
+    data_sha256: str = DATA_INGESTION_SHA256
+
+    download_chunk_mb: int = DATA_INGESTION_DOWNLOAD_CHUNK_MB
+
+    download_workers: int = DATA_INGESTION_DOWNLOAD_WORKERS
+
 @dataclass
 class DataValidationConfig:
     data_validation_dir = os.path.join(
@@ -31,10 +48,47 @@ class DataValidationConfig:
 
     required_file_list = DATA_VALIDATION_ALL_REQUIRED_FILES
 
+    report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_REPORT_FILE)
+
+    image_extensions = FEATURE_ENGINEERING_IMAGE_EXTENSIONS
+
+    workers: int = DATA_VALIDATION_WORKERS
+
+    max_reported_errors: int = DATA_VALIDATION_MAX_REPORTED_ERRORS
+
+    deep_check: str = DATA_VALIDATION_DEEP_CHECK
+
+    find_duplicates: bool = DATA_VALIDATION_FIND_DUPLICATES
+
+    sample_size: int = DATA_VALIDATION_SAMPLE_SIZE
+
+    cache_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_CACHE_FILE)
+
+    min_box_pixels: float = DATA_VALIDATION_MIN_BOX_PIXELS
+
 @dataclass
 class FeatureEngineeringConfig:
-    def __init__(self, feature_params: dict):
+    transformed_data_dir = os.path.join(
+        training_pipeline_config.artifacts_dir, FEATURE_ENGINEERING_DIR_NAME
+    )
+
+    image_extensions = FEATURE_ENGINEERING_IMAGE_EXTENSIONS
+
+    manifest_file_name = FEATURE_ENGINEERING_MANIFEST_FILE
+
+    def __init__(self, feature_params: dict, workers: int = FEATURE_ENGINEERING_WORKERS,
+                 chunk_size: int = FEATURE_ENGINEERING_CHUNK_SIZE,
+                 max_in_flight_per_worker: int = FEATURE_ENGINEERING_MAX_IN_FLIGHT_PER_WORKER,
+                 use_cache: bool = FEATURE_ENGINEERING_USE_CACHE,
+                 output_format: str = FEATURE_ENGINEERING_OUTPUT_FORMAT,
+                 shard_size_mb: float = FEATURE_ENGINEERING_SHARD_SIZE_MB):
         self.feature_params = feature_params
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_in_flight_per_worker = max_in_flight_per_worker
+        self.use_cache = use_cache
+        self.output_format = output_format
+        self.shard_size_mb = shard_size_mb
 
 
 @dataclass
@@ -49,4 +103,195 @@ class ModelTrainerConfig:
 
     batch_size = MODEL_TRAINER_BATCH_SIZE
 
+    data_yaml_file_path = os.path.join(model_trainer_dir, MODEL_TRAINER_DATA_FILE)
+
+    image_size = MODEL_TRAINER_IMAGE_SIZE
+
+    workers = MODEL_TRAINER_WORKERS
+
+    cache = MODEL_TRAINER_CACHE
+
+    image_cache_memory_mb = MODEL_TRAINER_IMAGE_CACHE_MEMORY_MB
+
+    image_cache_dir = MODEL_TRAINER_IMAGE_CACHE_DIR
+
+    device = MODEL_TRAINER_DEVICE
+
+    runs_dir = os.path.join(model_trainer_dir, MODEL_TRAINER_RUNS_DIR_NAME)
+
+    auto_tune = MODEL_TRAINER_AUTO_TUNE
+
+    calibration_file_path = MODEL_TRAINER_CALIBRATION_FILE
+
+    calibration_batch_sizes = MODEL_TRAINER_CALIBRATION_BATCH_SIZES
+
+    calibration_fraction = MODEL_TRAINER_CALIBRATION_FRACTION
+
+    memory_budget_fraction = MODEL_TRAINER_MEMORY_BUDGET_FRACTION
+
+    # the calibration the batch size, workers and cache were picked by, set once training starts
+    calibration = None
+
+
+@dataclass
+class ModelExporterConfig:
+    model_exporter_dir = os.path.join(
+        training_pipeline_config.artifacts_dir, MODEL_EXPORTER_DIR_NAME
+    )
+
+    onnx_file_path = os.path.join(model_exporter_dir, MODEL_EXPORTER_ONNX_FILE)
+
+    image_size = MODEL_TRAINER_IMAGE_SIZE
+
+    dynamic = MODEL_EXPORTER_DYNAMIC
+
+    simplify = MODEL_EXPORTER_SIMPLIFY
+
+    parity_images = MODEL_EXPORTER_PARITY_IMAGES
+
+    parity_box_atol = MODEL_EXPORTER_PARITY_BOX_ATOL
+
+    parity_score_atol = MODEL_EXPORTER_PARITY_SCORE_ATOL
+
+
+@dataclass
+class ModelEvaluationConfig:
+    split = MODEL_EVALUATION_SPLIT
+
+    max_images = MODEL_EVALUATION_MAX_IMAGES
+
+    batch_size = MODEL_EVALUATION_BATCH_SIZE
+
+    conf_threshold = MODEL_EVALUATION_CONF_THRESHOLD
+
+    iou_threshold = MODEL_EVALUATION_IOU_THRESHOLD
+
+    image_cache_memory_mb = MODEL_TRAINER_IMAGE_CACHE_MEMORY_MB
+
+
+@dataclass
+class ModelQuantizerConfig:
+    model_quantizer_dir = os.path.join(
+        training_pipeline_config.artifacts_dir, MODEL_QUANTIZER_DIR_NAME
+    )
+
+    int8_file_path = os.path.join(model_quantizer_dir, MODEL_QUANTIZER_INT8_FILE)
+
+    serving_file_path = os.path.join(model_quantizer_dir, MODEL_QUANTIZER_SERVING_FILE)
+
+    calibration_images = MODEL_QUANTIZER_CALIBRATION_IMAGES
+
+    seed = MODEL_QUANTIZER_SEED
+
+    max_map_drop = MODEL_QUANTIZER_MAX_MAP_DROP
+
+    per_channel = MODEL_QUANTIZER_PER_CHANNEL
+
+    benchmark_runs = MODEL_QUANTIZER_BENCHMARK_RUNS
+
+
+@dataclass
+class BatchingConfig:
+    max_batch_size: int = SERVING_BATCH_MAX_SIZE
+
+    max_wait_ms: float = SERVING_BATCH_MAX_WAIT_MS
+
+    max_queue_size: int = SERVING_BATCH_MAX_QUEUE_SIZE
+
+    max_concurrent_batches: int = SERVING_BATCH_MAX_CONCURRENT
+
+    batch_size_buckets = SERVING_BATCH_SIZE_BUCKETS
+
+    latency_buckets_ms = SERVING_LATENCY_BUCKETS_MS
+
+
+@dataclass
+class InferenceExecutorConfig:
+    executor_type: str = SERVING_EXECUTOR_TYPE
+
+    max_workers: int = SERVING_EXECUTOR_WORKERS
+
+    max_queue_depth: int = SERVING_EXECUTOR_MAX_QUEUE_DEPTH
+
+
+@dataclass
+class RequestCaptureConfig:
+    capture_rate: float = SERVING_CAPTURE_RATE
+
+    capture_dir: str = SERVING_CAPTURE_DIR
+
+    max_queue_size: int = SERVING_CAPTURE_MAX_QUEUE_SIZE
+
+
+@dataclass
+class DetectionModelConfig:
+    model_id: str = DETECTION_MODEL_ID
+
+    version: int = DETECTION_MODEL_VERSION
+
+    local_path: str = DETECTION_MODEL_LOCAL_PATH
+
+    onnx_path: str = DETECTION_MODEL_ONNX_PATH
+
+    intra_op_threads: int = DETECTION_MODEL_ONNX_INTRA_OP_THREADS
+
+    inter_op_threads: int = DETECTION_MODEL_ONNX_INTER_OP_THREADS
+
+    warmup: bool = True
+
+    warmup_size = DETECTION_MODEL_WARMUP_SIZE
+
+
+@dataclass
+class VideoPipelineConfig:
+    queue_size: int = VIDEO_PIPELINE_QUEUE_SIZE
+
+    batch_size: int = VIDEO_PIPELINE_BATCH_SIZE
+
+    inference_workers: int = VIDEO_PIPELINE_INFERENCE_WORKERS
+
+    # run the detector every `detect_every` frames or on motion, propagating boxes in between
+    adaptive: bool = False
+
+    detect_every: int = VIDEO_ADAPTIVE_DETECT_EVERY
+
+    motion_threshold: float = VIDEO_ADAPTIVE_MOTION_THRESHOLD
+
+
+@dataclass
+class BatchInferenceConfig:
+    output_dir: str = BATCH_INFERENCE_OUTPUT_DIR
+
+    workers: int = BATCH_INFERENCE_WORKERS
+
+    segment_frames: int = BATCH_INFERENCE_SEGMENT_FRAMES
+
+    video_extensions = BATCH_INFERENCE_VIDEO_EXTENSIONS
+
+
+@dataclass
+class LiveStreamConfig:
+    source: str = LIVE_STREAM_SOURCE
+
+    jpeg_quality: int = LIVE_STREAM_JPEG_QUALITY
+
+    idle_timeout_s: float = LIVE_STREAM_IDLE_TIMEOUT_S
+
+    client_timeout_s: float = LIVE_STREAM_CLIENT_TIMEOUT_S
+
+
+@dataclass
+class VideoSourceConfig:
+    target_fps: float = VIDEO_SOURCE_TARGET_FPS
+
+    loop: bool = VIDEO_SOURCE_LOOP
+
+    buffer_size: int = VIDEO_SOURCE_BUFFER_SIZE
+
+    reconnect_attempts: int = VIDEO_SOURCE_RECONNECT_ATTEMPTS
+
+    reconnect_backoff_s: float = VIDEO_SOURCE_RECONNECT_BACKOFF_S
+
+    reconnect_backoff_max_s: float = VIDEO_SOURCE_RECONNECT_BACKOFF_MAX_S
 
+    image_extensions = VIDEO_SOURCE_IMAGE_EXTENSIONS
@@ -24,4 +24,25 @@ class AppException(Exception):
         )
     
     def __str__(self):
-        return self.error_message
\ No newline at end of file
+        return self.error_message
+
+class ServiceSaturatedError(Exception):
+    """
+    Raised when a serving queue is full and the request should be rejected with backpressure
+    instead of waiting.
+    """
+
+class DownloadError(Exception):
+    """
+    Raised when a download fails after its retries or does not match its expected SHA-256.
+    """
+
+class TrainingError(Exception):
+    """
+    Raised when a training run exits with an error or is cancelled.
+    """
+
+class TrainingCancelledError(TrainingError):
+    """
+    Raised when a training run is stopped by cancel().
+    """
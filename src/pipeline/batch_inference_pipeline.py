@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List
+
+import cv2
+import numpy as np
+
+from src.logger import logging
+from src.exception import AppException
+from src.entity.config_entity import BatchInferenceConfig, DetectionModelConfig, VideoPipelineConfig
+from src.video.pipeline import VideoPipeline, FramePacket
+
+PROGRESS_FILE_NAME = 'progress.jsonl'
+
+DETECTION_COLUMNS = ('frame_index', 'tracker_id', 'class_id', 'confidence', 'x1', 'y1', 'x2', 'y2')
+
+# the model owned by this worker process, loaded once by the pool initializer
+_worker_model = None
+
+
+@dataclass
+class VideoShard:
+    shard_id: str
+    video_file: str
+    start_frame: int
+    end_frame: int
+
+
+def discover_videos(inputs: List[str], video_extensions: List[str]) -> List[str]:
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, file_names in os.walk(path):
+                videos.extend(os.path.join(root, file_name) for file_name in sorted(file_names)
+                              if os.path.splitext(file_name)[1].lower() in video_extensions)
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            logging.info(f'Skipping missing input {path}')
+    return sorted(set(os.path.abspath(video) for video in videos))
+
+
+def plan_shards(video_file: str, segment_frames: int) -> List[VideoShard]:
+    """
+    Splits a video into shards of `segment_frames` frames. The shard ids include the file size and
+    modification time, so a replaced recording is processed again instead of being resumed.
+    """
+    cap = cv2.VideoCapture(video_file)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    stat = os.stat(video_file)
+    video_key = hashlib.sha1(f'{video_file}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()[:12]
+
+    if segment_frames <= 0 or frame_count <= segment_frames:
+        # an unknown frame count (0) also ends up here and is read to the end of the stream
+        return [VideoShard(f'{video_key}_full', video_file, 0, -1)]
+    return [
+        VideoShard(f'{video_key}_{start:08d}', video_file, start, min(start + segment_frames, frame_count))
+        for start in range(0, frame_count, segment_frames)
+    ]
+
+
+def iter_segment_frames(video_file: str, start_frame: int, end_frame: int) -> Iterator[np.ndarray]:
+    cap = cv2.VideoCapture(video_file)
+    try:
+        if start_frame > 0:
+            # the decoder seeks to the preceding keyframe and decodes forward to the exact frame
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        index = start_frame
+        while end_frame < 0 or index < end_frame:
+            ok, frame = cap.read()
+            if not ok:
+                return
+            yield frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def _initialize_worker(detection_model_config: DetectionModelConfig) -> None:
+    global _worker_model
+    from src.serving.model_registry import model_registry
+    _worker_model = model_registry.get(detection_model_config)
+
+
+def process_shard(shard: VideoShard, video_pipeline_config: VideoPipelineConfig, output_dir: str) -> dict:
+    """
+    Runs detection and tracking over one shard and writes its detections as columns to a .npz file.
+
+    Tracks are local to a shard: the tracker starts fresh at every segment boundary.
+    """
+    columns: Dict[str, list] = {name: [] for name in DETECTION_COLUMNS}
+
+    def collect(packet: FramePacket, annotated) -> None:
+        detections = packet.detections
+        count = len(detections)
+        if count == 0:
+            return
+        columns['frame_index'].append(np.full(count, shard.start_frame + packet.index, dtype=np.int32))
+        tracker_id = detections.tracker_id if detections.tracker_id is not None else np.full(count, -1)
+        columns['tracker_id'].append(np.asarray(tracker_id, dtype=np.int32))
+        class_id = detections.class_id if detections.class_id is not None else np.zeros(count)
+        columns['class_id'].append(np.asarray(class_id, dtype=np.int16))
+        confidence = detections.confidence if detections.confidence is not None else np.ones(count)
+        columns['confidence'].append(np.asarray(confidence, dtype=np.float32))
+        for position, name in enumerate(('x1', 'y1', 'x2', 'y2')):
+            columns[name].append(detections.xyxy[:, position].astype(np.float32))
+
+    pipeline = VideoPipeline(_worker_model, video_pipeline_config, sink=collect)
+    started_at = time.perf_counter()
+    summary = pipeline.run(iter_segment_frames(shard.video_file, shard.start_frame, shard.end_frame))
+    elapsed = time.perf_counter() - started_at
+
+    dtypes = {'frame_index': np.int32, 'tracker_id': np.int32, 'class_id': np.int16}
+    arrays = {
+        name: np.concatenate(values) if values else np.empty(0, dtype=dtypes.get(name, np.float32))
+        for name, values in columns.items()
+    }
+    shard_path = os.path.join(output_dir, 'shards', f'{shard.shard_id}.npz')
+    temp_path = f'{shard_path}.{os.getpid()}.tmp.npz'
+    np.savez_compressed(temp_path, **arrays)
+    os.replace(temp_path, shard_path)
+
+    return {
+        **asdict(shard),
+        'frames': summary['frames'],
+        'detections': int(arrays['frame_index'].size),
+        'seconds': elapsed,
+        'worker': os.getpid()
+    }
+
+
+def read_progress(output_dir: str) -> Dict[str, dict]:
+    progress_path = os.path.join(output_dir, PROGRESS_FILE_NAME)
+    completed = {}
+    if not os.path.exists(progress_path):
+        return completed
+    with open(progress_path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # a partially written last line from an interrupted run
+                continue
+            if os.path.exists(os.path.join(output_dir, 'shards', f"{record['shard_id']}.npz")):
+                completed[record['shard_id']] = record
+    return completed
+
+
+def load_detections(output_dir: str) -> Dict[str, np.ndarray]:
+    """
+    Loads every completed shard into one set of columns, with a `video_file` column added.
+    """
+    records = read_progress(output_dir)
+    parts = defaultdict(list)
+    for record in records.values():
+        with np.load(os.path.join(output_dir, 'shards', f"{record['shard_id']}.npz")) as shard:
+            for name in DETECTION_COLUMNS:
+                parts[name].append(shard[name])
+            parts['video_file'].append(np.full(shard['frame_index'].size, record['video_file']))
+    return {name: np.concatenate(values) for name, values in parts.items()}
+
+
+class BatchInferencePipeline:
+    def __init__(self, batch_inference_config: BatchInferenceConfig = BatchInferenceConfig(),
+                 detection_model_config: DetectionModelConfig = DetectionModelConfig(),
+                 video_pipeline_config: VideoPipelineConfig = VideoPipelineConfig()):
+        self.batch_inference_config = batch_inference_config
+        self.detection_model_config = detection_model_config
+        self.video_pipeline_config = video_pipeline_config
+
+    def run_pipeline(self, inputs: List[str]) -> dict:
+        """
+        Runs the plate detector over every video in `inputs`, sharded across a process pool.
+
+        Parameters:
+        self (BatchInferencePipeline): The instance of the BatchInferencePipeline class.
+        inputs (List[str]): Video files and/or directories to search for videos.
+
+        Returns:
+        dict: Aggregate and per worker frames/sec for the shards processed in this run.
+
+        Raises:
+        AppException: If a shard fails; shards completed before the failure are kept for resuming.
+        """
+        try:
+            config = self.batch_inference_config
+            os.makedirs(os.path.join(config.output_dir, 'shards'), exist_ok=True)
+            videos = discover_videos(inputs, config.video_extensions)
+            shards = [shard for video in videos for shard in plan_shards(video, config.segment_frames)]
+            completed = read_progress(config.output_dir)
+            pending = [shard for shard in shards if shard.shard_id not in completed]
+            logging.info(f'Batch inference over {len(videos)} videos: {len(shards)} shards, '
+                         f'{len(shards) - len(pending)} already done')
+
+            results = []
+            started_at = time.perf_counter()
+            if pending:
+                with ProcessPoolExecutor(
+                    max_workers=min(config.workers, len(pending)),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_initialize_worker,
+                    initargs=(self.detection_model_config,)
+                ) as pool, open(os.path.join(config.output_dir, PROGRESS_FILE_NAME), 'a') as progress:
+                    futures = [
+                        pool.submit(process_shard, shard, self.video_pipeline_config, config.output_dir)
+                        for shard in pending
+                    ]
+                    for future in as_completed(futures):
+                        record = future.result()
+                        progress.write(json.dumps(record) + '\n')
+                        progress.flush()
+                        results.append(record)
+                        logging.info(f"Finished shard {record['shard_id']}: {record['frames']} frames "
+                                     f"in {record['seconds']:.1f}s")
+            report = self._report(results, time.perf_counter() - started_at, skipped=len(shards) - len(pending))
+            logging.info(f'Batch inference report: {report}')
+            return report
+        except Exception as e:
+            raise AppException(e, sys)
+
+    @staticmethod
+    def _report(results: List[dict], wall_seconds: float, skipped: int) -> dict:
+        per_worker = defaultdict(lambda: {'shards': 0, 'frames': 0, 'seconds': 0.0})
+        for record in results:
+            worker = per_worker[record['worker']]
+            worker['shards'] += 1
+            worker['frames'] += record['frames']
+            worker['seconds'] += record['seconds']
+        for worker in per_worker.values():
+            worker['fps'] = worker['frames'] / worker['seconds'] if worker['seconds'] else 0.0
+        frames = sum(record['frames'] for record in results)
+        return {
+            'shards_processed': len(results),
+            'shards_skipped': skipped,
+            'frames': frames,
+            'wall_seconds': wall_seconds,
+            'aggregate_fps': frames / wall_seconds if wall_seconds else 0.0,
+            'workers': dict(per_worker)
+        }
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='Run the number plate detector over recorded footage.')
+    parser.add_argument('inputs', nargs='+', help='video files or directories of videos')
+    parser.add_argument('--output-dir', default=BatchInferenceConfig.output_dir)
+    parser.add_argument('--workers', type=int, default=BatchInferenceConfig.workers)
+    parser.add_argument('--segment-frames', type=int, default=BatchInferenceConfig.segment_frames,
+                        help='split long videos into segments of this many frames, 0 to disable')
+    parser.add_argument('--weights', default=DetectionModelConfig.local_path,
+                        help='local model weights, the hosted Roboflow model is used when omitted')
+    parser.add_argument('--batch-size', type=int, default=VideoPipelineConfig.batch_size)
+    parser.add_argument('--adaptive', action='store_true', help='run the detector on motion / every N frames only')
+    args = parser.parse_args(argv)
+
+    pipeline = BatchInferencePipeline(
+        BatchInferenceConfig(output_dir=args.output_dir, workers=args.workers, segment_frames=args.segment_frames),
+        DetectionModelConfig(local_path=args.weights),
+        VideoPipelineConfig(batch_size=args.batch_size, adaptive=args.adaptive)
+    )
+    report = pipeline.run_pipeline(args.inputs)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
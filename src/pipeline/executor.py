@@ -0,0 +1,237 @@
+import os
+import json
+import time
+from dataclasses import asdict, dataclass, field, is_dataclass
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from src.logger import logging
+from src.utils.manifest import fingerprint
+
+
+@dataclass
+class Stage:
+    name: str
+    # called with the artifacts of `depends_on` as keyword arguments named after those stages
+    run: Callable[..., Any]
+    artifact_type: type
+    depends_on: List[str] = field(default_factory=list)
+    # the configs the stage reads, their values are part of the stage's fingerprint
+    params: Any = None
+    # a stage that keeps every core busy runs with no other stage beside it
+    exclusive: bool = False
+
+
+def config_params(config: Any) -> Any:
+    """
+    Returns the public, non-callable attributes of a config, class attributes included, so any value a
+    stage reads from its config changes the stage's fingerprint.
+    """
+    if config is None or isinstance(config, (str, int, float, bool)):
+        return config
+    if isinstance(config, dict):
+        return {key: config_params(value) for key, value in config.items()}
+    if isinstance(config, (list, tuple)):
+        return [config_params(value) for value in config]
+    return {
+        name: getattr(config, name) for name in dir(config)
+        if not name.startswith('_') and not callable(getattr(config, name))
+    }
+
+
+def artifact_outputs_exist(artifact: Any) -> bool:
+    # every *_path field that is set must still exist, e.g. nobody deleted the artifacts directory
+    if artifact is None:
+        return False
+    return all(
+        os.path.exists(value) for name, value in asdict(artifact).items()
+        if name.endswith('_path') and isinstance(value, str) and value
+    )
+
+
+class PipelineExecutor:
+    def __init__(self, stages: List[Stage], state_file_path: str, max_workers: int = 2):
+        """
+        Runs stages as a DAG: a stage starts as soon as the stages it depends on have finished, so
+        independent stages run at the same time, except exclusive stages, which only start when no
+        other stage is running and hold back every other stage until they finish.
+
+        Every finished stage is saved to a state file with its artifact and a fingerprint of its
+        params and of the fingerprints of its upstream stages. On the next run a stage whose
+        fingerprint is unchanged and whose output paths still exist is skipped and its saved artifact
+        is used, so only the changed stages and what depends on them run again.
+
+        Parameters:
+        stages (list): The stages, in any order.
+        state_file_path (str): The JSON file the finished stages are kept in.
+        max_workers (int): The number of stages that may run at the same time.
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file_path = state_file_path
+        self.max_workers = max_workers
+        self.order = self._topological_order()
+        self.state: Dict[str, dict] = self._load_state()
+        self.report: Dict[str, dict] = {}
+        # replaced, never changed in place, so stages can read it from their own threads
+        self.running_stages: FrozenSet[str] = frozenset()
+
+    def _topological_order(self) -> List[str]:
+        order, visiting, visited = [], set(), set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f'Pipeline stages form a cycle through {name}')
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f'Stage {name} depends on unknown stage {dependency}')
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def downstream(self, names: Iterable[str]) -> Set[str]:
+        """
+        Returns `names` and every stage that depends on them, directly or not.
+        """
+        selected = set(names)
+        for name in self.order:
+            if any(dependency in selected for dependency in self.stages[name].depends_on):
+                selected.add(name)
+        return selected
+
+    def _load_state(self) -> Dict[str, dict]:
+        if not os.path.exists(self.state_file_path):
+            return {}
+        try:
+            with open(self.state_file_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.info(f'Ignoring unreadable pipeline state {self.state_file_path}: {e}')
+            return {}
+
+    def _save_state(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_file_path)), exist_ok=True)
+        with open(f'{self.state_file_path}.tmp', 'w') as f:
+            json.dump(self.state, f, indent=2, default=str)
+        os.replace(f'{self.state_file_path}.tmp', self.state_file_path)
+
+    def _saved_artifact(self, name: str) -> Any:
+        saved = self.state.get(name, {}).get('artifact')
+        return None if saved is None else self.stages[name].artifact_type(**saved)
+
+    def fingerprint(self, name: str, upstream_fingerprints: Dict[str, str]) -> str:
+        stage = self.stages[name]
+        return fingerprint({
+            'stage': name,
+            'params': config_params(stage.params),
+            'upstream': {dependency: upstream_fingerprints[dependency] for dependency in stage.depends_on}
+        })
+
+    def run(self, from_stage: Optional[str] = None, only: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Runs the pipeline.
+
+        Parameters:
+        from_stage (str): Runs this stage and everything downstream of it even when unchanged; the
+            stages upstream of it are still skipped when unchanged.
+        only (list): Runs just these stages, using the saved artifacts of everything they depend on.
+
+        Returns:
+        dict: The artifact of every stage that ran or was skipped, by stage name.
+
+        Raises:
+        ValueError: If a stage name is unknown or `only` needs an upstream stage that never finished.
+        """
+        for name in ([from_stage] if from_stage else []) + list(only or []):
+            if name not in self.stages:
+                raise ValueError(f'Unknown stage {name}, the stages are {self.order}')
+        forced = set(only or []) or (self.downstream([from_stage]) if from_stage else set())
+        selected = set(only) if only else set(self.order)
+
+        artifacts: Dict[str, Any] = {}
+        fingerprints: Dict[str, str] = {}
+        for name in self.order:
+            if name in selected:
+                continue
+            if not any(name in self.stages[stage].depends_on for stage in selected):
+                continue
+            # an upstream stage of --only, its last result is used as it is
+            if name not in self.state:
+                raise ValueError(f'Stage {name} has not finished yet, run it before running {sorted(selected)} alone')
+            artifacts[name] = self._saved_artifact(name)
+            fingerprints[name] = self.state[name]['fingerprint']
+            self.report[name] = {'status': 'loaded'}
+
+        pending = [name for name in self.order if name in selected]
+        running = {}
+        failure = None
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            while True:
+                ready = [] if failure is not None else [
+                    name for name in pending if all(dependency in artifacts for dependency in self.stages[name].depends_on)
+                ]
+                for name in ready:
+                    fingerprints[name] = self.fingerprint(name, fingerprints)
+                    if name not in forced and self._is_fresh(name, fingerprints[name]):
+                        logging.info(f'Skipping unchanged stage {name}')
+                        pending.remove(name)
+                        artifacts[name] = self._saved_artifact(name)
+                        self.report[name] = {'status': 'skipped'}
+                        continue
+                    if self.stages[name].exclusive and running or \
+                            any(self.stages[other].exclusive for other in running.values()):
+                        # starts once the running stages, or the exclusive one, have finished
+                        continue
+                    pending.remove(name)
+                    logging.info(f'Starting stage {name}')
+                    upstream = {dependency: artifacts[dependency] for dependency in self.stages[name].depends_on}
+                    # set before the stage starts, so it already sees itself running
+                    self.running_stages = frozenset([*running.values(), name])
+                    running[pool.submit(self._run_stage, name, upstream)] = name
+                if not running:
+                    if ready:
+                        # every ready stage was skipped, which may have unblocked others
+                        continue
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self.running_stages = frozenset(running.values())
+                    try:
+                        artifact, seconds = future.result()
+                    except Exception as e:
+                        # the stages already running finish, but no new ones start
+                        failure = failure or e
+                        self.report[name] = {'status': 'failed', 'error': str(e)}
+                        continue
+                    artifacts[name] = artifact
+                    self.report[name] = {'status': 'ran', 'seconds': round(seconds, 3)}
+                    self.state[name] = {
+                        'fingerprint': fingerprints[name],
+                        'artifact': asdict(artifact) if is_dataclass(artifact) else None,
+                        'seconds': seconds,
+                        'finished_at': time.time()
+                    }
+                    self._save_state()
+        logging.info(f'Pipeline report: {self.report}')
+        if failure is not None:
+            raise failure
+        return artifacts
+
+    def _is_fresh(self, name: str, stage_fingerprint: str) -> bool:
+        # a stage without an artifact, or whose outputs were deleted, always runs again
+        if self.state.get(name, {}).get('fingerprint') != stage_fingerprint:
+            return False
+        return artifact_outputs_exist(self._saved_artifact(name))
+
+    def _run_stage(self, name: str, upstream: Dict[str, Any]):
+        started_at = time.perf_counter()
+        artifact = self.stages[name].run(**upstream)
+        return artifact, time.perf_counter() - started_at
@@ -1,5 +1,8 @@
 import os
 import sys
+import json
+import argparse
+from typing import Any, Dict, List
 
 from src.logger import logging
 from src.exception import AppException
@@ -7,18 +10,35 @@ from src.components.data_ingestion import DataIngestion
 from src.components.feaature_engineering import FeatureEngineering
 from src.components.data_validation import DataValidation
 from src.components.model_trainer import ModelTrainer
+from src.components.model_exporter import ModelExporter
+from src.components.model_quantizer import ModelQuantizer
+from src.pipeline.executor import PipelineExecutor, Stage
 
-from src.entity.config_entity import (DataIngestionConfig, DataValidationConfig, ModelTrainerConfig, FeatureEngineeringConfig)
+from src.constant.training_pipeline import FEATURE_ENGINEERING_IMAGE_SIZE
+from src.entity.config_entity import (TrainingPipelineConfig, DataIngestionConfig, DataValidationConfig, ModelTrainerConfig,
+                                      FeatureEngineeringConfig, ModelExporterConfig, ModelEvaluationConfig,
+                                      ModelQuantizerConfig)
+
+from src.entity.artifacts_entity import (DataIngestionArtifact, DataValidationArtifact, ModelTrainerArtifact, FeatureEngineeringArtifact,
+                                         ModelExportArtifact, ModelQuantizationArtifact)
+
+STAGE_NAMES = ['data_ingestion', 'data_validation', 'feature_engineering', 'model_trainer', 'model_export',
+               'model_quantization']
 
-from src.entity.artifacts_entity import (DataIngestionArtifact, DataValidationArtifact, ModelTrainerArtifact, FeatureEngineeringArtifact)
 
 class TrainingPipeline:
-    def __init__(self) -> None:
-        # self.data_ingestion_config = DataIngestionConfig
-        self.data_ingestion_config = DataIngestionConfig
-        self.data_validation_config = DataValidationConfig
-        self.feature_engineering_config = FeatureEngineeringConfig
-        self.model_trainer_config = ModelTrainerConfig
+    def __init__(self, training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig()) -> None:
+        self.training_pipeline_config = training_pipeline_config
+        self.data_ingestion_config = DataIngestionConfig()
+        self.data_validation_config = DataValidationConfig()
+        self.feature_engineering_config = FeatureEngineeringConfig(
+            feature_params={'width': FEATURE_ENGINEERING_IMAGE_SIZE, 'height': FEATURE_ENGINEERING_IMAGE_SIZE}
+        )
+        self.model_trainer_config = ModelTrainerConfig()
+        self.model_exporter_config = ModelExporterConfig()
+        self.model_evaluation_config = ModelEvaluationConfig()
+        self.model_quantizer_config = ModelQuantizerConfig()
+        self.executor = None
 
     def start_data_ingestion(self) -> DataIngestionArtifact:
         """
@@ -88,12 +108,13 @@ class TrainingPipeline:
             raise AppException(e, sys)
         
     
-    def start_model_trainer(self)-> ModelTrainerArtifact:
+    def start_model_trainer(self, data_validation_artifact: DataValidationArtifact)-> ModelTrainerArtifact:
         """
         This function initiates the model training process.
 
         Parameters:
         self (TrainingPipeline): The instance of the TrainingPipeline class.
+        data_validation_artifact (DataValidationArtifact): The artifact resulting from the data validation process.
 
         Returns:
         ModelTrainerArtifact: The artifact resulting from the model training process.
@@ -103,21 +124,107 @@ class TrainingPipeline:
         """
         logging.info("Starting model Trainer")
         try:
-            model_trainer = ModelTrainer(model_trainer_config= self.model_trainer_config)
-            model_trainer_artifact = model_trainer.initiate_model_trainer()
+            model_trainer = ModelTrainer(model_trainer_config= self.model_trainer_config, running_alone=self.running_alone)
+            model_trainer_artifact = model_trainer.initiate_model_trainer(data_validation_artifact)
             return model_trainer_artifact
         except Exception as e:
             raise AppException(e, sys)
     
-    def run_pipeline(self)-> None:
+    def start_model_export(self, model_trainer_artifact: ModelTrainerArtifact,
+                           data_validation_artifact: DataValidationArtifact) -> ModelExportArtifact:
+        """
+        This function exports the trained model to ONNX and checks it against the trained weights.
+
+        Parameters:
+        self (TrainingPipeline): The instance of the TrainingPipeline class.
+        model_trainer_artifact (ModelTrainerArtifact): The artifact resulting from the model training process.
+        data_validation_artifact (DataValidationArtifact): The artifact resulting from the data validation process.
+
+        Returns:
+        ModelExportArtifact: The artifact resulting from the model export process.
+
+        Raises:
+        AppException: If an error occurs during the model export process.
+        """
+        logging.info("Starting model export")
+        try:
+            model_exporter = ModelExporter(model_exporter_config=self.model_exporter_config)
+            return model_exporter.initiate_model_export(model_trainer_artifact, data_validation_artifact)
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def start_model_quantization(self, model_export_artifact: ModelExportArtifact,
+                                 data_validation_artifact: DataValidationArtifact) -> ModelQuantizationArtifact:
+        """
+        This function quantizes the exported model to INT8 and promotes it to serving when its accuracy holds.
+
+        Parameters:
+        self (TrainingPipeline): The instance of the TrainingPipeline class.
+        model_export_artifact (ModelExportArtifact): The artifact resulting from the model export process.
+        data_validation_artifact (DataValidationArtifact): The artifact resulting from the data validation process.
+
+        Returns:
+        ModelQuantizationArtifact: The artifact resulting from the model quantization process.
+
+        Raises:
+        AppException: If an error occurs during the model quantization process.
         """
-        This function initiates the entire training pipeline.
+        logging.info("Starting model quantization")
+        try:
+            model_quantizer = ModelQuantizer(model_quantizer_config=self.model_quantizer_config,
+                                             model_evaluation_config=self.model_evaluation_config)
+            return model_quantizer.initiate_model_quantization(model_export_artifact, data_validation_artifact)
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def running_alone(self) -> bool:
+        # model training is the only stage running, or it runs outside a pipeline run
+        return self.executor is None or self.executor.running_stages <= {'model_trainer'}
+
+    def validated_data(self, data_ingestion: DataIngestionArtifact) -> DataValidationArtifact:
+        # the validation stage, which stops everything downstream when the data is not valid
+        data_validation_artifact = self.start_data_validation(data_ingestion)
+        if not (data_validation_artifact.validation_status == True and data_validation_artifact.data_status == True):
+            raise Exception('Data is not valid')
+        return data_validation_artifact
+
+    def stages(self) -> List[Stage]:
+        """
+        Returns the stages of the training pipeline. Feature engineering, model training and quantization
+        each keep every core busy and are timed for calibration or benchmarks, so they are exclusive: no
+        other stage runs beside them, even though training does not need the engineered features.
+        """
+        return [
+            Stage('data_ingestion', lambda: self.start_data_ingestion(), DataIngestionArtifact,
+                  params=self.data_ingestion_config),
+            Stage('data_validation', lambda data_ingestion: self.validated_data(data_ingestion), DataValidationArtifact,
+                  depends_on=['data_ingestion'], params=self.data_validation_config),
+            Stage('feature_engineering', lambda data_validation: self.start_feature_engineering(data_validation),
+                  FeatureEngineeringArtifact, depends_on=['data_validation'], params=self.feature_engineering_config,
+                  exclusive=True),
+            Stage('model_trainer', lambda data_validation: self.start_model_trainer(data_validation), ModelTrainerArtifact,
+                  depends_on=['data_validation'], params=self.model_trainer_config, exclusive=True),
+            Stage('model_export',
+                  lambda model_trainer, data_validation: self.start_model_export(model_trainer, data_validation),
+                  ModelExportArtifact, depends_on=['model_trainer', 'data_validation'], params=self.model_exporter_config),
+            Stage('model_quantization',
+                  lambda model_export, data_validation: self.start_model_quantization(model_export, data_validation),
+                  ModelQuantizationArtifact, depends_on=['model_export', 'data_validation'],
+                  params=[self.model_quantizer_config, self.model_evaluation_config], exclusive=True)
+        ]
+
+    def run_pipeline(self, from_stage: str = None, only: List[str] = None) -> Dict[str, Any]:
+        """
+        This function initiates the entire training pipeline. Stages whose configs and upstream
+        stages are unchanged since their last successful run are skipped.
 
         Parameters:
         self (TrainingPipeline): The instance of the TrainingPipeline class.
+        from_stage (str): Runs this stage and everything after it even when unchanged.
+        only (list): Runs just these stages on the saved results of the stages before them.
 
         Returns:
-        None: This function does not return any value.
+        dict: The artifact of every stage, by stage name.
 
         Raises:
         AppException: If an error occurs during the pipeline execution.
@@ -125,14 +232,28 @@ class TrainingPipeline:
         """
         try:
             logging.info('Starting pipeline')
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact)
-            if data_validation_artifact.validation_status == True and data_validation_artifact.data_status == True:
-                model_trainer_artifact = self.start_model_trainer()
-            else:
-                raise Exception('Data is not valid')
-            
-            
+            self.executor = PipelineExecutor(self.stages(), self.training_pipeline_config.state_file_path,
+                                             self.training_pipeline_config.max_parallel_stages)
+            artifacts = self.executor.run(from_stage=from_stage, only=only)
+            self.report = self.executor.report
+            return artifacts
         except Exception as e:
             raise AppException(e, sys)
-        
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='Run the number plate detector training pipeline.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--from-stage', choices=STAGE_NAMES,
+                       help='rerun this stage and every stage after it, earlier stages are skipped when unchanged')
+    group.add_argument('--only', nargs='+', choices=STAGE_NAMES,
+                       help='run just these stages on the saved results of the stages before them')
+    args = parser.parse_args(argv)
+
+    pipeline = TrainingPipeline()
+    pipeline.run_pipeline(from_stage=args.from_stage, only=args.only)
+    print(json.dumps(pipeline.report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+import sys
+import time
+import bisect
+import asyncio
+import inspect
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Union
+
+import numpy as np
+
+from src.logger import logging
+from src.exception import AppException, ServiceSaturatedError
+from src.entity.config_entity import BatchingConfig
+
+
+class Histogram:
+    def __init__(self, buckets: List[float]):
+        """
+        Initialize a fixed-bucket histogram.
+
+        Parameters:
+        buckets (List[float]): The inclusive upper bounds of the buckets. Values larger than the
+        last bound are counted in an overflow bucket.
+        """
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates the q-th quantile as the upper bound of the bucket holding it.
+
+        Parameters:
+        q (float): The quantile to estimate, between 0 and 1.
+
+        Returns:
+        float: The bucket upper bound, or the largest observed value for the overflow bucket.
+        """
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank and bucket_count > 0:
+                    return self.buckets[index] if index < len(self.buckets) else self.max
+            return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {str(bound): count for bound, count in zip(self.buckets, self.counts)}
+            buckets['+Inf'] = self.counts[-1]
+            count, total, maximum = self.count, self.sum, self.max
+        return {
+            'count': count,
+            'mean': total / count if count else 0.0,
+            'max': maximum,
+            'p50': self.quantile(0.50),
+            'p90': self.quantile(0.90),
+            'p99': self.quantile(0.99),
+            'buckets': buckets
+        }
+
+
+@dataclass
+class _PendingRequest:
+    tensor: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn: Callable[[np.ndarray], Union[np.ndarray, Awaitable[np.ndarray]]],
+                 batching_config: BatchingConfig = BatchingConfig()):
+        """
+        Initialize a dynamic micro-batching scheduler.
+
+        Requests submitted with `submit` are queued and coalesced into a single batch until either
+        `max_batch_size` rows are collected or the oldest request has waited `max_wait_ms`. The batch
+        is run through `predict_fn` in one forward pass and the output rows are handed back to the
+        awaiting requests in submission order.
+
+        Up to `max_concurrent_batches` batches are in flight at once; while every slot is busy new
+        requests keep accumulating into the next batch.
+
+        Parameters:
+        predict_fn (Callable): Runs the model on a batch of shape (N, ...) and returns N output rows.
+        It may be a coroutine function, e.g. one that dispatches to an InferenceExecutor.
+        batching_config (BatchingConfig): The configuration for the batching scheduler.
+        """
+        self.predict_fn = predict_fn
+        self.batching_config = batching_config
+        self.batch_size_histogram = Histogram(batching_config.batch_size_buckets)
+        self.queue_wait_histogram = Histogram(batching_config.latency_buckets_ms)
+        self.inference_histogram = Histogram(batching_config.latency_buckets_ms)
+        self.request_latency_histogram = Histogram(batching_config.latency_buckets_ms)
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._in_flight = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.batching_config.max_queue_size)
+        self._slots = asyncio.Semaphore(self.batching_config.max_concurrent_batches)
+        self._task = asyncio.create_task(self._run())
+        logging.info(f'Started micro-batcher with max batch size {self.batching_config.max_batch_size} '
+                     f'and max wait {self.batching_config.max_wait_ms} ms')
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError('Micro-batcher stopped before the request was served'))
+        logging.info('Stopped micro-batcher')
+
+    async def submit(self, tensor: np.ndarray) -> np.ndarray:
+        """
+        Queues a preprocessed tensor for batched inference and waits for its prediction.
+
+        Parameters:
+        tensor (np.ndarray): A preprocessed input with a leading batch dimension, e.g. (1, 224, 224, 3).
+
+        Returns:
+        np.ndarray: The model output rows belonging to this tensor.
+
+        Raises:
+        RuntimeError: If the batcher is not running.
+        ServiceSaturatedError: If `max_queue_size` requests are already waiting.
+        AppException: If the forward pass fails.
+        """
+        if not self.running:
+            raise RuntimeError('Micro-batcher is not running')
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(_PendingRequest(tensor, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise ServiceSaturatedError(f'Micro-batcher queue is full with {self._queue.qsize()} requests')
+        return await future
+
+    def metrics(self) -> dict:
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'batches_in_flight': len(self._in_flight),
+            'batch_size': self.batch_size_histogram.snapshot(),
+            'queue_wait_ms': self.queue_wait_histogram.snapshot(),
+            'inference_ms': self.inference_histogram.snapshot(),
+            'request_latency_ms': self.request_latency_histogram.snapshot()
+        }
+
+    async def _collect(self) -> List[_PendingRequest]:
+        first = await self._queue.get()
+        batch = [first]
+        rows = first.tensor.shape[0]
+        deadline = first.enqueued_at + self.batching_config.max_wait_ms / 1000.0
+
+        while rows < self.batching_config.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                if timeout > 0:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                else:
+                    # the deadline has passed but requests that are already queued can still ride along
+                    pending = self._queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            batch.append(pending)
+            rows += pending.tensor.shape[0]
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._release_slot)
+
+    def _release_slot(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _dispatch(self, batch: List[_PendingRequest]) -> None:
+        batch = [pending for pending in batch if not pending.future.done()]
+        if not batch:
+            return
+
+        started_at = time.perf_counter()
+        for pending in batch:
+            self.queue_wait_histogram.observe((started_at - pending.enqueued_at) * 1000.0)
+
+        try:
+            inputs = np.concatenate([pending.tensor for pending in batch], axis=0)
+            outputs = self.predict_fn(inputs)
+            if inspect.isawaitable(outputs):
+                outputs = await outputs
+        except Exception as e:
+            logging.info(f'Batched inference failed for {len(batch)} requests: {e}')
+            # backpressure from the executor is handed back as is so callers can answer with a 503
+            error = e if isinstance(e, ServiceSaturatedError) else AppException(e, sys)
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(error)
+            return
+
+        finished_at = time.perf_counter()
+        self.batch_size_histogram.observe(inputs.shape[0])
+        self.inference_histogram.observe((finished_at - started_at) * 1000.0)
+
+        offset = 0
+        for pending in batch:
+            rows = pending.tensor.shape[0]
+            if not pending.future.done():
+                pending.future.set_result(outputs[offset:offset + rows])
+            self.request_latency_histogram.observe((finished_at - pending.enqueued_at) * 1000.0)
+            offset += rows
@@ -0,0 +1,125 @@
+import sys
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable
+
+from src.logger import logging
+from src.exception import AppException, ServiceSaturatedError
+from src.entity.config_entity import InferenceExecutorConfig
+
+# each worker (thread or process) keeps its own copy of the model here
+_worker_state = threading.local()
+
+
+def _initialize_worker(model_loader: Callable[[str], Any], model_path: str) -> None:
+    _worker_state.model = model_loader(model_path)
+    logging.info(f'Loaded model {model_path} on inference worker {threading.current_thread().name}')
+
+
+def _call_on_worker(fn: Callable, uses_model: bool, args: tuple) -> Any:
+    if uses_model:
+        return fn(_worker_state.model, *args)
+    return fn(*args)
+
+
+class InferenceExecutor:
+    def __init__(self, model_loader: Callable[[str], Any], model_path: str,
+                 inference_executor_config: InferenceExecutorConfig = InferenceExecutorConfig()):
+        """
+        Initialize a dedicated executor that keeps blocking decode and inference work off the event loop.
+
+        Every worker loads the model once through `model_loader` when it starts. With the process
+        executor `model_loader` and every dispatched function must be importable module level functions
+        so they can be sent to the worker processes.
+
+        Parameters:
+        model_loader (Callable): Loads the model from `model_path`, called once per worker.
+        model_path (str): The path of the model to load.
+        inference_executor_config (InferenceExecutorConfig): The configuration for the executor.
+        """
+        self.model_loader = model_loader
+        self.model_path = model_path
+        self.inference_executor_config = inference_executor_config
+        self.in_flight = 0
+        self.rejected = 0
+        self._pool: Executor = None
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        try:
+            config = self.inference_executor_config
+            if config.executor_type == 'process':
+                # spawn so the workers never inherit a half-initialised framework runtime from the parent
+                self._pool = ProcessPoolExecutor(
+                    max_workers=config.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_initialize_worker,
+                    initargs=(self.model_loader, self.model_path)
+                )
+            elif config.executor_type == 'thread':
+                self._pool = ThreadPoolExecutor(
+                    max_workers=config.max_workers,
+                    thread_name_prefix='inference',
+                    initializer=_initialize_worker,
+                    initargs=(self.model_loader, self.model_path)
+                )
+            else:
+                raise ValueError(f'Unknown executor type: {config.executor_type}')
+            logging.info(f'Started {config.executor_type} inference executor with {config.max_workers} workers')
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def shutdown(self) -> None:
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        logging.info('Stopped inference executor')
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.inference_executor_config.max_queue_depth
+
+    async def run(self, fn: Callable, *args, uses_model: bool = False) -> Any:
+        """
+        Runs a blocking function on the executor without blocking the event loop.
+
+        Parameters:
+        fn (Callable): The function to run. When `uses_model` is True it is called as fn(model, *args)
+        with the model owned by the worker.
+        args: The positional arguments for `fn`.
+        uses_model (bool): Whether to pass the worker's model as the first argument.
+
+        Returns:
+        Any: The return value of `fn`.
+
+        Raises:
+        RuntimeError: If the executor has not been started.
+        ServiceSaturatedError: If `max_queue_depth` calls are already queued or running.
+        """
+        if self._pool is None:
+            raise RuntimeError('Inference executor is not running')
+        if self.saturated:
+            self.rejected += 1
+            raise ServiceSaturatedError(
+                f'Inference executor is saturated with {self.in_flight} queued or running calls')
+
+        # only touched from the event loop thread, so a plain counter is enough
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, _call_on_worker, fn, uses_model, args)
+        finally:
+            self.in_flight -= 1
+
+    def metrics(self) -> dict:
+        return {
+            'executor_type': self.inference_executor_config.executor_type,
+            'max_workers': self.inference_executor_config.max_workers,
+            'max_queue_depth': self.inference_executor_config.max_queue_depth,
+            'in_flight': self.in_flight,
+            'rejected': self.rejected
+        }
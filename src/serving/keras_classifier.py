@@ -0,0 +1,25 @@
+import numpy as np
+from PIL import Image
+from src.serving.preprocessing import ImagePreprocessor
+
+# preprocess() allocates its own output, so one instance can be shared by every executor thread
+preprocessor = ImagePreprocessor(target_size=(224, 224), dtype=np.float32)
+
+
+def load_model(model_path: str):
+    # imported here so worker processes only pay for tensorflow when they actually load the model
+    import tensorflow as tf
+    return tf.keras.models.load_model(model_path)
+
+
+def preprocess_image(image: Image.Image) -> np.array:
+    # preprocess the image to the (1, 224, 224, 3) float32 format expected by the model
+    return preprocessor.preprocess(image)
+
+
+def decode_and_preprocess(image_bytes: bytes) -> np.array:
+    return preprocessor.preprocess_bytes(image_bytes)
+
+
+def predict_batch(model, batch: np.array) -> np.array:
+    return model.predict(batch, verbose=0)
@@ -0,0 +1,231 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Dict, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.logger import logging
+from src.entity.config_entity import LiveStreamConfig, VideoSourceConfig
+from src.video.sources import VideoSource, open_video_source
+
+FrameProcessor = Callable[[np.ndarray], np.ndarray]
+
+
+def multipart_chunk(jpeg: bytes) -> bytes:
+    return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n\r\n'
+
+
+class FrameBroadcast:
+    def __init__(self):
+        """
+        Holds only the latest published frame. Readers wait for a frame newer than the one they last
+        sent, so a slow client skips stale frames instead of building up a queue.
+        """
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._frame: Optional[bytes] = None
+        self._waiters = set()
+
+    def publish(self, frame: bytes) -> None:
+        with self._lock:
+            self._sequence += 1
+            self._frame = frame
+            waiters = list(self._waiters)
+        # publish runs on the capture thread, the events belong to the clients' event loops
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def latest(self) -> Tuple[int, Optional[bytes]]:
+        with self._lock:
+            return self._sequence, self._frame
+
+    async def wait_newer(self, sequence: int, timeout: float) -> Optional[Tuple[int, bytes]]:
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._sequence > sequence:
+                return self._sequence, self._frame
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+        return self.latest()
+
+
+class LiveStreamWorker:
+    def __init__(self, source: str, processor_factory: Callable[[], FrameProcessor],
+                 live_stream_config: LiveStreamConfig = LiveStreamConfig(),
+                 video_source_config: VideoSourceConfig = VideoSourceConfig()):
+        """
+        Initialize the single capture + inference + encode loop for one video source.
+
+        The loop runs on a background thread and publishes every annotated JPEG to a FrameBroadcast
+        that any number of clients read from, so N viewers cost one inference stream.
+
+        Parameters:
+        source (str): The camera index, file path, image folder, stream url or `synthetic` source,
+        see open_video_source.
+        processor_factory (Callable): Builds the frame processor on the worker thread, so models are
+        loaded off the event loop and owned by the worker.
+        live_stream_config (LiveStreamConfig): The configuration for the live stream.
+        video_source_config (VideoSourceConfig): The pacing, looping and reconnect settings of the source.
+        """
+        self.source = source
+        self.processor_factory = processor_factory
+        self.live_stream_config = live_stream_config
+        self.video_source: VideoSource = open_video_source(source, video_source_config)
+        self.broadcast = FrameBroadcast()
+        self.subscribers = 0
+        self.frames = 0
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.alive:
+            return
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=f'live-{self.source}', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        # unblocks a worker waiting on its source for the next frame
+        self.video_source.stop()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            process = self.processor_factory()
+            encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), self.live_stream_config.jpeg_quality]
+            # the source reconnects on its own and decodes ahead on its reader thread
+            for frame in self.video_source:
+                if self._stop.is_set():
+                    break
+                ok, buffer = cv2.imencode('.jpg', process(frame), encode_params)
+                if ok:
+                    self.broadcast.publish(buffer.tobytes())
+                    self.frames += 1
+            logging.info(f'Live stream worker for {self.source} reached the end of its source')
+        except Exception as e:
+            self.error = e
+            logging.info(f'Live stream worker for {self.source} stopped: {e}')
+
+    async def frames_for_client(self) -> AsyncIterator[bytes]:
+        sequence = 0
+        while True:
+            item = await self.broadcast.wait_newer(sequence, self.live_stream_config.client_timeout_s)
+            if item is None:
+                if not self.alive:
+                    return
+                continue
+            sequence, frame = item
+            yield multipart_chunk(frame)
+
+
+class LiveStreamHub:
+    def __init__(self, processor_factory: Callable[[Hashable], FrameProcessor],
+                 live_stream_config: LiveStreamConfig = LiveStreamConfig(),
+                 video_source_config: VideoSourceConfig = VideoSourceConfig()):
+        """
+        Shares one LiveStreamWorker per (source, mode) key between every connected client.
+
+        Workers start with their first client and stop `idle_timeout_s` after their last one leaves.
+
+        Parameters:
+        processor_factory (Callable): Builds the frame processor for a mode, e.g. adaptive or full rate.
+        live_stream_config (LiveStreamConfig): The configuration for the live stream.
+        video_source_config (VideoSourceConfig): The settings every worker opens its source with.
+        """
+        self.processor_factory = processor_factory
+        self.live_stream_config = live_stream_config
+        self.video_source_config = video_source_config
+        self._workers: Dict[tuple, LiveStreamWorker] = {}
+        self._idle_timers: Dict[tuple, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, source: str, mode: Hashable = None) -> LiveStreamWorker:
+        key = (source, mode)
+        with self._lock:
+            timer = self._idle_timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            worker = self._workers.get(key)
+            if worker is None:
+                worker = LiveStreamWorker(source, lambda: self.processor_factory(mode), self.live_stream_config,
+                                          self.video_source_config)
+                self._workers[key] = worker
+            if not worker.alive:
+                logging.info(f'Starting live stream worker for {key}')
+                worker.start()
+            worker.subscribers += 1
+            return worker
+
+    def release(self, source: str, mode: Hashable = None) -> None:
+        key = (source, mode)
+        with self._lock:
+            worker = self._workers.get(key)
+            if worker is None:
+                return
+            worker.subscribers -= 1
+            if worker.subscribers <= 0:
+                timer = threading.Timer(self.live_stream_config.idle_timeout_s, self._stop_if_idle, args=(key,))
+                timer.daemon = True
+                self._idle_timers[key] = timer
+                timer.start()
+
+    def _stop_if_idle(self, key: tuple) -> None:
+        with self._lock:
+            worker = self._workers.get(key)
+            if worker is None or worker.subscribers > 0:
+                return
+            del self._workers[key]
+            self._idle_timers.pop(key, None)
+        logging.info(f'Stopping idle live stream worker for {key}')
+        worker.stop()
+
+    async def stream(self, source: str, mode: Hashable = None) -> AsyncIterator[bytes]:
+        """
+        Streams multipart JPEG chunks for one client, for use with a StreamingResponse.
+        """
+        worker = self.acquire(source, mode)
+        try:
+            async for chunk in worker.frames_for_client():
+                yield chunk
+        finally:
+            self.release(source, mode)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._workers.values())
+            timers = list(self._idle_timers.values())
+            self._workers.clear()
+            self._idle_timers.clear()
+        for timer in timers:
+            timer.cancel()
+        for worker in workers:
+            worker.stop()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                f'{source}/{mode}': {
+                    'subscribers': worker.subscribers,
+                    'frames': worker.frames,
+                    'alive': worker.alive,
+                    'error': str(worker.error) if worker.error else None,
+                    'video_source': worker.video_source.stats()
+                }
+                for (source, mode), worker in self._workers.items()
+            }
@@ -0,0 +1,154 @@
+import sys
+import time
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import supervision as sv
+
+from src.logger import logging
+from src.exception import AppException
+from src.constant.serving import ROBOFLOW_API_KEY
+from src.entity.config_entity import DetectionModelConfig
+
+
+class DetectionModel:
+    def __init__(self, model: Any, backend: str):
+        """
+        Wraps a hosted Roboflow model, local ultralytics weights or an exported ONNX graph behind one interface.
+
+        Parameters:
+        model (Any): The loaded model.
+        backend (str): One of 'roboflow', 'ultralytics' or 'onnx'.
+        """
+        self.model = model
+        self.backend = backend
+
+    @property
+    def thread_safe(self) -> bool:
+        # onnxruntime sessions may be run from several threads; the ultralytics predictor and the
+        # Roboflow model keep per call state on the model
+        return self.backend == 'onnx'
+
+    def infer(self, image: np.ndarray) -> list:
+        # every backend returns one result per input image
+        if self.backend == 'ultralytics':
+            return self.model(image, verbose=False)
+        if self.backend == 'onnx':
+            return self.model.predict(image if isinstance(image, list) else [image])
+        return self.model.infer(image)
+
+    def to_detections(self, result: Any) -> sv.Detections:
+        if self.backend == 'ultralytics':
+            return sv.Detections.from_ultralytics(result)
+        if self.backend == 'onnx':
+            return sv.Detections(
+                xyxy=result.xyxy, confidence=result.confidence, class_id=result.class_id,
+                data={'class_name': np.array([self.model.names.get(int(class_id), str(class_id))
+                                              for class_id in result.class_id], dtype=str)}
+            )
+        return sv.Detections.from_inference(result)
+
+    def detect(self, image: np.ndarray) -> sv.Detections:
+        return self.to_detections(self.infer(image)[0])
+
+    def detect_batch(self, images: List[np.ndarray]) -> List[sv.Detections]:
+        # both backends accept a list of images and run them as one batch
+        return [self.to_detections(result) for result in self.infer(images)]
+
+    def warmup(self, size: Tuple[int, int]) -> float:
+        width, height = size
+        started_at = time.perf_counter()
+        self.infer(np.zeros((height, width, 3), dtype=np.uint8))
+        return time.perf_counter() - started_at
+
+
+def load_detection_model(detection_model_config: DetectionModelConfig) -> DetectionModel:
+    """
+    Loads the number plate detector: the exported ONNX graph when `onnx_path` is set, local weights
+    when `local_path` is set, so no network access is needed, otherwise the hosted Roboflow model.
+    """
+    if detection_model_config.onnx_path:
+        from src.serving.onnx_detector import OnnxDetector
+        detector = OnnxDetector(detection_model_config.onnx_path,
+                                intra_op_threads=detection_model_config.intra_op_threads,
+                                inter_op_threads=detection_model_config.inter_op_threads)
+        return DetectionModel(detector, backend='onnx')
+
+    if detection_model_config.local_path:
+        from ultralytics import YOLO
+        return DetectionModel(YOLO(detection_model_config.local_path), backend='ultralytics')
+
+    from inference import get_model
+    model_id = f'{detection_model_config.model_id}/{detection_model_config.version}'
+    return DetectionModel(get_model(model_id=model_id, api_key=ROBOFLOW_API_KEY), backend='roboflow')
+
+
+class ModelRegistry:
+    def __init__(self, loader: Callable[[DetectionModelConfig], DetectionModel] = load_detection_model):
+        """
+        Initialize a registry that loads each model at most once per process.
+
+        Models are keyed by model id, version and local path and loaded lazily on first use. Concurrent
+        callers asking for the same model wait for a single load, while different models load in parallel.
+
+        Parameters:
+        loader (Callable): Loads a DetectionModel for a DetectionModelConfig.
+        """
+        self.loader = loader
+        self._models: Dict[tuple, DetectionModel] = {}
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(detection_model_config: DetectionModelConfig) -> tuple:
+        return (detection_model_config.model_id, detection_model_config.version, detection_model_config.local_path,
+                detection_model_config.onnx_path)
+
+    def get(self, detection_model_config: DetectionModelConfig = DetectionModelConfig()) -> DetectionModel:
+        """
+        Returns the model for a configuration, loading and warming it up on first use.
+
+        Parameters:
+        detection_model_config (DetectionModelConfig): Identifies the model to load.
+
+        Returns:
+        DetectionModel: The loaded model, shared by every caller in the process.
+
+        Raises:
+        AppException: If loading or warming up the model fails.
+        """
+        key = self._key(detection_model_config)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+            try:
+                logging.info(f'Loading detection model {key}')
+                model = self.loader(detection_model_config)
+                if detection_model_config.warmup:
+                    elapsed = model.warmup(detection_model_config.warmup_size)
+                    logging.info(f'Warmed up detection model {key} in {elapsed * 1000.0:.1f} ms')
+            except Exception as e:
+                raise AppException(e, sys)
+            self._models[key] = model
+            return model
+
+    def loaded(self) -> list:
+        return list(self._models)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._key_locks.clear()
+
+
+# process-wide registry shared by the streamlit app, the API and the batch jobs
+model_registry = ModelRegistry()
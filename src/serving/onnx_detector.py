@@ -0,0 +1,236 @@
+import ast
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.logger import logging
+
+# the grey ultralytics pads letterboxed images with
+PAD_VALUE = (114, 114, 114)
+
+# boxes of different classes are moved this far apart, so one NMS pass never suppresses across classes
+CLASS_OFFSET = 7680
+
+
+class Detections(NamedTuple):
+    xyxy: np.ndarray
+    confidence: np.ndarray
+    class_id: np.ndarray
+
+
+class Letterbox(NamedTuple):
+    scale: float
+    pad: Tuple[float, float]
+    shape: Tuple[int, int]
+
+
+def letterbox(image: np.ndarray, size: Tuple[int, int]) -> Tuple[np.ndarray, Letterbox]:
+    """
+    Resizes an image to fit `size` (height, width) keeping its aspect ratio and pads the rest, as
+    ultralytics does before inference, so the exported graph sees the same pixels as the trained model.
+    """
+    height, width = image.shape[:2]
+    target_height, target_width = size
+    scale = min(target_height / height, target_width / width)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (target_width - new_width) / 2, (target_height - new_height) / 2
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=PAD_VALUE)
+    return image, Letterbox(scale=scale, pad=(left, top), shape=(height, width))
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Returns the indices of the boxes (xyxy) kept by greedy NMS, highest score first.
+    """
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        top_left = np.maximum(boxes[best, :2], boxes[rest, :2])
+        bottom_right = np.minimum(boxes[best, 2:], boxes[rest, 2:])
+        intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=1)
+        iou = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def decode_predictions(prediction: np.ndarray, transform: Letterbox, conf_threshold: float = 0.25,
+                       iou_threshold: float = 0.7, max_detections: int = 300) -> Detections:
+    """
+    Turns one image's raw YOLOv8 output, (4 + classes, anchors) of center x, center y, width, height and
+    class scores in letterboxed pixels, into detections in the pixels of the original image.
+    """
+    prediction = prediction.T
+    scores = prediction[:, 4:]
+    class_id = scores.argmax(axis=1)
+    confidence = scores[np.arange(len(scores)), class_id]
+    candidates = confidence > conf_threshold
+    boxes, confidence, class_id = prediction[candidates, :4], confidence[candidates], class_id[candidates]
+
+    xyxy = np.empty_like(boxes)
+    xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+    xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+    keep = non_max_suppression(xyxy + (class_id * CLASS_OFFSET)[:, None], confidence, iou_threshold)[:max_detections]
+    xyxy, confidence, class_id = xyxy[keep], confidence[keep], class_id[keep]
+
+    pad_x, pad_y = transform.pad
+    xyxy = (xyxy - np.array([pad_x, pad_y, pad_x, pad_y], dtype=xyxy.dtype)) / transform.scale
+    height, width = transform.shape
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+    return Detections(xyxy=xyxy.astype(np.float32), confidence=confidence.astype(np.float32),
+                      class_id=class_id.astype(np.int64))
+
+
+def preprocess_batch(images: List[np.ndarray], size: Tuple[int, int]) -> Tuple[np.ndarray, List[Letterbox]]:
+    """
+    Letterboxes BGR images, as cv2 reads them, into one (N, 3, H, W) RGB float32 batch in [0, 1].
+    """
+    height, width = size
+    batch = np.empty((len(images), 3, height, width), dtype=np.float32)
+    transforms = []
+    for index, image in enumerate(images):
+        boxed, transform = letterbox(image, size)
+        # BGR -> RGB and HWC -> CHW as views, the cast and scale happen in one pass into the batch
+        np.multiply(boxed[:, :, ::-1].transpose(2, 0, 1), np.float32(1 / 255), out=batch[index])
+        transforms.append(transform)
+    return batch, transforms
+
+
+def session_options(intra_op_threads: int = 0, inter_op_threads: int = 1):
+    """
+    Returns onnxruntime session options with every graph optimization on and the given thread pools.
+
+    Parameters:
+    intra_op_threads (int): Threads one operator is split across, 0 lets onnxruntime use every physical core.
+    inter_op_threads (int): Operators run at the same time; above 1 the graph runs in parallel mode,
+        which only pays off for graphs with independent branches.
+    """
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    options.execution_mode = ort.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1 else ort.ExecutionMode.ORT_SEQUENTIAL
+    return options
+
+
+class OnnxDetector:
+    def __init__(self, model_path: str, intra_op_threads: int = 0, inter_op_threads: int = 1,
+                 conf_threshold: float = 0.25, iou_threshold: float = 0.7, max_detections: int = 300,
+                 image_size: Optional[Tuple[int, int]] = None):
+        """
+        Runs a YOLOv8 detector exported to ONNX with onnxruntime on the CPU, with the same letterboxing
+        and NMS defaults as ultralytics.
+
+        Parameters:
+        model_path (str): The exported .onnx file.
+        intra_op_threads (int): See session_options.
+        inter_op_threads (int): See session_options.
+        conf_threshold (float): Detections below this confidence are dropped.
+        iou_threshold (float): The IoU above which NMS suppresses the lower scoring box.
+        max_detections (int): The most detections kept per image.
+        image_size (tuple): The (height, width) the graph takes, read from the graph or its metadata when not set.
+        """
+        import onnxruntime as ort
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, sess_options=session_options(intra_op_threads, inter_op_threads),
+                                            providers=['CPUExecutionProvider'])
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_detections = max_detections
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # ultralytics writes the image size and class names into the metadata of the graphs it exports
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        batch, _, height, width = model_input.shape
+        if image_size is None:
+            if isinstance(height, int) and isinstance(width, int):
+                image_size = (height, width)
+            else:
+                image_size = tuple(ast.literal_eval(metadata['imgsz']))
+        self.image_size = image_size
+        self.dynamic_batch = not isinstance(batch, int)
+        self.names: Dict[int, str] = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+        logging.info(f'Loaded {model_path} for {self.image_size} inputs, '
+                     f'{"dynamic" if self.dynamic_batch else "fixed"} batch, {intra_op_threads} intra-op threads')
+
+    def preprocess(self, images: List[np.ndarray]) -> Tuple[np.ndarray, List[Letterbox]]:
+        return preprocess_batch(images, self.image_size)
+
+    def run(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Returns the raw output, (N, 4 + classes, anchors), of a preprocessed batch.
+        """
+        if self.dynamic_batch or len(batch) == 1:
+            return self.session.run(None, {self.input_name: batch})[0]
+        # a graph exported for one image at a time
+        return np.concatenate([self.session.run(None, {self.input_name: batch[index:index + 1]})[0]
+                               for index in range(len(batch))])
+
+    def predict(self, images: List[np.ndarray]) -> List[Detections]:
+        batch, transforms = self.preprocess(images)
+        output = self.run(batch)
+        return [
+            decode_predictions(prediction, transform, self.conf_threshold, self.iou_threshold, self.max_detections)
+            for prediction, transform in zip(output, transforms)
+        ]
+
+
+def compare_outputs(reference: np.ndarray, candidate: np.ndarray, box_atol: float, score_atol: float) -> dict:
+    """
+    Compares two raw YOLOv8 outputs: the boxes in pixels and the class scores, which have different
+    scales, against their own absolute tolerance.
+    """
+    if reference.shape != candidate.shape:
+        return {'shape_match': False, 'reference_shape': list(reference.shape),
+                'candidate_shape': list(candidate.shape), 'passed': False}
+    box_diff = float(np.abs(reference[:, :4] - candidate[:, :4]).max()) if reference.size else 0.0
+    score_diff = float(np.abs(reference[:, 4:] - candidate[:, 4:]).max()) if reference.size else 0.0
+    return {
+        'shape_match': True,
+        'max_box_diff': box_diff,
+        'max_score_diff': score_diff,
+        'passed': box_diff <= box_atol and score_diff <= score_atol
+    }
+
+
+def box_iou(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    top_left = np.maximum(first[:, None, :2], second[None, :, :2])
+    bottom_right = np.minimum(first[:, None, 2:], second[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    first_areas = np.prod(first[:, 2:] - first[:, :2], axis=1)
+    second_areas = np.prod(second[:, 2:] - second[:, :2], axis=1)
+    return intersection / (first_areas[:, None] + second_areas[None, :] - intersection + 1e-9)
+
+
+def match_detections(reference: Detections, candidate: Detections, iou_threshold: float = 0.9) -> dict:
+    """
+    Greedily matches the candidate's detections to the reference's, by class and IoU, highest confidence first.
+    """
+    matched, ious = 0, []
+    if len(reference.xyxy) and len(candidate.xyxy):
+        iou = box_iou(reference.xyxy, candidate.xyxy)
+        iou[reference.class_id[:, None] != candidate.class_id[None, :]] = 0
+        taken = np.zeros(len(candidate.xyxy), dtype=bool)
+        for row in np.argsort(-reference.confidence):
+            scores = np.where(taken, 0, iou[row])
+            column = int(scores.argmax())
+            if scores[column] >= iou_threshold:
+                taken[column] = True
+                matched += 1
+                ious.append(float(scores[column]))
+    return {
+        'reference': len(reference.xyxy),
+        'candidate': len(candidate.xyxy),
+        'matched': matched,
+        'min_iou': min(ious) if ious else None
+    }
@@ -0,0 +1,106 @@
+import io
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image
+
+# modes that carry an alpha channel and need compositing rather than a plain convert
+_ALPHA_MODES = ('RGBA', 'LA', 'PA', 'RGBa', 'La')
+
+
+class ImagePreprocessor:
+    def __init__(self, target_size: Tuple[int, int] = (224, 224), dtype=np.float32,
+                 max_batch_size: int = 32, background: Tuple[int, int, int] = (0, 0, 0)):
+        """
+        Initialize a preprocessor that turns images into model ready (N, H, W, 3) tensors.
+
+        For float dtypes pixels are scaled to [0, 1] while being written into the output buffer, for
+        uint8 (quantized models) they are copied as is. Greyscale, palette and CMYK images are expanded
+        to RGB and images with an alpha channel are composited over `background`.
+
+        `preprocess_batch` writes into a buffer allocated once per instance and returns a view of it,
+        so an instance must not be shared between threads that batch concurrently. `preprocess`
+        allocates its own output and is safe to call from any thread.
+
+        Parameters:
+        target_size (Tuple[int, int]): The (width, height) the model expects.
+        dtype: The dtype of the output tensors, float32 or uint8.
+        max_batch_size (int): The largest batch `preprocess_batch` accepts.
+        background (Tuple[int, int, int]): The RGB colour transparent pixels are composited over.
+        """
+        self.width, self.height = target_size
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.uint8):
+            raise ValueError(f'Unsupported preprocessing dtype: {self.dtype}')
+        self.max_batch_size = max_batch_size
+        self.background = background
+        self._scale = np.float32(1.0 / 255.0)
+        self._batch_buffer = np.empty((max_batch_size, self.height, self.width, 3), dtype=self.dtype)
+
+    def decode(self, image_bytes: bytes) -> Image.Image:
+        """
+        Decodes an encoded image, letting JPEG decoding downscale by up to 8x when the image is
+        much larger than the target size.
+        """
+        image = Image.open(io.BytesIO(image_bytes))
+        if image.format == 'JPEG':
+            image.draft('RGB', (self.width, self.height))
+        return image
+
+    def to_rgb(self, image: Image.Image) -> Image.Image:
+        if image.mode == 'RGB':
+            return image
+        if image.mode == 'P' and 'transparency' in image.info:
+            image = image.convert('RGBA')
+        if image.mode in _ALPHA_MODES:
+            image = image.convert('RGBA')
+            composited = Image.new('RGB', image.size, self.background)
+            composited.paste(image, mask=image.getchannel('A'))
+            return composited
+        return image.convert('RGB')
+
+    def preprocess_into(self, image: Image.Image, out: np.ndarray) -> np.ndarray:
+        """
+        Resizes an image and writes it into `out` without intermediate float copies.
+
+        Parameters:
+        image (Image.Image): The image to preprocess, in any PIL mode.
+        out (np.ndarray): A (H, W, 3) array of the preprocessor's dtype to write into.
+
+        Returns:
+        np.ndarray: `out`, filled with the preprocessed pixels.
+        """
+        image = self.to_rgb(image)
+        if image.size != (self.width, self.height):
+            image = image.resize((self.width, self.height), Image.BICUBIC, reducing_gap=3.0)
+        pixels = np.asarray(image)
+        if self.dtype == np.uint8:
+            np.copyto(out, pixels)
+        else:
+            # the uint8 -> float32 cast happens inside the ufunc loop, no float64 temporary is created
+            np.multiply(pixels, self._scale, out=out)
+        return out
+
+    def preprocess(self, image: Image.Image) -> np.ndarray:
+        out = np.empty((1, self.height, self.width, 3), dtype=self.dtype)
+        self.preprocess_into(image, out[0])
+        return out
+
+    def preprocess_bytes(self, image_bytes: bytes) -> np.ndarray:
+        return self.preprocess(self.decode(image_bytes))
+
+    def preprocess_batch(self, images: List[Image.Image]) -> np.ndarray:
+        """
+        Preprocesses many images into the preallocated batch buffer.
+
+        Parameters:
+        images (List[Image.Image]): The images to preprocess, at most `max_batch_size`.
+
+        Returns:
+        np.ndarray: A (len(images), H, W, 3) view of the batch buffer, overwritten by the next call.
+        """
+        if len(images) > self.max_batch_size:
+            raise ValueError(f'Batch of {len(images)} images exceeds max batch size {self.max_batch_size}')
+        for index, image in enumerate(images):
+            self.preprocess_into(image, self._batch_buffer[index])
+        return self._batch_buffer[:len(images)]
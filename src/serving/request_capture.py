@@ -0,0 +1,118 @@
+import os
+import sys
+import queue
+import random
+import hashlib
+import mimetypes
+import threading
+
+from src.logger import logging
+from src.exception import AppException
+from src.entity.config_entity import RequestCaptureConfig
+
+_STOP = object()
+
+
+class RequestCaptureSink:
+    def __init__(self, request_capture_config: RequestCaptureConfig = RequestCaptureConfig()):
+        """
+        Initialize a sampled, asynchronous sink that stores uploaded images for retraining.
+
+        Sampled uploads are handed to a bounded queue and written by a background thread under a
+        content-addressed file name (sha256 of the bytes), so the request path never touches the disk
+        and identical uploads are stored once. When the queue is full the sample is dropped.
+
+        Parameters:
+        request_capture_config (RequestCaptureConfig): The configuration for the capture sink.
+        """
+        self.request_capture_config = request_capture_config
+        self.offered = 0
+        self.dropped = 0
+        self.written = 0
+        self.duplicates = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=request_capture_config.max_queue_size)
+        self._writer = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.request_capture_config.capture_rate > 0
+
+    def start(self) -> None:
+        if not self.enabled or self._writer is not None:
+            return
+        try:
+            os.makedirs(self.request_capture_config.capture_dir, exist_ok=True)
+            self._writer = threading.Thread(target=self._write_loop, name='request-capture', daemon=True)
+            self._writer.start()
+            logging.info(f'Capturing {self.request_capture_config.capture_rate:.1%} of requests '
+                         f'to {self.request_capture_config.capture_dir}')
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def stop(self) -> None:
+        if self._writer is None:
+            return
+        # block here rather than drop the sentinel, the writer drains the queue before exiting
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._writer = None
+        logging.info(f'Stopped request capture after writing {self.written} samples')
+
+    def offer(self, image_bytes: bytes, content_type: str = None) -> bool:
+        """
+        Offers an upload for capture without blocking the caller.
+
+        Parameters:
+        image_bytes (bytes): The raw bytes of the upload, stored as received without re-encoding.
+        content_type (str): The content type of the upload, used to pick the file extension.
+
+        Returns:
+        bool: True if the upload was sampled and queued for writing, else False.
+        """
+        if self._writer is None or random.random() >= self.request_capture_config.capture_rate:
+            return False
+        self.offered += 1
+        try:
+            self._queue.put_nowait((image_bytes, content_type))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def metrics(self) -> dict:
+        return {
+            'capture_rate': self.request_capture_config.capture_rate,
+            'queue_depth': self._queue.qsize(),
+            'offered': self.offered,
+            'dropped': self.dropped,
+            'written': self.written,
+            'duplicates': self.duplicates,
+            'failed': self.failed
+        }
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.failed += 1
+                logging.info(f'Failed to write captured request: {e}')
+
+    def _write(self, image_bytes: bytes, content_type: str) -> None:
+        extension = mimetypes.guess_extension(content_type or '') or '.bin'
+        file_name = hashlib.sha256(image_bytes).hexdigest() + extension
+        file_path = os.path.join(self.request_capture_config.capture_dir, file_name)
+        if os.path.exists(file_path):
+            self.duplicates += 1
+            return
+
+        # write to a temporary name first so a crash never leaves a truncated sample behind
+        temp_path = f'{file_path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(image_bytes)
+        os.replace(temp_path, file_path)
+        self.written += 1
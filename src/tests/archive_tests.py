@@ -0,0 +1,116 @@
+import io
+import os
+import zipfile
+import tempfile
+import unittest
+from pathlib import Path
+from src.entity.config_entity import DataIngestionConfig
+from src.components.data_ingestion import DataIngestion
+from src.utils.archive import StreamingZipExtractor, extract_zip_parallel, open_url_stream
+from src.tests.http_server import LocalHTTPServer
+
+MEMBERS = {
+    'data.yaml': b'names: [license plate]\n',
+    'train/images/a.jpg': os.urandom(50000),
+    'train/labels/a.txt': b'0 0.5 0.5 0.1 0.1\n' * 200,
+    'valid/images/b.jpg': b'\xff\xd8' + b'plate' * 10000
+}
+
+
+class NonSeekable(io.RawIOBase):
+    # zipfile writes data descriptors when it cannot seek back to patch the local headers
+    def __init__(self, target):
+        self.target = target
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.target.write(data)
+
+
+def write_archive(path, streamed=False):
+    with open(path, 'wb') as f:
+        target = NonSeekable(f) if streamed else f
+        with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('train/', b'')
+            for name, data in MEMBERS.items():
+                archive.writestr(name, data)
+
+
+class TestArchiveExtraction(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.temp_dir.name, 'data.zip')
+        self.destination = os.path.join(self.temp_dir.name, 'feature_store')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def assert_extracted(self):
+        for name, data in MEMBERS.items():
+            self.assertEqual(Path(self.destination, name).read_bytes(), data)
+
+    def test_streaming_extracts_and_skips_on_rerun(self):
+        for streamed in (False, True):
+            with self.subTest(data_descriptors=streamed):
+                write_archive(self.archive_path, streamed=streamed)
+                with open(self.archive_path, 'rb') as source:
+                    stats = StreamingZipExtractor(self.destination).extract(source)
+                self.assert_extracted()
+
+                with open(self.archive_path, 'rb') as source:
+                    rerun = StreamingZipExtractor(self.destination).extract(source)
+                self.assertEqual(rerun['skipped'], len(MEMBERS))
+                self.assertEqual(rerun['extracted'], 0)
+
+    def test_streaming_rejects_corrupted_member(self):
+        write_archive(self.archive_path)
+        data = bytearray(Path(self.archive_path).read_bytes())
+        # flip a byte inside the stored CRC of the first file member's local header
+        data[data.index(b'data.yaml') - 16] ^= 0xFF
+        with self.assertRaises(zipfile.BadZipFile):
+            StreamingZipExtractor(self.destination).extract(io.BytesIO(bytes(data)))
+        self.assertFalse(os.path.exists(os.path.join(self.destination, 'data.yaml')))
+
+    def test_streaming_rejects_paths_outside_destination(self):
+        with zipfile.ZipFile(self.archive_path, 'w') as archive:
+            archive.writestr('../escape.txt', b'x')
+        with open(self.archive_path, 'rb') as source, self.assertRaises(ValueError):
+            StreamingZipExtractor(self.destination).extract(source)
+
+    def test_parallel_extraction_skips_existing_members(self):
+        write_archive(self.archive_path)
+        self.assertEqual(extract_zip_parallel(self.archive_path, self.destination, workers=3)['extracted'], len(MEMBERS))
+        self.assert_extracted()
+
+        Path(self.destination, 'data.yaml').write_bytes(b'changed by hand\n')
+        stats = extract_zip_parallel(self.archive_path, self.destination, workers=3)
+
+        self.assertEqual((stats['extracted'], stats['skipped']), (1, len(MEMBERS) - 1))
+        self.assert_extracted()
+
+    def test_streaming_over_http(self):
+        write_archive(self.archive_path, streamed=True)
+        with LocalHTTPServer(self.temp_dir.name) as server, open_url_stream(server.url('data.zip')) as source:
+            StreamingZipExtractor(self.destination).extract(source)
+        self.assert_extracted()
+
+    def test_data_ingestion_stream_mode_keeps_no_archive(self):
+        write_archive(self.archive_path)
+        data_ingestion_config = DataIngestionConfig(
+            data_ingestion_dir=os.path.join(self.temp_dir.name, 'data_ingestion'),
+            feature_store_file_path=self.destination,
+            data_download_url=Path(self.archive_path).as_uri(),
+            ingestion_mode='stream'
+        )
+
+        data_ingestion_artifact = DataIngestion(data_ingestion_config).initiate_data_ingestion()
+
+        self.assertIsNone(data_ingestion_artifact.data_zip_file_path)
+        self.assertFalse(os.path.exists(data_ingestion_config.data_ingestion_dir))
+        self.assert_extracted()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import json
+import tempfile
+import unittest
+import cv2
+import numpy as np
+import supervision as sv
+from src.entity.config_entity import VideoPipelineConfig
+from src.pipeline import batch_inference_pipeline
+from src.pipeline.batch_inference_pipeline import (BatchInferencePipeline, discover_videos, plan_shards,
+                                                   process_shard, read_progress, load_detections)
+
+
+class FakeDetector:
+    def detect_batch(self, frames):
+        return [sv.Detections(xyxy=np.array([[1, 2, 11, 12]], dtype=np.float32),
+                              confidence=np.array([0.8]), class_id=np.array([0])) for _ in frames]
+
+
+def write_video(path, frames=30):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (32, 24))
+    for index in range(frames):
+        writer.write(np.full((24, 32, 3), index * 8, dtype=np.uint8))
+    writer.release()
+
+
+class TestBatchInference(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.video_dir = os.path.join(self.work_dir.name, 'videos')
+        self.output_dir = os.path.join(self.work_dir.name, 'output')
+        os.makedirs(self.video_dir)
+        os.makedirs(os.path.join(self.output_dir, 'shards'))
+        self.video_file = os.path.join(self.video_dir, 'clip.avi')
+        write_video(self.video_file)
+        batch_inference_pipeline._worker_model = FakeDetector()
+
+    def tearDown(self):
+        batch_inference_pipeline._worker_model = None
+        self.work_dir.cleanup()
+
+    def test_discover_videos_filters_by_extension(self):
+        open(os.path.join(self.video_dir, 'notes.txt'), 'w').close()
+
+        self.assertEqual(discover_videos([self.video_dir], ['.avi']), [os.path.abspath(self.video_file)])
+
+    def test_long_videos_are_split_into_segments(self):
+        shards = plan_shards(self.video_file, segment_frames=12)
+
+        self.assertEqual([(shard.start_frame, shard.end_frame) for shard in shards], [(0, 12), (12, 24), (24, 30)])
+        self.assertEqual(len({shard.shard_id for shard in shards}), 3)
+
+    def test_process_shard_writes_detection_columns(self):
+        shard = plan_shards(self.video_file, segment_frames=12)[1]
+
+        record = process_shard(shard, VideoPipelineConfig(batch_size=4), self.output_dir)
+
+        self.assertEqual(record['frames'], 12)
+        with np.load(os.path.join(self.output_dir, 'shards', f'{shard.shard_id}.npz')) as columns:
+            self.assertEqual(columns['frame_index'].tolist(), list(range(12, 24)))
+            self.assertEqual(columns['x2'].dtype, np.float32)
+
+    def test_completed_shards_are_resumed(self):
+        shards = plan_shards(self.video_file, segment_frames=12)
+        record = process_shard(shards[0], VideoPipelineConfig(), self.output_dir)
+        with open(os.path.join(self.output_dir, 'progress.jsonl'), 'w') as f:
+            f.write(json.dumps(record) + '\n')
+            f.write('{"shard_id": "trunc')
+
+        completed = read_progress(self.output_dir)
+
+        self.assertEqual(list(completed), [shards[0].shard_id])
+        self.assertEqual(load_detections(self.output_dir)['frame_index'].size, 12)
+
+    def test_report_aggregates_fps_per_worker(self):
+        report = BatchInferencePipeline._report(
+            [{'worker': 1, 'frames': 100, 'seconds': 2.0}, {'worker': 1, 'frames': 50, 'seconds': 1.0},
+             {'worker': 2, 'frames': 30, 'seconds': 3.0}],
+            wall_seconds=3.0, skipped=1
+        )
+
+        self.assertEqual(report['workers'][1]['fps'], 50.0)
+        self.assertEqual(report['workers'][2]['fps'], 10.0)
+        self.assertEqual(report['aggregate_fps'], 60.0)
+        self.assertEqual(report['shards_skipped'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+import numpy as np
+from src.entity.config_entity import BatchingConfig
+from src.exception import AppException, ServiceSaturatedError
+from src.serving.batching import Histogram, MicroBatcher
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles_use_bucket_upper_bounds(self):
+        histogram = Histogram([1, 2, 4, 8])
+        for value in [1, 1, 2, 3, 7]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.quantile(0.5), 2)
+        self.assertEqual(histogram.quantile(0.99), 8)
+
+    def test_overflow_bucket_reports_max(self):
+        histogram = Histogram([1, 2])
+        histogram.observe(10)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['buckets']['+Inf'], 1)
+        self.assertEqual(snapshot['p99'], 10)
+
+
+class TestMicroBatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.batch_sizes = []
+
+        def predict(batch):
+            self.batch_sizes.append(batch.shape[0])
+            return batch.reshape(batch.shape[0], -1).sum(axis=1, keepdims=True)
+
+        self.batcher = MicroBatcher(predict, BatchingConfig(max_batch_size=4, max_wait_ms=50))
+        await self.batcher.start()
+
+    async def asyncTearDown(self):
+        await self.batcher.stop()
+
+    async def test_concurrent_requests_are_coalesced(self):
+        tensors = [np.full((1, 2, 2), i, dtype=np.float32) for i in range(4)]
+
+        results = await asyncio.gather(*(self.batcher.submit(tensor) for tensor in tensors))
+
+        self.assertEqual(self.batch_sizes, [4])
+        for i, result in enumerate(results):
+            self.assertEqual(result.shape, (1, 1))
+            self.assertEqual(float(result[0, 0]), 4.0 * i)
+
+    async def test_batches_are_capped_at_max_batch_size(self):
+        tensors = [np.ones((1, 2, 2), dtype=np.float32) for _ in range(6)]
+
+        await asyncio.gather(*(self.batcher.submit(tensor) for tensor in tensors))
+
+        self.assertEqual(sum(self.batch_sizes), 6)
+        self.assertTrue(all(size <= 4 for size in self.batch_sizes))
+
+    async def test_single_request_is_flushed_at_deadline(self):
+        result = await asyncio.wait_for(self.batcher.submit(np.ones((1, 2, 2))), timeout=1)
+
+        self.assertEqual(self.batch_sizes, [1])
+        self.assertEqual(float(result[0, 0]), 4.0)
+        self.assertEqual(self.batcher.metrics()['batch_size']['count'], 1)
+
+    async def test_predict_failure_is_propagated_to_every_request(self):
+        def failing_predict(batch):
+            raise ValueError('model failed')
+
+        self.batcher.predict_fn = failing_predict
+
+        results = await asyncio.gather(
+            self.batcher.submit(np.ones((1, 2))), self.batcher.submit(np.ones((1, 2))),
+            return_exceptions=True
+        )
+
+        self.assertTrue(all(isinstance(result, AppException) for result in results))
+
+    async def test_async_predict_and_full_queue_backpressure(self):
+        release = asyncio.Event()
+
+        async def slow_predict(batch):
+            await release.wait()
+            return batch
+
+        batcher = MicroBatcher(slow_predict, BatchingConfig(max_batch_size=1, max_wait_ms=1, max_queue_size=1))
+        await batcher.start()
+        first = asyncio.ensure_future(batcher.submit(np.ones((1, 2))))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(batcher.submit(np.ones((1, 2))))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(ServiceSaturatedError):
+            await batcher.submit(np.ones((1, 2)))
+
+        release.set()
+        results = await asyncio.gather(first, second)
+        self.assertEqual(len(results), 2)
+        await batcher.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
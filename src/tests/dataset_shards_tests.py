@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.utils.shards import ShardWriter, ShardReader, label_path_for, read_yolo_labels
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.images = [rng.integers(0, 255, (20 + index, 30, 3), dtype=np.uint8) for index in range(7)]
+        self.labels = [np.full((index % 3, 5), index, dtype=np.float32) for index in range(7)]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, max_shard_bytes):
+        with ShardWriter(self.temp_dir.name, max_shard_bytes=max_shard_bytes) as writer:
+            for index, (image, labels) in enumerate(zip(self.images, self.labels)):
+                writer.add(f'{index}.jpg', image, labels)
+        return writer
+
+    def test_round_trip_across_shards(self):
+        writer = self.write(max_shard_bytes=5000)
+        reader = ShardReader(self.temp_dir.name)
+
+        self.assertGreater(len(writer.shards), 1)
+        self.assertEqual(len(reader), 7)
+        self.assertEqual(reader.names, [f'{index}.jpg' for index in range(7)])
+        for index in [0, 3, 6, -1]:
+            image, labels = reader[index]
+            np.testing.assert_array_equal(image, self.images[index])
+            np.testing.assert_array_equal(labels, self.labels[index])
+        for (image, labels), expected in zip(reader, self.images):
+            np.testing.assert_array_equal(image, expected)
+        with self.assertRaises(IndexError):
+            reader[7]
+
+    def test_samples_are_read_only_views_of_the_mapped_file(self):
+        self.write(max_shard_bytes=1 << 20)
+        reader = ShardReader(self.temp_dir.name)
+
+        image, _ = reader[2]
+
+        self.assertIsInstance(image.base, np.memmap)
+        self.assertFalse(image.flags.writeable)
+
+    def test_yolo_label_lookup(self):
+        images_dir = os.path.join(self.temp_dir.name, 'train', 'images')
+        labels_dir = os.path.join(self.temp_dir.name, 'train', 'labels')
+        os.makedirs(images_dir)
+        os.makedirs(labels_dir)
+        with open(os.path.join(labels_dir, 'car.txt'), 'w') as f:
+            f.write('0 0.5 0.5 0.2 0.1\n\n1 0.1 0.2 0.3 0.4\n')
+
+        label_path = label_path_for(os.path.join(images_dir, 'car.jpg'))
+
+        self.assertEqual(label_path, os.path.join(labels_dir, 'car.txt'))
+        self.assertEqual(read_yolo_labels(label_path).shape, (2, 5))
+        self.assertEqual(read_yolo_labels(os.path.join(labels_dir, 'missing.txt')).shape, (0, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import os
+import json
+import tempfile
+import unittest
+import cv2
+import numpy as np
+from pathlib import Path
+from src.entity.config_entity import DataValidationConfig
+from src.entity.artifacts_entity import DataIngestionArtifact
+from src.components.data_validation import DataValidation
+from src.components.dataset_validator import DatasetValidator, check_image_header, check_label_file
+from src.utils.image_integrity import find_duplicates, read_image_size, wilson_upper_bound
+
+REQUIRED_FILES = ['train', 'valid', 'data.yaml']
+IMAGE_EXTENSIONS = ['.jpg', '.png']
+
+
+def write_split(root, split, count, seed=None):
+    # with a seed every image is a different smooth picture, without one all images are the same noise
+    os.makedirs(os.path.join(root, split, 'images'), exist_ok=True)
+    os.makedirs(os.path.join(root, split, 'labels'), exist_ok=True)
+    rng = np.random.default_rng(seed or 0)
+    image = rng.integers(0, 255, (32, 48, 3), dtype=np.uint8)
+    for index in range(count):
+        if seed is not None:
+            image = cv2.resize(rng.integers(0, 255, (8, 12, 3), dtype=np.uint8), (384, 256))
+        cv2.imwrite(os.path.join(root, split, 'images', f'{index}.jpg'), image)
+        Path(root, split, 'labels', f'{index}.txt').write_text('0 0.5 0.5 0.2 0.1\n')
+
+
+class TestDatasetValidator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        write_split(self.root, 'train', 20)
+        write_split(self.root, 'valid', 5)
+        Path(self.root, 'data.yaml').write_text('nc: 1\nnames: [license plate]\n')
+        self.validator = DatasetValidator(REQUIRED_FILES, IMAGE_EXTENSIONS, workers=4)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_valid_dataset(self):
+        report = self.validator.validate(self.root)
+
+        self.assertTrue(report['required_files_present'])
+        self.assertTrue(report['data_valid'])
+        self.assertEqual(report['files_checked'], 50)
+        self.assertEqual(report['splits']['train']['images'], 20)
+        self.assertEqual(report['errors'], [])
+
+    def test_problems_are_reported(self):
+        truncated = Path(self.root, 'train', 'images', '0.jpg')
+        truncated.write_bytes(truncated.read_bytes()[:200])
+        Path(self.root, 'train', 'labels', '1.txt').write_text('0 0.5 0.5 1.2 0.1\n')
+        Path(self.root, 'train', 'labels', 'orphan.txt').write_text('0 0.5 0.5 0.2 0.1\n')
+        os.remove(os.path.join(self.root, 'train', 'labels', '2.txt'))
+
+        report = self.validator.validate(self.root)
+
+        self.assertTrue(report['required_files_present'])
+        self.assertFalse(report['data_valid'])
+        self.assertEqual(sorted(error['check'] for error in report['errors']),
+                         ['image_header', 'label_format', 'pairing'])
+        self.assertEqual(report['splits']['train']['unlabeled_images'], 1)
+
+    def test_missing_split(self):
+        Path(self.root, 'valid').rename(Path(self.root, 'validation'))
+
+        report = self.validator.validate(self.root)
+
+        self.assertFalse(report['required_files_present'])
+        self.assertEqual(report['required_files'], {'train': True, 'valid': False, 'data.yaml': True})
+        self.assertFalse(report['data_valid'])
+
+    def test_file_checks(self):
+        png_path = os.path.join(self.root, 'image.png')
+        cv2.imwrite(png_path, np.zeros((4, 4, 3), dtype=np.uint8))
+        label_path = os.path.join(self.root, 'label.txt')
+        Path(label_path).write_text('0 0.1 0.1 0.2 0.2 0.3 0.1\n\n')
+
+        self.assertIsNone(check_image_header(png_path))
+        self.assertIsNone(check_label_file(label_path))
+        Path(png_path).write_bytes(b'not an image')
+        Path(label_path).write_text('plate 0.5 0.5 0.2 0.1\n')
+        self.assertEqual(check_image_header(png_path), 'unknown image signature')
+        self.assertIn('line 1', check_label_file(label_path))
+
+    def test_data_validation_writes_one_report(self):
+        validation_dir = os.path.join(self.root, 'artifacts')
+        data_validation_config = DataValidationConfig(
+            valid_status_file_dir=os.path.join(validation_dir, 'status.txt'),
+            report_file_path=os.path.join(validation_dir, 'report.json'),
+            cache_file_path=os.path.join(validation_dir, 'inspection_cache.json')
+        )
+        data_ingestion_artifact = DataIngestionArtifact(data_zip_file_path=None, feature_store_path=self.root)
+        data_validation = DataValidation(data_ingestion_artifact, data_validation_config)
+
+        self.assertTrue(data_validation.validate_all_files())
+        self.assertTrue(data_validation.validate_data_within_files())
+
+        with open(data_validation_config.report_file_path) as f:
+            self.assertTrue(json.load(f)['data_valid'])
+        self.assertEqual(Path(data_validation_config.valid_status_file_dir).read_text(), 'Validation Status: True')
+
+
+
+class TestDeepInspection(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, 'dataset')
+        write_split(self.root, 'train', 12, seed=1)
+        write_split(self.root, 'valid', 4, seed=2)
+        Path(self.root, 'data.yaml').write_text('nc: 1\nnames: [license plate]\n')
+        self.cache_path = os.path.join(self.temp_dir.name, 'inspection_cache.json')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def validator(self, **kwargs):
+        return DatasetValidator(REQUIRED_FILES, IMAGE_EXTENSIONS, workers=4, deep_check='header',
+                                find_duplicates=True, cache_path=self.cache_path, **kwargs)
+
+    def test_labels_are_checked_against_the_image_and_classes(self):
+        Path(self.root, 'train', 'labels', '0.txt').write_text('1 0.5 0.5 0.2 0.1\n')
+        Path(self.root, 'train', 'labels', '1.txt').write_text('0 0.95 0.5 0.2 0.1\n')
+        Path(self.root, 'train', 'labels', '2.txt').write_text('0 0.5 0.5 0.004 0.1\n')
+
+        report = self.validator().validate(self.root)
+
+        self.assertFalse(report['data_valid'])
+        self.assertEqual([error['check'] for error in report['errors']], ['label_class'])
+        self.assertEqual(sorted(warning['check'] for warning in report['warnings']), ['label_bounds', 'label_box_size'])
+        self.assertEqual(report['deep']['failures'], 1)
+        self.assertEqual(report['duplicates']['group_count'], 0)
+
+    def test_small_and_out_of_frame_boxes_are_warnings(self):
+        Path(self.root, 'train', 'labels', '0.txt').write_text('0 0.5 0.5 0.004 0.1\n')
+        Path(self.root, 'train', 'labels', '1.txt').write_text('0 0.95 0.5 0.2 0.1\n')
+
+        report = self.validator().validate(self.root)
+
+        self.assertTrue(report['data_valid'])
+        self.assertEqual(report['errors'], [])
+        self.assertEqual(report['warning_count'], 2)
+
+    def test_duplicates_across_splits(self):
+        source = Path(self.root, 'train', 'images', '3.jpg')
+        image = cv2.imread(str(source))
+        # the same picture, re-encoded at a different size and quality
+        cv2.imwrite(os.path.join(self.root, 'valid', 'images', 'copy.jpg'), cv2.resize(image, (192, 128)),
+                    [cv2.IMWRITE_JPEG_QUALITY, 60])
+
+        report = self.validator().validate(self.root)
+
+        self.assertEqual(report['duplicates']['groups'], [[os.path.join('train', 'images', '3.jpg'),
+                                                           os.path.join('valid', 'images', 'copy.jpg')]])
+        self.assertEqual(report['duplicates']['cross_split_groups'], 1)
+
+    def test_unchanged_images_come_from_the_cache(self):
+        first = self.validator().validate(self.root)
+        cv2.imwrite(os.path.join(self.root, 'train', 'images', '5.jpg'), np.zeros((40, 40, 3), dtype=np.uint8))
+
+        second = self.validator().validate(self.root)
+
+        self.assertEqual(first['deep']['from_cache'], 0)
+        self.assertEqual(second['deep']['from_cache'], 15)
+        self.assertEqual(second['deep']['images_checked'], 16)
+
+    def test_sampling(self):
+        report = self.validator(sample_size=3).validate(self.root)
+
+        self.assertTrue(report['deep']['sampled'])
+        self.assertEqual(report['deep']['images_checked'], 6)
+        self.assertGreater(report['deep']['failure_rate_upper_95'], 0.3)
+        self.assertLess(wilson_upper_bound(0, 1000), 0.004)
+
+    def test_helpers(self):
+        png = cv2.imencode('.png', np.zeros((7, 9, 3), dtype=np.uint8))[1].tobytes()
+        jpeg = cv2.imencode('.jpg', np.zeros((7, 9, 3), dtype=np.uint8))[1].tobytes()
+
+        self.assertEqual(read_image_size(png), (9, 7))
+        self.assertEqual(read_image_size(jpeg), (9, 7))
+        self.assertEqual(find_duplicates({'a': '00000000000000ff', 'b': '00000000000000fe', 'c': 'ff00000000000000'}),
+                         [['a', 'b']])
+
+
+if __name__ == '__main__':
+    unittest.main()
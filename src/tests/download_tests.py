@@ -0,0 +1,118 @@
+import os
+import hashlib
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+from src.exception import DownloadError
+from src.utils.download import DownloadManager
+from src.tests.http_server import LocalHTTPServer
+
+
+class TestDownloadManager(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.served_dir = os.path.join(self.temp_dir.name, 'served')
+        os.makedirs(self.served_dir)
+        self.data = os.urandom(300000)
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+        Path(self.served_dir, 'data.zip').write_bytes(self.data)
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def manager(self, **kwargs):
+        kwargs.setdefault('chunk_size', 64 * 1024)
+        return DownloadManager(self.cache_dir, **kwargs)
+
+    def test_chunked_download_then_cache_hit(self):
+        with LocalHTTPServer(self.served_dir) as server:
+            path = self.manager(workers=3).download(server.url('data.zip'), self.sha256)
+            ranges = [request[2] for request in server.requests if request[0] == 'GET']
+            request_count = len(server.requests)
+
+            again = self.manager().download(server.url('data.zip'))
+
+        self.assertEqual(Path(path).read_bytes(), self.data)
+        self.assertEqual(path, os.path.join(self.cache_dir, 'blobs', self.sha256))
+        self.assertEqual(len(ranges), 5)
+        self.assertTrue(all(ranges))
+        self.assertEqual(again, path)
+        self.assertEqual(len(server.requests), request_count)
+
+    def test_sha256_mismatch_is_rejected(self):
+        with LocalHTTPServer(self.served_dir) as server, self.assertRaises(DownloadError):
+            self.manager().download(server.url('data.zip'), '0' * 64)
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, 'blobs', self.sha256)))
+
+    def test_interrupted_download_resumes(self):
+        with LocalHTTPServer(self.served_dir) as server:
+            server.fail_after_bytes = 100000
+            with self.assertRaises(DownloadError):
+                self.manager(chunk_size=1 << 20, retries=1).download(server.url('data.zip'))
+            server.fail_after_bytes = None
+
+            path = self.manager(chunk_size=1 << 20).download(server.url('data.zip'))
+
+        self.assertEqual(Path(path).read_bytes(), self.data)
+        # the second attempt only asked for the bytes the first one did not get
+        self.assertRegex(server.requests[-1][2], r'bytes=[1-9]\d*-')
+
+    def test_short_sequential_download_keeps_its_resume_state(self):
+        download_sequential = DownloadManager._download_sequential
+
+        def short_read(manager, url, part_path, *args):
+            # the connection closes cleanly part way through the body
+            download_sequential(manager, url, part_path, *args)
+            os.truncate(part_path, 100000)
+
+        with LocalHTTPServer(self.served_dir) as server:
+            with patch.object(DownloadManager, '_download_sequential', short_read), self.assertRaises(DownloadError):
+                self.manager(chunk_size=1 << 20).download(server.url('data.zip'))
+
+            path = self.manager(chunk_size=1 << 20).download(server.url('data.zip'))
+
+        self.assertEqual(Path(path).read_bytes(), self.data)
+        self.assertEqual(server.requests[-1][2], 'bytes=100000-')
+        self.assertFalse([name for name in os.listdir(os.path.join(self.cache_dir, 'partial')) if name.endswith('.json')])
+
+    def test_resume_restarts_when_the_file_changed_on_the_server(self):
+        with LocalHTTPServer(self.served_dir) as server:
+            server.fail_after_bytes = 100000
+            with self.assertRaises(DownloadError):
+                self.manager(chunk_size=1 << 20, retries=1).download(server.url('data.zip'))
+            server.fail_after_bytes = None
+            # same size, different content and ETag
+            changed = os.urandom(len(self.data))
+            served_path = os.path.join(self.served_dir, 'data.zip')
+            Path(served_path).write_bytes(changed)
+            os.utime(served_path, ns=(1, 1))
+
+            path = self.manager(chunk_size=1 << 20).download(server.url('data.zip'))
+
+        self.assertEqual(Path(path).read_bytes(), changed)
+        self.assertIsNone(server.requests[-1][2])
+
+    def test_concurrent_downloads_of_a_url_fetch_it_once(self):
+        with LocalHTTPServer(self.served_dir) as server:
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                paths = list(pool.map(lambda _: self.manager(workers=2).download(server.url('data.zip')), range(3)))
+
+        self.assertEqual(set(paths), {os.path.join(self.cache_dir, 'blobs', self.sha256)})
+        self.assertEqual(Path(paths[0]).read_bytes(), self.data)
+        self.assertEqual(len([request for request in server.requests if request[0] == 'HEAD']), 1)
+
+    def test_server_without_ranges_and_destination(self):
+        destination = os.path.join(self.temp_dir.name, 'data_ingestion', 'data.zip')
+        with LocalHTTPServer(self.served_dir, accept_ranges=False) as server:
+            path = self.manager().download(server.url('data.zip'), destination=destination)
+
+        self.assertEqual(path, destination)
+        self.assertEqual(Path(destination).read_bytes(), self.data)
+        self.assertEqual([request[2] for request in server.requests], [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
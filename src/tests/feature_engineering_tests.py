@@ -1,11 +1,15 @@
 import os
+import tempfile
 import unittest
+import cv2
+import numpy as np
 from unittest.mock import patch
 from src.exception import AppException
 from src.logger import logging
 from src.entity.config_entity import FeatureEngineeringConfig
 from src.entity.artifacts_entity import DataValidationArtifact, FeatureEngineeringArtifact
 from src.components.feaature_engineering import FeatureEngineering
+from src.utils.shards import ShardReader
 
 class TestFeatureEngineering(unittest.TestCase):
     @patch('os.path.exists')
@@ -140,7 +144,157 @@ class TestFeatureEngineering(unittest.TestCase):
         logging_error = logging.error.call_args_list[0][0][0]
         self.assertEqual(logging_error, 'Error occurred during feature engineering: Error creating directory')
 
-    
+
+
+def write_images(data_path, count=10):
+    os.makedirs(data_path)
+    rng = np.random.default_rng(0)
+    for index in range(count):
+        cv2.imwrite(os.path.join(data_path, f'{index:03d}.png'), rng.integers(0, 255, (60, 80, 3), dtype=np.uint8))
+    with open(os.path.join(data_path, 'labels.txt'), 'w') as f:
+        f.write('not an image')
+
+
+class TestParallelFeatureEngineering(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.temp_dir.name, 'valid')
+        write_images(self.data_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_feature_engineering(self, workers, output_name):
+        feature_engineering_config = FeatureEngineeringConfig(feature_params={'width': 32, 'height': 24},
+                                                              workers=workers, chunk_size=3)
+        feature_engineering_config.transformed_data_dir = os.path.join(self.temp_dir.name, output_name)
+        data_validation_artifact = DataValidationArtifact(validation_status=True, data_status=True,
+                                                          vaildated_data_path=self.data_path)
+        return FeatureEngineering(feature_engineering_config, data_validation_artifact).initiate_feature_engineering()
+
+    def test_parallel_output_matches_float_round_trip(self):
+        feature_engineering_artifact = self.run_feature_engineering(workers=2, output_name='parallel')
+
+        self.assertEqual(feature_engineering_artifact.report['images'], 10)
+        self.assertGreater(feature_engineering_artifact.report['images_per_sec'], 0)
+        self.assertEqual(sorted(os.listdir(feature_engineering_artifact.transformed_data_path)),
+                         [f'{index:03d}.png' for index in range(10)] + ['manifest.json'])
+        for index in range(10):
+            img = cv2.imread(os.path.join(self.data_path, f'{index:03d}.png'))
+            # what the float64 normalize / denormalize round trip used to write
+            expected = np.clip(np.round(cv2.resize(img, (32, 24)) / 255.0 * 255), 0, 255).astype(np.uint8)
+            written = cv2.imread(os.path.join(feature_engineering_artifact.transformed_data_path, f'{index:03d}.png'))
+            np.testing.assert_array_equal(written, expected)
+
+    def test_serial_and_parallel_outputs_match(self):
+        serial = self.run_feature_engineering(workers=1, output_name='serial').transformed_data_path
+        parallel = self.run_feature_engineering(workers=3, output_name='parallel').transformed_data_path
+
+        for file_name in os.listdir(serial):
+            if file_name == 'manifest.json':
+                continue
+            np.testing.assert_array_equal(cv2.imread(os.path.join(serial, file_name)),
+                                          cv2.imread(os.path.join(parallel, file_name)))
+
+
+class TestFeatureEngineeringCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.temp_dir.name, 'valid')
+        write_images(self.data_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_cached(self, feature_params=None):
+        feature_engineering_config = FeatureEngineeringConfig(feature_params=feature_params or {'width': 32, 'height': 24},
+                                                              workers=1)
+        feature_engineering_config.transformed_data_dir = os.path.join(self.temp_dir.name, 'cached')
+        data_validation_artifact = DataValidationArtifact(validation_status=True, data_status=True,
+                                                          vaildated_data_path=self.data_path)
+        return FeatureEngineering(feature_engineering_config, data_validation_artifact).initiate_feature_engineering().report
+
+    def test_unchanged_dataset_is_not_transformed_again(self):
+        self.assertEqual(self.run_cached()['transformed'], 10)
+
+        report = self.run_cached()
+
+        self.assertEqual((report['transformed'], report['cached']), (0, 10))
+
+    def test_only_changed_and_touched_images_are_checked(self):
+        self.run_cached()
+        changed = os.path.join(self.data_path, '001.png')
+        cv2.imwrite(changed, np.zeros((60, 80, 3), dtype=np.uint8))
+        touched = os.path.join(self.data_path, '002.png')
+        os.utime(touched, ns=(1, 1))
+
+        report = self.run_cached()
+
+        # the touched image has the same content, so only the changed one is transformed
+        self.assertEqual(report['transformed'], 1)
+        written = cv2.imread(os.path.join(self.temp_dir.name, 'cached', '001.png'))
+        self.assertEqual(int(written.max()), 0)
+
+    def test_orphaned_outputs_are_removed(self):
+        self.run_cached()
+        os.remove(os.path.join(self.data_path, '003.png'))
+
+        report = self.run_cached()
+
+        self.assertEqual(report['orphans_removed'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, 'cached', '003.png')))
+
+    def test_changed_parameters_rebuild_everything(self):
+        self.run_cached()
+
+        self.assertEqual(self.run_cached({'width': 16, 'height': 16})['transformed'], 10)
+
+
+class TestFeatureEngineeringShards(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.temp_dir.name, 'valid', 'images')
+        write_images(self.data_path, count=6)
+        labels_dir = os.path.join(self.temp_dir.name, 'valid', 'labels')
+        os.makedirs(labels_dir)
+        for index in range(0, 6, 2):
+            with open(os.path.join(labels_dir, f'{index:03d}.txt'), 'w') as f:
+                f.write(f'0 0.5 0.5 0.{index + 1} 0.1\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_shards(self, workers=1):
+        # 32 x 24 x 3 bytes per image, so two images per shard
+        feature_engineering_config = FeatureEngineeringConfig(feature_params={'width': 32, 'height': 24},
+                                                              workers=workers, output_format='shards',
+                                                              shard_size_mb=2 * 32 * 24 * 3 / (1024 * 1024))
+        feature_engineering_config.transformed_data_dir = os.path.join(self.temp_dir.name, 'shards')
+        data_validation_artifact = DataValidationArtifact(validation_status=True, data_status=True,
+                                                          vaildated_data_path=self.data_path)
+        return FeatureEngineering(feature_engineering_config, data_validation_artifact).initiate_feature_engineering()
+
+    def test_shards_hold_images_and_labels(self):
+        feature_engineering_artifact = self.run_shards(workers=2)
+        reader = ShardReader(feature_engineering_artifact.transformed_data_path)
+
+        self.assertEqual(reader.stats()['shards'], 3)
+        self.assertEqual(reader.names, [f'{index:03d}.png' for index in range(6)])
+        image, labels = reader[2]
+        expected = cv2.resize(cv2.imread(os.path.join(self.data_path, '002.png')), (32, 24))
+        np.testing.assert_array_equal(image, expected)
+        self.assertAlmostEqual(float(labels[0, 3]), 0.3, places=5)
+        self.assertEqual(len(reader[1][1]), 0)
+
+    def test_unchanged_dataset_keeps_its_shards(self):
+        self.run_shards()
+        self.assertEqual(self.run_shards().report['transformed'], 0)
+
+        with open(os.path.join(self.temp_dir.name, 'valid', 'labels', '004.txt'), 'w') as f:
+            f.write('0 0.5 0.5 0.9 0.1\n')
+
+        self.assertEqual(self.run_shards().report['transformed'], 6)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,100 @@
+import os
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    # set per server through LocalHTTPServer
+    directory = '.'
+    accept_ranges = True
+    fail_after_bytes = None
+    requests = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _file(self):
+        path = os.path.join(self.directory, self.path.lstrip('/').split('?')[0])
+        return path if os.path.isfile(path) else None
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        self.requests.append((self.command, self.path, self.headers.get('Range')))
+        path = self._file()
+        if path is None:
+            self.send_error(404)
+            return
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+        partial = self.accept_ranges and match is not None
+        if partial:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.end_headers()
+                return
+        self.send_response(206 if partial else 200)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('ETag', f'"{os.stat(path).st_mtime_ns}-{size}"')
+        if self.accept_ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if partial:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if not send_body:
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start + 1)
+        if self.fail_after_bytes is not None:
+            # simulate a dropped connection part way through the body
+            self.wfile.write(data[:self.fail_after_bytes])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(data)
+
+
+class LocalHTTPServer:
+    def __init__(self, directory: str, accept_ranges: bool = True):
+        """
+        Serves a directory on 127.0.0.1 from a background thread, with HEAD and single Range requests,
+        so download and ingestion code can be tested offline. Set `fail_after_bytes` to cut every
+        response short and `accept_ranges` to False to act like a server without range support.
+        """
+        self.requests = []
+        handler = type('Handler', (RangeRequestHandler,), {
+            'directory': directory, 'accept_ranges': accept_ranges, 'requests': self.requests
+        })
+        self.handler = handler
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def fail_after_bytes(self):
+        return self.handler.fail_after_bytes
+
+    @fail_after_bytes.setter
+    def fail_after_bytes(self, value):
+        self.handler.fail_after_bytes = value
+
+    def url(self, file_name: str) -> str:
+        return f'http://127.0.0.1:{self.server.server_address[1]}/{file_name}'
+
+    def __enter__(self) -> 'LocalHTTPServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.server.shutdown()
+        self.server.server_close()
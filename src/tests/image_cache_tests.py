@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+import cv2
+import numpy as np
+from src.utils.image_cache import DecodedImageCache
+from src.training.cached_dataset import CachedImageLoader
+
+
+class FakeYOLODataset:
+    # the attributes and load_image of an ultralytics BaseDataset the cache relies on
+    max_buffer_length = 2
+
+    def __init__(self, im_files, augment=True):
+        self.im_files = im_files
+        self.augment = augment
+        self.ims = [None] * len(im_files)
+        self.im_hw0 = [None] * len(im_files)
+        self.im_hw = [None] * len(im_files)
+        self.buffer = []
+        self.decoded = 0
+
+    def load_image(self, i, rect_mode=True):
+        if self.ims[i] is not None:
+            return self.ims[i], self.im_hw0[i], self.im_hw[i]
+        self.decoded += 1
+        image = cv2.imread(self.im_files[i])
+        resized = cv2.resize(image, (16, 8))
+        if self.augment:
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = resized, image.shape[:2], resized.shape[:2]
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                j = self.buffer.pop(0)
+                self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+        return resized, image.shape[:2], resized.shape[:2]
+
+
+class TestDecodedImageCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.image_paths = []
+        for index in range(4):
+            image_path = os.path.join(self.temp_dir.name, f'{index}.png')
+            cv2.imwrite(image_path, np.full((20, 30, 3), index * 50, dtype=np.uint8))
+            self.image_paths.append(image_path)
+        self.disk_dir = os.path.join(self.temp_dir.name, 'cache')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        image_bytes = 20 * 30 * 3
+        cache = DecodedImageCache(memory_budget_bytes=2 * image_bytes)
+
+        cache.get(self.image_paths[0])
+        cache.get(self.image_paths[1])
+        cache.get(self.image_paths[0])
+        cache.get(self.image_paths[2])
+        image, info = cache.get(self.image_paths[0])
+
+        stats = cache.stats()
+        self.assertEqual((stats['memory_hits'], stats['misses'], stats['evictions']), (2, 3, 1))
+        self.assertEqual((stats['entries'], stats['memory_bytes']), (2, 2 * image_bytes))
+        self.assertEqual(info, {'height': 20, 'width': 30})
+        self.assertFalse(image.flags.writeable)
+
+    def test_disk_tier_outlives_the_process_and_follows_edits(self):
+        DecodedImageCache(memory_budget_bytes=0, disk_dir=self.disk_dir).get(self.image_paths[1])
+        cache = DecodedImageCache(memory_budget_bytes=1 << 20, disk_dir=self.disk_dir)
+
+        image, _ = cache.get(self.image_paths[1], decode=self.fail)
+        cv2.imwrite(self.image_paths[1], np.zeros((10, 10, 3), dtype=np.uint8))
+        edited, _ = cache.get(self.image_paths[1])
+        other_params = DecodedImageCache(memory_budget_bytes=0, disk_dir=self.disk_dir, params={'imgsz': 320})
+        other_params.get(self.image_paths[1])
+
+        self.assertTrue(np.all(image == 50))
+        # shared with the other processes through the page cache, not copied into this one's memory tier
+        self.assertIsInstance(image, np.memmap)
+        self.assertFalse(image.flags.writeable)
+        self.assertEqual(edited.shape, (10, 10, 3))
+        self.assertEqual((cache.stats()['disk_hits'], cache.stats()['misses']), (1, 1))
+        self.assertEqual(other_params.stats()['misses'], 1)
+
+    def test_state_sent_to_spawned_workers_leaves_the_memory_tier_behind(self):
+        cache = DecodedImageCache(memory_budget_bytes=1 << 20)
+        cache.get(self.image_paths[0])
+
+        worker_cache = DecodedImageCache.__new__(DecodedImageCache)
+        worker_cache.__setstate__(cache.__getstate__())
+        self.assertEqual((worker_cache.stats()['entries'], worker_cache.memory_bytes), (0, 0))
+        worker_cache.get(self.image_paths[0])
+
+        self.assertEqual(cache.stats()['entries'], 1)
+        # the counters are shared
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_dataset_images_are_decoded_once(self):
+        dataset = FakeYOLODataset(self.image_paths)
+        dataset.load_image = CachedImageLoader(dataset, DecodedImageCache(memory_budget_bytes=1 << 20))
+
+        for _ in range(3):
+            epoch = [dataset.load_image(i) for i in range(len(self.image_paths))]
+
+        self.assertEqual(dataset.decoded, len(self.image_paths))
+        image, original_shape, resized_shape = epoch[3]
+        self.assertEqual((original_shape, resized_shape), ((20, 30), (8, 16)))
+        self.assertTrue(image.flags.writeable)
+        # the mosaic buffer holds the most recently loaded images, as without the cache
+        self.assertEqual(dataset.buffer, [3])
+        self.assertIs(dataset.ims[3], image)
+        self.assertIsNone(dataset.ims[0])
+
+    @staticmethod
+    def fail(image_path):
+        raise AssertionError(f'{image_path} was decoded again')
+
+
+if __name__ == '__main__':
+    unittest.main()
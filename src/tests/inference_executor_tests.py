@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import unittest
+from src.exception import ServiceSaturatedError
+from src.entity.config_entity import InferenceExecutorConfig
+from src.serving.inference_executor import InferenceExecutor
+
+
+def load_dummy_model(model_path):
+    return {'path': model_path, 'thread': threading.get_ident()}
+
+
+def model_path_of(model, suffix):
+    return model['path'] + suffix
+
+
+def block_on(event):
+    event.wait(timeout=5)
+    return threading.get_ident()
+
+
+class TestInferenceExecutor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.inference_executor = InferenceExecutor(
+            load_dummy_model, 'model.h5',
+            InferenceExecutorConfig(executor_type='thread', max_workers=2, max_queue_depth=2)
+        )
+        self.inference_executor.start()
+
+    def tearDown(self):
+        self.inference_executor.shutdown()
+
+    async def test_run_passes_worker_model(self):
+        result = await self.inference_executor.run(model_path_of, '#v1', uses_model=True)
+
+        self.assertEqual(result, 'model.h5#v1')
+
+    async def test_work_runs_off_the_event_loop_thread(self):
+        event = threading.Event()
+        event.set()
+
+        worker_thread = await self.inference_executor.run(block_on, event)
+
+        self.assertNotEqual(worker_thread, threading.get_ident())
+
+    async def test_rejects_when_queue_depth_is_exceeded(self):
+        event = threading.Event()
+        running = [asyncio.ensure_future(self.inference_executor.run(block_on, event)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with self.assertRaises(ServiceSaturatedError):
+            await self.inference_executor.run(block_on, event)
+
+        event.set()
+        await asyncio.gather(*running)
+        self.assertEqual(self.inference_executor.metrics()['rejected'], 1)
+        self.assertEqual(self.inference_executor.in_flight, 0)
+
+    async def test_run_before_start_raises(self):
+        self.inference_executor.shutdown()
+
+        with self.assertRaises(RuntimeError):
+            await self.inference_executor.run(block_on, threading.Event())
+
+
+if __name__ == '__main__':
+    unittest.main()
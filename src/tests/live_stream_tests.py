@@ -0,0 +1,91 @@
+import os
+import asyncio
+import tempfile
+import threading
+import unittest
+import cv2
+import numpy as np
+from src.entity.config_entity import LiveStreamConfig
+from src.serving.live_stream import FrameBroadcast, LiveStreamHub
+
+
+def write_video(path, frames=200, size=(64, 48)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, size)
+    for index in range(frames):
+        frame = np.full((size[1], size[0], 3), index % 255, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+class TestFrameBroadcast(unittest.TestCase):
+    def test_slow_reader_skips_to_latest_frame(self):
+        broadcast = FrameBroadcast()
+        for index in range(5):
+            broadcast.publish(bytes([index]))
+
+        sequence, frame = asyncio.run(broadcast.wait_newer(0, timeout=1.0))
+
+        self.assertEqual(sequence, 5)
+        self.assertEqual(frame, bytes([4]))
+
+    def test_wait_newer_wakes_on_publish_from_another_thread(self):
+        broadcast = FrameBroadcast()
+
+        async def wait():
+            threading.Timer(0.05, broadcast.publish, args=(b'frame',)).start()
+            return await broadcast.wait_newer(0, timeout=2.0)
+
+        self.assertEqual(asyncio.run(wait()), (1, b'frame'))
+        self.assertIsNone(asyncio.run(broadcast.wait_newer(1, timeout=0.05)))
+
+
+class TestLiveStreamHub(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.video_file = os.path.join(self.temp_dir.name, 'clip.avi')
+        write_video(self.video_file)
+        self.processors_built = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def processor_factory(self, mode):
+        self.processors_built.append(mode)
+        return lambda frame: frame
+
+    def test_clients_share_one_worker(self):
+        hub = LiveStreamHub(self.processor_factory, LiveStreamConfig(idle_timeout_s=0.05))
+
+        async def read(count):
+            chunks = []
+            async for chunk in hub.stream(self.video_file, 'full'):
+                chunks.append(chunk)
+                if len(chunks) == count:
+                    break
+            return chunks
+
+        async def two_clients():
+            return await asyncio.gather(read(3), read(3))
+
+        try:
+            first, second = asyncio.run(two_clients())
+        finally:
+            hub.shutdown()
+
+        self.assertEqual(self.processors_built, ['full'])
+        for chunk in first + second:
+            self.assertTrue(chunk.startswith(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n\xff\xd8'))
+
+    def test_idle_worker_is_stopped(self):
+        hub = LiveStreamHub(self.processor_factory, LiveStreamConfig(idle_timeout_s=0.05))
+        worker = hub.acquire(self.video_file, 'full')
+        hub.release(self.video_file, 'full')
+        threading.Event().wait(0.3)
+
+        self.assertEqual(hub.metrics(), {})
+        self.assertFalse(worker.alive)
+        hub.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.components.model_evaluation import ModelEvaluation, match_predictions, mean_average_precision
+from src.components.model_quantizer import (CalibrationImages, accuracy_gate, calibration_sample,
+                                            detect_head_exclusions)
+from src.entity.config_entity import ModelEvaluationConfig
+from src.serving.onnx_detector import Detections
+
+
+def detections(boxes, confidence, class_id=None):
+    return Detections(xyxy=np.asarray(boxes, dtype=np.float32).reshape(-1, 4),
+                      confidence=np.asarray(confidence, dtype=np.float32),
+                      class_id=np.asarray(class_id if class_id is not None else [0] * len(confidence), dtype=np.int64))
+
+
+def evaluate(predicted, boxes, classes):
+    correct = match_predictions(predicted, np.asarray(boxes, dtype=np.float32), np.asarray(classes))
+    return mean_average_precision(correct, predicted.confidence, predicted.class_id, np.asarray(classes))
+
+
+def write_split(dataset_dir, split, count):
+    os.makedirs(os.path.join(dataset_dir, split, 'images'))
+    os.makedirs(os.path.join(dataset_dir, split, 'labels'))
+    for index in range(count):
+        cv2.imwrite(os.path.join(dataset_dir, split, 'images', f'{index}.jpg'), np.zeros((100, 200, 3), dtype=np.uint8))
+        with open(os.path.join(dataset_dir, split, 'labels', f'{index}.txt'), 'w') as label_file:
+            # a plate at x 50-150, y 40-60 of the 200x100 image
+            label_file.write('0 0.5 0.5 0.5 0.2\n')
+
+
+class TestMeanAveragePrecision(unittest.TestCase):
+    def test_exact_detections_score_one(self):
+        metrics = evaluate(detections([[0, 0, 10, 10], [20, 20, 40, 30]], [0.9, 0.8]),
+                           [[0, 0, 10, 10], [20, 20, 40, 30]], [0, 0])
+
+        self.assertAlmostEqual(metrics['map50'], 1.0)
+        self.assertAlmostEqual(metrics['map50_95'], 1.0)
+
+    def test_loose_boxes_only_count_at_low_iou_thresholds(self):
+        # IoU 0.8, a hit up to the 0.8 threshold and a miss above it
+        metrics = evaluate(detections([[0, 0, 10, 8]], [0.9]), [[0, 0, 10, 10]], [0])
+
+        self.assertAlmostEqual(metrics['map50'], 1.0)
+        self.assertAlmostEqual(metrics['map50_95'], 0.7)
+
+    def test_wrong_class_and_no_detections_score_zero(self):
+        self.assertEqual(evaluate(detections([[0, 0, 10, 10]], [0.9], [1]), [[0, 0, 10, 10]], [0])['map50'], 0.0)
+        self.assertEqual(evaluate(detections([], []), [[0, 0, 10, 10]], [0])['map50_95'], 0.0)
+
+    def test_low_confidence_false_positives_do_not_lower_the_precision_envelope(self):
+        metrics = evaluate(detections([[0, 0, 10, 10], [50, 50, 60, 60]], [0.9, 0.1]), [[0, 0, 10, 10]], [0])
+
+        self.assertAlmostEqual(metrics['map50_95'], 1.0)
+
+    def test_a_ground_truth_box_is_matched_once(self):
+        metrics = evaluate(detections([[0, 0, 10, 10], [0, 0, 10, 10]], [0.9, 0.8]), [[0, 0, 10, 10]], [0])
+        correct = match_predictions(detections([[0, 0, 10, 10], [0, 0, 10, 10]], [0.9, 0.8]),
+                                    np.array([[0, 0, 10, 10]], dtype=np.float32), np.array([0]))
+
+        self.assertEqual(correct[:, 0].tolist(), [True, False])
+        self.assertAlmostEqual(metrics['map50_95'], 1.0)
+
+
+class TestModelEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.dataset_dir = tempfile.mkdtemp()
+        write_split(self.dataset_dir, 'valid', 3)
+        write_split(self.dataset_dir, 'train', 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.dataset_dir)
+
+    def test_evaluate_compares_detections_to_the_labels_in_pixels(self):
+        config = ModelEvaluationConfig()
+        config.batch_size = 2
+        model_evaluation = ModelEvaluation(config)
+        calls = []
+
+        def predict(images):
+            calls.append(len(images))
+            return [detections([[50, 40, 150, 60]], [0.9]) for _ in images]
+
+        metrics = model_evaluation.evaluate(predict, self.dataset_dir)
+        model_evaluation.evaluate(predict, self.dataset_dir)
+
+        self.assertEqual(calls, [2, 1, 2, 1])
+        self.assertAlmostEqual(metrics['map50_95'], 1.0)
+        self.assertEqual((metrics['images'], metrics['instances']), (3, 3))
+        # the second model reads every image from the cache
+        self.assertEqual(model_evaluation.image_cache.stats()['memory_hits'], 3)
+
+    def test_calibration_sample_is_seeded_and_capped(self):
+        first = calibration_sample(self.dataset_dir, 4, seed=0)
+
+        self.assertEqual(first, calibration_sample(self.dataset_dir, 4, seed=0))
+        self.assertEqual(len(set(first)), 4)
+        self.assertEqual(len(calibration_sample(self.dataset_dir, 100)), 10)
+
+    def test_calibration_images_feed_one_preprocessed_image_at_a_time(self):
+        reader = CalibrationImages(calibration_sample(self.dataset_dir, 2), 'images', (64, 64))
+
+        first, second, end = reader.get_next(), reader.get_next(), reader.get_next()
+        reader.rewind()
+
+        self.assertEqual(first['images'].shape, (1, 3, 64, 64))
+        self.assertIsNotNone(second)
+        self.assertIsNone(end)
+        self.assertIsNotNone(reader.get_next())
+
+
+class TestModelQuantizer(unittest.TestCase):
+    def test_head_exclusions_keep_the_head_convolutions_quantized(self):
+        nodes = [('/model.0/conv/Conv', 'Conv'), ('/model.21/m.0/Add', 'Add'),
+                 ('/model.22/cv2.0/cv2.0.0/conv/Conv', 'Conv'), ('/model.22/Concat_3', 'Concat'),
+                 ('/model.22/dfl/conv/Conv', 'Conv'), ('/model.22/Sigmoid', 'Sigmoid')]
+
+        self.assertEqual(detect_head_exclusions(nodes),
+                         ['/model.22/Concat_3', '/model.22/dfl/conv/Conv', '/model.22/Sigmoid'])
+        self.assertEqual(detect_head_exclusions([('Conv_0', 'Conv')]), [])
+
+    def test_accuracy_gate_is_an_absolute_map_drop(self):
+        self.assertTrue(accuracy_gate({'map50_95': 0.60}, {'map50_95': 0.595}, 0.01)['passed'])
+        self.assertFalse(accuracy_gate({'map50_95': 0.60}, {'map50_95': 0.58}, 0.01)['passed'])
+        self.assertTrue(accuracy_gate({'map50_95': 0.60}, {'map50_95': 0.62}, 0.01)['passed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
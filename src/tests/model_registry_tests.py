@@ -0,0 +1,66 @@
+import threading
+import unittest
+from src.exception import AppException
+from src.entity.config_entity import DetectionModelConfig
+from src.serving.model_registry import DetectionModel, ModelRegistry
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def infer(self, image):
+        self.calls += 1
+        return [{'predictions': [], 'image': {'width': image.shape[1], 'height': image.shape[0]}}]
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+        self.load_lock = threading.Lock()
+
+        def loader(detection_model_config):
+            with self.load_lock:
+                self.loads.append(detection_model_config.version)
+            return DetectionModel(FakeModel(), backend='roboflow')
+
+        self.model_registry = ModelRegistry(loader=loader)
+
+    def test_model_is_loaded_once_across_threads(self):
+        config = DetectionModelConfig(model_id='plates', version=1, local_path=None, warmup=False)
+        models = []
+
+        threads = [threading.Thread(target=lambda: models.append(self.model_registry.get(config))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.loads, [1])
+        self.assertTrue(all(model is models[0] for model in models))
+
+    def test_versions_are_cached_separately(self):
+        first = self.model_registry.get(DetectionModelConfig(model_id='plates', version=1, warmup=False))
+        second = self.model_registry.get(DetectionModelConfig(model_id='plates', version=2, warmup=False))
+
+        self.assertIsNot(first, second)
+        self.assertEqual(sorted(self.loads), [1, 2])
+
+    def test_warmup_runs_one_inference(self):
+        model = self.model_registry.get(DetectionModelConfig(model_id='plates', version=1, warmup=True))
+
+        self.assertEqual(model.model.calls, 1)
+
+    def test_loader_failure_is_not_cached(self):
+        def failing_loader(detection_model_config):
+            raise OSError('weights not found')
+
+        model_registry = ModelRegistry(loader=failing_loader)
+
+        with self.assertRaises(AppException):
+            model_registry.get(DetectionModelConfig(local_path='missing.pt', warmup=False))
+        self.assertEqual(model_registry.loaded(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+import yaml
+from pathlib import Path
+from src.entity.config_entity import DataValidationConfig, ModelTrainerConfig
+from src.entity.artifacts_entity import DataIngestionArtifact, DataValidationArtifact
+from src.components.data_validation import DataValidation
+from src.components.model_trainer import ModelTrainer
+from src.utils.main_utils import link_or_copy
+
+
+class TestTrainingDataHandoff(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.feature_store = os.path.join(self.temp_dir.name, 'feature_store')
+        for split in ('train', 'valid'):
+            os.makedirs(os.path.join(self.feature_store, split, 'images'))
+            os.makedirs(os.path.join(self.feature_store, split, 'labels'))
+        Path(self.feature_store, 'data.yaml').write_text(
+            'train: ../train/images\nval: ../valid/images\nnc: 1\nnames: [license plate]\n')
+        self.zip_file_path = os.path.join(self.temp_dir.name, 'data.zip')
+        Path(self.zip_file_path).write_bytes(b'archive')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_validated_dataset_is_handed_to_training_in_place(self):
+        validation_dir = os.path.join(self.temp_dir.name, 'data_validation')
+        data_validation_config = DataValidationConfig(
+            valid_status_file_dir=os.path.join(validation_dir, 'status.txt'),
+            report_file_path=os.path.join(validation_dir, 'report.json'),
+            deep_check='off'
+        )
+        data_ingestion_artifact = DataIngestionArtifact(data_zip_file_path=self.zip_file_path,
+                                                        feature_store_path=self.feature_store)
+        working_dir = os.getcwd()
+
+        data_validation_artifact = DataValidation(data_ingestion_artifact, data_validation_config).initiate_validation()
+        model_trainer_config = ModelTrainerConfig()
+        model_trainer_config.data_yaml_file_path = os.path.join(self.temp_dir.name, 'model_trainer', 'data.yaml')
+        data_yaml_file_path = ModelTrainer(model_trainer_config).prepare_data_config(data_validation_artifact)
+
+        self.assertFalse(os.path.exists(os.path.join(working_dir, 'data.zip')))
+        self.assertEqual(data_validation_artifact.vaildated_data_path, self.feature_store)
+        with open(data_yaml_file_path) as f:
+            data_config = yaml.safe_load(f)
+        self.assertEqual(data_config['path'], os.path.abspath(self.feature_store))
+        self.assertTrue(os.path.isdir(os.path.join(data_config['path'], data_config['train'])))
+        self.assertEqual((data_config['nc'], data_config['names']), (1, ['license plate']))
+
+    def test_class_count_defaults_to_the_number_of_names(self):
+        data_yaml_file_path = os.path.join(self.feature_store, 'data.yaml')
+        Path(data_yaml_file_path).write_text('train: ../train/images\nval: ../valid/images\nnames: [license plate, car]\n')
+        data_validation_artifact = DataValidationArtifact(validation_status=True, data_status=True,
+                                                          vaildated_data_path=self.feature_store,
+                                                          data_yaml_file_path=data_yaml_file_path)
+        model_trainer_config = ModelTrainerConfig()
+        model_trainer_config.data_yaml_file_path = os.path.join(self.temp_dir.name, 'model_trainer', 'data.yaml')
+
+        with open(ModelTrainer(model_trainer_config).prepare_data_config(data_validation_artifact)) as f:
+            data_config = yaml.safe_load(f)
+
+        self.assertEqual((data_config['nc'], data_config['names']), (2, ['license plate', 'car']))
+
+    def test_link_or_copy_shares_the_file(self):
+        destination = os.path.join(self.temp_dir.name, 'nested', 'data.zip')
+
+        method = link_or_copy(self.zip_file_path, destination)
+
+        self.assertEqual(method, 'hardlink')
+        self.assertTrue(os.path.samefile(self.zip_file_path, destination))
+        self.assertEqual(link_or_copy(self.zip_file_path, destination), 'hardlink')
+
+
+if __name__ == '__main__':
+    unittest.main()
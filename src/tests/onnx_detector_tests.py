@@ -0,0 +1,95 @@
+import unittest
+import numpy as np
+from src.serving.model_registry import DetectionModel
+from src.serving.onnx_detector import (Detections, Letterbox, compare_outputs, decode_predictions, letterbox,
+                                       match_detections, preprocess_batch)
+
+
+def yolo_output(rows):
+    # rows of center x, center y, width, height and one score per class, as (4 + classes, anchors)
+    return np.asarray(rows, dtype=np.float32).T
+
+
+class FakeOnnxDetector:
+    names = {0: 'license plate'}
+
+    def predict(self, images):
+        return [Detections(xyxy=np.array([[1, 2, 3, 4]], dtype=np.float32), confidence=np.array([0.9], dtype=np.float32),
+                           class_id=np.array([0]))
+                for _ in images]
+
+
+class TestOnnxDetector(unittest.TestCase):
+    def test_letterbox_keeps_aspect_ratio_and_pads_like_ultralytics(self):
+        image = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+        boxed, transform = letterbox(image, (416, 416))
+
+        self.assertEqual(boxed.shape, (416, 416, 3))
+        self.assertEqual(transform, Letterbox(scale=0.325, pad=(0, 91), shape=(720, 1280)))
+        self.assertTrue(np.all(boxed[:91] == 114) and np.all(boxed[91:325] == 0) and np.all(boxed[325:] == 114))
+
+    def test_preprocess_batch_is_rgb_chw_in_unit_range(self):
+        image = np.zeros((32, 32, 3), dtype=np.uint8)
+        image[:, :, 0] = 255
+
+        batch, transforms = preprocess_batch([image, image], (32, 32))
+
+        self.assertEqual((batch.shape, batch.dtype), ((2, 3, 32, 32), np.float32))
+        # blue in BGR is the last channel in RGB
+        self.assertTrue(np.all(batch[:, 2] == 1.0) and np.all(batch[:, :2] == 0.0))
+        self.assertEqual(transforms[0].scale, 1.0)
+
+    def test_decode_predictions_suppresses_per_class_and_undoes_the_letterbox(self):
+        prediction = yolo_output([
+            [100, 150, 50, 20, 0.9, 0.0],
+            [102, 150, 50, 20, 0.8, 0.0],
+            [100, 150, 50, 20, 0.0, 0.7],
+            [300, 300, 10, 10, 0.1, 0.0]
+        ])
+
+        detections = decode_predictions(prediction, Letterbox(scale=0.5, pad=(0, 10), shape=(800, 832)))
+
+        np.testing.assert_allclose(detections.xyxy, [[150, 260, 250, 300], [150, 260, 250, 300]])
+        np.testing.assert_allclose(detections.confidence, [0.9, 0.7])
+        np.testing.assert_array_equal(detections.class_id, [0, 1])
+
+    def test_compare_outputs_uses_separate_box_and_score_tolerances(self):
+        reference = np.zeros((1, 5, 10), dtype=np.float32)
+        candidate = reference.copy()
+        candidate[0, 0, 0] = 0.04
+        candidate[0, 4, 0] = 0.0005
+
+        passed = compare_outputs(reference, candidate, box_atol=0.05, score_atol=1e-3)
+        candidate[0, 4, 0] = 0.01
+        failed = compare_outputs(reference, candidate, box_atol=0.05, score_atol=1e-3)
+
+        self.assertTrue(passed['passed'])
+        self.assertAlmostEqual(passed['max_box_diff'], 0.04, places=6)
+        self.assertFalse(failed['passed'])
+        self.assertFalse(compare_outputs(reference, candidate[:, :, :5], 0.05, 1e-3)['shape_match'])
+
+    def test_match_detections_pairs_boxes_of_the_same_class(self):
+        reference = Detections(xyxy=np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32),
+                               confidence=np.array([0.9, 0.8]), class_id=np.array([0, 0]))
+        candidate = Detections(xyxy=np.array([[20, 20, 30, 30.1], [0, 0, 10, 10]], dtype=np.float32),
+                               confidence=np.array([0.8, 0.9]), class_id=np.array([0, 1]))
+
+        match = match_detections(reference, candidate)
+
+        self.assertEqual((match['reference'], match['candidate'], match['matched']), (2, 2, 1))
+        self.assertGreater(match['min_iou'], 0.98)
+
+    def test_onnx_backend_returns_supervision_detections(self):
+        model = DetectionModel(FakeOnnxDetector(), backend='onnx')
+
+        detections = model.detect(np.zeros((8, 8, 3), dtype=np.uint8))
+        batch = model.detect_batch([np.zeros((8, 8, 3), dtype=np.uint8)] * 2)
+
+        self.assertEqual(len(detections), 1)
+        self.assertEqual(list(detections.data['class_name']), ['license plate'])
+        self.assertEqual(len(batch), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
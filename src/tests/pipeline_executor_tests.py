@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+from src.pipeline.executor import PipelineExecutor, Stage
+
+
+@dataclass
+class FileArtifact:
+    output_file_path: str
+
+
+class TestPipelineExecutor(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.state_file_path = os.path.join(self.temp_dir.name, 'pipeline_state.json')
+        self.params = {'ingest': {'url': 'a'}, 'validate': {}, 'features': {'size': 416}, 'train': {'epochs': 1}}
+        self.calls = []
+        self.barrier = None
+        self.running_stages = None
+        self.overlaps = {}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def stage_function(self, name):
+        def run(**upstream):
+            self.calls.append(name)
+            if self.running_stages is not None:
+                self.overlaps[name] = self.running_stages()
+            if self.barrier is not None and name in ('features', 'train'):
+                # both independent stages have to be running at the same time to get past this
+                self.barrier.wait()
+            if self.params[name].get('fail'):
+                raise RuntimeError(f'{name} failed')
+            output_file_path = os.path.join(self.temp_dir.name, f'{name}.txt')
+            Path(output_file_path).write_text(','.join(sorted(upstream)))
+            return FileArtifact(output_file_path)
+        return run
+
+    def executor(self, exclusive=()):
+        dependencies = {'ingest': [], 'validate': ['ingest'], 'features': ['validate'], 'train': ['validate']}
+        stages = [Stage(name, self.stage_function(name), FileArtifact, depends_on=depends_on, params=self.params[name],
+                        exclusive=name in exclusive)
+                  for name, depends_on in dependencies.items()]
+        return PipelineExecutor(stages, self.state_file_path, max_workers=2)
+
+    def test_unchanged_stages_are_skipped(self):
+        artifacts = self.executor().run()
+        self.assertEqual(sorted(self.calls), ['features', 'ingest', 'train', 'validate'])
+        self.assertEqual(Path(artifacts['train'].output_file_path).read_text(), 'validate')
+
+        self.calls.clear()
+        executor = self.executor()
+        rerun = executor.run()
+
+        self.assertEqual(self.calls, [])
+        self.assertEqual(rerun, artifacts)
+        self.assertEqual({report['status'] for report in executor.report.values()}, {'skipped'})
+
+    def test_changed_params_rerun_the_stage_and_downstream(self):
+        self.executor().run()
+        self.calls.clear()
+        self.params['validate']['min_box_pixels'] = 4
+        os.remove(os.path.join(self.temp_dir.name, 'features.txt'))
+
+        self.executor().run()
+
+        self.assertEqual(sorted(self.calls), ['features', 'train', 'validate'])
+
+    def test_from_stage_and_only(self):
+        self.executor().run()
+        self.calls.clear()
+
+        self.executor().run(from_stage='validate')
+        self.assertEqual(sorted(self.calls), ['features', 'train', 'validate'])
+
+        self.calls.clear()
+        executor = self.executor()
+        executor.run(only=['train'])
+        self.assertEqual(self.calls, ['train'])
+        self.assertEqual(executor.report['validate'], {'status': 'loaded'})
+
+    def test_only_needs_finished_upstream_stages(self):
+        with self.assertRaises(ValueError):
+            self.executor().run(only=['train'])
+
+    def test_independent_stages_run_concurrently(self):
+        self.barrier = threading.Barrier(2, timeout=10)
+
+        self.executor().run()
+
+        self.assertEqual(sorted(self.calls[2:]), ['features', 'train'])
+
+    def test_exclusive_stages_run_alone(self):
+        executor = self.executor(exclusive=['train'])
+        self.running_stages = lambda: executor.running_stages
+
+        executor.run()
+
+        self.assertEqual(sorted(self.calls), ['features', 'ingest', 'train', 'validate'])
+        self.assertEqual(self.overlaps['train'], frozenset(['train']))
+        self.assertEqual(self.overlaps['features'], frozenset(['features']))
+
+    def test_failed_stage_is_not_saved(self):
+        self.params['validate']['fail'] = True
+        with self.assertRaises(RuntimeError):
+            self.executor().run()
+        self.assertEqual(self.calls, ['ingest', 'validate'])
+
+        self.calls.clear()
+        del self.params['validate']['fail']
+        self.executor().run()
+        self.assertEqual(sorted(self.calls), ['features', 'train', 'validate'])
+
+
+if __name__ == '__main__':
+    unittest.main()
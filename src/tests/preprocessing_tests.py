@@ -0,0 +1,61 @@
+import io
+import unittest
+import numpy as np
+from PIL import Image
+from src.serving.preprocessing import ImagePreprocessor
+
+
+class TestImagePreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.preprocessor = ImagePreprocessor(target_size=(8, 4), dtype=np.float32, max_batch_size=2)
+
+    def test_preprocess_returns_float32_batch_in_unit_range(self):
+        image = Image.new('RGB', (16, 16), (255, 0, 51))
+
+        tensor = self.preprocessor.preprocess(image)
+
+        self.assertEqual(tensor.shape, (1, 4, 8, 3))
+        self.assertEqual(tensor.dtype, np.float32)
+        np.testing.assert_allclose(tensor[0, 0, 0], [1.0, 0.0, 0.2], atol=1e-6)
+
+    def test_uint8_preprocessing_keeps_raw_pixels(self):
+        preprocessor = ImagePreprocessor(target_size=(8, 4), dtype=np.uint8)
+
+        tensor = preprocessor.preprocess(Image.new('RGB', (8, 4), (10, 20, 30)))
+
+        self.assertEqual(tensor.dtype, np.uint8)
+        self.assertEqual(tensor[0, 0, 0].tolist(), [10, 20, 30])
+
+    def test_greyscale_and_rgba_inputs_become_rgb(self):
+        grey = Image.new('L', (8, 4), 255)
+        transparent = Image.new('RGBA', (8, 4), (255, 255, 255, 0))
+
+        batch = self.preprocessor.preprocess_batch([grey, transparent])
+
+        self.assertEqual(batch.shape, (2, 4, 8, 3))
+        np.testing.assert_allclose(batch[0], 1.0)
+        # fully transparent pixels take the background colour
+        np.testing.assert_allclose(batch[1], 0.0)
+
+    def test_batch_reuses_preallocated_buffer(self):
+        first = self.preprocessor.preprocess_batch([Image.new('RGB', (8, 4))])
+        second = self.preprocessor.preprocess_batch([Image.new('RGB', (8, 4))])
+
+        self.assertTrue(np.shares_memory(first, second))
+
+    def test_batch_larger_than_buffer_raises(self):
+        with self.assertRaises(ValueError):
+            self.preprocessor.preprocess_batch([Image.new('RGB', (8, 4))] * 3)
+
+    def test_preprocess_bytes_decodes_jpeg(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 32), (0, 255, 0)).save(buffer, format='JPEG')
+
+        tensor = self.preprocessor.preprocess_bytes(buffer.getvalue())
+
+        self.assertEqual(tensor.shape, (1, 4, 8, 3))
+        self.assertGreater(tensor[0, 2, 4, 1], 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
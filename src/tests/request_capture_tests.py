@@ -0,0 +1,50 @@
+import os
+import hashlib
+import tempfile
+import unittest
+from src.entity.config_entity import RequestCaptureConfig
+from src.serving.request_capture import RequestCaptureSink
+
+
+class TestRequestCaptureSink(unittest.TestCase):
+    def setUp(self):
+        self.capture_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.capture_dir.cleanup()
+
+    def test_disabled_sink_captures_nothing(self):
+        capture_sink = RequestCaptureSink(RequestCaptureConfig(capture_rate=0.0, capture_dir=self.capture_dir.name))
+        capture_sink.start()
+
+        self.assertFalse(capture_sink.offer(b'image', 'image/jpeg'))
+        capture_sink.stop()
+        self.assertEqual(os.listdir(self.capture_dir.name), [])
+
+    def test_samples_are_written_under_content_addressed_names(self):
+        capture_sink = RequestCaptureSink(RequestCaptureConfig(capture_rate=1.0, capture_dir=self.capture_dir.name))
+        capture_sink.start()
+
+        self.assertTrue(capture_sink.offer(b'image-bytes', 'image/png'))
+        self.assertTrue(capture_sink.offer(b'image-bytes', 'image/png'))
+        capture_sink.stop()
+
+        expected_name = hashlib.sha256(b'image-bytes').hexdigest() + '.png'
+        self.assertEqual(os.listdir(self.capture_dir.name), [expected_name])
+        self.assertEqual(capture_sink.written, 1)
+        self.assertEqual(capture_sink.duplicates, 1)
+
+    def test_full_queue_drops_samples(self):
+        capture_sink = RequestCaptureSink(
+            RequestCaptureConfig(capture_rate=1.0, capture_dir=self.capture_dir.name, max_queue_size=1)
+        )
+        # pretend the writer is running without draining the queue
+        capture_sink._writer = object()
+
+        self.assertTrue(capture_sink.offer(b'first', 'image/jpeg'))
+        self.assertFalse(capture_sink.offer(b'second', 'image/jpeg'))
+        self.assertEqual(capture_sink.dropped, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
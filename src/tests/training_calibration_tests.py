@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.exception import TrainingCancelledError, TrainingError
+from src.training.calibration import TrainingCalibrator
+
+
+class FakeProbe:
+    def __init__(self, out_of_memory_batch=None, memory_mb_per_image=10, cancel=False):
+        self.out_of_memory_batch = out_of_memory_batch
+        self.memory_mb_per_image = memory_mb_per_image
+        self.cancel = cancel
+        self.calls = []
+
+    def __call__(self, train_arguments):
+        self.calls.append(train_arguments)
+        if self.cancel:
+            raise TrainingCancelledError('Training was cancelled')
+        batch, workers, cache = train_arguments['batch'], train_arguments['workers'], train_arguments['cache']
+        if self.out_of_memory_batch and batch >= self.out_of_memory_batch:
+            raise TrainingError('Training exited with code 1: RuntimeError: out of memory')
+        # faster with larger batches up to 16, more workers help, caching in RAM helps most
+        images_per_sec = min(batch, 16) * (1 + 0.5 * workers) * (2 if cache == 'ram' else 1)
+        return {'images_per_sec': images_per_sec, 'peak_memory_mb': batch * self.memory_mb_per_image}
+
+
+class TestTrainingCalibrator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dataset_dir = os.path.join(self.temp_dir.name, 'dataset')
+        os.makedirs(os.path.join(self.dataset_dir, 'train', 'images'))
+        for index in range(20):
+            with open(os.path.join(self.dataset_dir, 'train', 'images', f'{index}.jpg'), 'wb') as f:
+                f.write(b'\xff\xd8' + bytes(100))
+        self.cache_file_path = os.path.join(self.temp_dir.name, 'calibration.json')
+        self.train_arguments = {'model': 'yolov8s.pt', 'data': 'data.yaml', 'epochs': 30, 'batch': 16,
+                                'imgsz': 64, 'workers': 0, 'cache': False, 'name': 'train'}
+        cpu_count = mock.patch('src.training.calibration.os.cpu_count', return_value=4)
+        cpu_count.start()
+        self.addCleanup(cpu_count.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def calibrator(self, probe, memory_bytes=8 * 2 ** 30):
+        return TrainingCalibrator(self.cache_file_path, probe, batch_sizes=[4, 8, 16, 32, 64],
+                                  memory_bytes=memory_bytes)
+
+    def test_picks_the_fastest_configuration_with_short_probes(self):
+        probe = FakeProbe()
+
+        calibration = self.calibrator(probe).calibrate(self.train_arguments, self.dataset_dir)
+
+        self.assertEqual((calibration['batch'], calibration['workers'], calibration['cache']), (16, 4, 'ram'))
+        self.assertFalse(calibration['cached'])
+        # 32 is no faster than 16, so 64 is never tried
+        self.assertNotIn(64, [call['batch'] for call in probe.calls])
+        # cache probes train a second epoch, the one the cache speeds up
+        self.assertTrue(all(call['epochs'] == (2 if call['cache'] else 1) and call['val'] is False
+                            for call in probe.calls))
+        self.assertEqual(self.train_arguments['epochs'], 30)
+
+    def test_failed_and_over_budget_probes_are_not_used(self):
+        probe = FakeProbe(out_of_memory_batch=16)
+
+        # caching 20 images of 1024x1024 in RAM needs about 90 MB
+        train_arguments = dict(self.train_arguments, imgsz=1024)
+
+        calibration = self.calibrator(probe, memory_bytes=100 * 2 ** 20).calibrate(train_arguments, self.dataset_dir)
+
+        # batch 8 peaks at 80 MB, over 70% of 100 MB
+        self.assertEqual(calibration['batch'], 4)
+        statuses = {entry['batch']: entry['status'] for entry in calibration['probes'] if entry['workers'] == 0}
+        self.assertEqual(statuses, {4: 'ok', 8: 'over memory budget'})
+        self.assertNotIn('ram', [call['cache'] for call in probe.calls])
+
+    def test_calibration_is_cached_per_machine_and_dataset(self):
+        first = self.calibrator(FakeProbe()).calibrate(self.train_arguments, self.dataset_dir)
+        probe = FakeProbe()
+
+        second = self.calibrator(probe).calibrate(self.train_arguments, self.dataset_dir)
+        probes_when_cached = len(probe.calls)
+        with open(os.path.join(self.dataset_dir, 'train', 'images', 'new.jpg'), 'wb') as f:
+            f.write(b'\xff\xd8')
+        self.calibrator(probe).calibrate(self.train_arguments, self.dataset_dir)
+
+        self.assertTrue(second['cached'])
+        self.assertEqual((second['batch'], second['workers'], second['cache']),
+                         (first['batch'], first['workers'], first['cache']))
+        self.assertEqual(probes_when_cached, 0)
+        # a changed dataset is calibrated again
+        self.assertGreater(len(probe.calls), 0)
+
+    def test_calibration_is_not_cached_when_it_did_not_run_alone(self):
+        # another stage starts during the third probe
+        checks = iter([True] * 5 + [False] * 100)
+        calibrator = TrainingCalibrator(self.cache_file_path, FakeProbe(), batch_sizes=[4, 8, 16, 32, 64],
+                                        memory_bytes=8 * 2 ** 30, running_alone=lambda: next(checks))
+
+        contended = calibrator.calibrate(self.train_arguments, self.dataset_dir)
+        probe = FakeProbe()
+        rerun = self.calibrator(probe).calibrate(self.train_arguments, self.dataset_dir)
+
+        self.assertTrue(contended['contended'])
+        self.assertEqual(contended['batch'], 16)
+        self.assertFalse(rerun['cached'])
+        self.assertGreater(len(probe.calls), 0)
+        self.assertFalse(rerun['contended'])
+
+    def test_cancelling_a_probe_stops_calibration(self):
+        with self.assertRaises(TrainingCancelledError):
+            self.calibrator(FakeProbe(cancel=True)).calibrate(self.train_arguments, self.dataset_dir)
+        self.assertFalse(os.path.exists(self.cache_file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import sys
+import json
+import time
+import textwrap
+import unittest
+from src.exception import TrainingError
+from src.training.worker import EVENT_PREFIX, ThroughputCallbacks
+from src.training.launcher import TrainingLauncher, summarize_events
+
+
+def script_command(body: str):
+    prelude = f'import json, sys, time\ndef emit(event, **fields):\n    print({EVENT_PREFIX!r} + json.dumps(dict(event=event, **fields)), flush=True)\n'
+    return [sys.executable, '-c', prelude + textwrap.dedent(body)]
+
+
+def epoch_event(epoch, images=100, train_seconds=2.0, data_wait_seconds=0.1):
+    return dict(epoch=epoch, epochs=2, images=images, train_seconds=train_seconds, seconds=train_seconds + 1,
+                images_per_sec=images / train_seconds, data_wait_seconds=data_wait_seconds,
+                data_wait_fraction=data_wait_seconds / train_seconds, loss=[1.0], metrics={'metrics/mAP50(B)': 0.5})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTrainer:
+    batch_size = 4
+    epoch = 0
+    epochs = 3
+    tloss = [0.5, 0.25]
+    metrics = {'metrics/mAP50(B)': 0.75}
+
+
+class TestTrainingLauncher(unittest.TestCase):
+    def test_run_parses_events_and_reports_throughput(self):
+        command = script_command(f'''
+            print('ultralytics log line')
+            emit('started')
+            emit('epoch', **{epoch_event(1)!r})
+            emit('epoch', **{epoch_event(2, data_wait_seconds=1.0)!r})
+            emit('finished', best='best.pt', last='last.pt', save_dir='runs/train', metrics={{'metrics/mAP50(B)': 0.6}})
+        ''')
+        seen = []
+
+        report = TrainingLauncher(command, on_event=seen.append).run()
+
+        self.assertEqual([event['event'] for event in seen], ['started', 'epoch', 'epoch', 'finished'])
+        self.assertEqual(len(report['epochs']), 2)
+        self.assertAlmostEqual(report['images_per_sec'], 50.0)
+        self.assertAlmostEqual(report['data_wait_fraction'], 0.275)
+        self.assertEqual((report['best'], report['last']), ('best.pt', 'last.pt'))
+        self.assertEqual(report['metrics'], {'metrics/mAP50(B)': 0.6})
+        self.assertEqual(len(report['warnings']), 1)
+
+    def test_summary_without_starvation_has_no_warning(self):
+        report = summarize_events([dict(event='epoch', **epoch_event(1))])
+
+        self.assertEqual(report['warnings'], [])
+        self.assertEqual(report['metrics'], {'metrics/mAP50(B)': 0.5})
+
+    def test_failed_run_raises_with_the_error(self):
+        command = script_command('''
+            emit('error', message='RuntimeError: CUDA out of memory')
+            sys.exit(1)
+        ''')
+
+        with self.assertRaisesRegex(TrainingError, 'CUDA out of memory'):
+            TrainingLauncher(command).run()
+
+    def test_cancel_stops_the_run(self):
+        command = script_command('''
+            emit('started')
+            time.sleep(60)
+        ''')
+        launcher = TrainingLauncher(command, on_event=lambda event: launcher.cancel(), cancel_grace_seconds=1)
+        started_at = time.perf_counter()
+
+        with self.assertRaisesRegex(TrainingError, 'cancelled'):
+            launcher.run()
+        self.assertLess(time.perf_counter() - started_at, 30)
+        self.assertIsNotNone(launcher.process.poll())
+
+
+class TestThroughputCallbacks(unittest.TestCase):
+    def test_epoch_event_measures_data_loader_wait(self):
+        events = []
+        clock = FakeClock()
+        callbacks = ThroughputCallbacks(emit=lambda event, **fields: events.append(dict(event=event, **fields)),
+                                        clock=clock)
+        trainer = FakeTrainer()
+
+        callbacks.on_train_epoch_start(trainer)
+        for _ in range(2):
+            clock.now += 0.5  # waiting for the batch
+            callbacks.on_train_batch_start(trainer)
+            clock.now += 1.5  # forward and backward pass
+            callbacks.on_train_batch_end(trainer)
+        callbacks.on_train_epoch_end(trainer)
+        clock.now += 1.0  # validation
+        callbacks.on_fit_epoch_end(trainer)
+
+        event = events[0]
+        self.assertEqual((event['event'], event['epoch'], event['epochs'], event['images']), ('epoch', 1, 3, 8))
+        self.assertEqual((event['train_seconds'], event['seconds']), (4.0, 5.0))
+        self.assertEqual((event['images_per_sec'], event['data_wait_fraction']), (2.0, 0.25))
+        self.assertEqual(event['loss'], [0.5, 0.25])
+        self.assertEqual(event['metrics'], {'metrics/mAP50(B)': 0.75})
+        json.dumps(event)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import time
+import unittest
+import numpy as np
+import supervision as sv
+from src.video.annotation import FrameAnnotator
+from src.video.stage_timer import StageTimer
+
+
+def make_detections():
+    return sv.Detections(
+        xyxy=np.array([[10, 10, 40, 30]], dtype=np.float32),
+        confidence=np.array([0.9]),
+        class_id=np.array([0]),
+        tracker_id=np.array([7])
+    )
+
+
+class TestFrameAnnotator(unittest.TestCase):
+    def test_input_frame_is_not_modified(self):
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+
+        annotated = FrameAnnotator().annotate(frame, make_detections())
+
+        self.assertEqual(int(frame.sum()), 0)
+        self.assertGreater(int(annotated.sum()), 0)
+
+    def test_output_buffer_is_reused_between_frames(self):
+        annotator = FrameAnnotator()
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+
+        first = annotator.annotate(frame, make_detections())
+        second = annotator.annotate(frame, sv.Detections.empty())
+
+        self.assertIs(first, second)
+        self.assertEqual(int(second.sum()), 0)
+
+    def test_disabled_annotator_returns_none(self):
+        annotator = FrameAnnotator(enabled=False)
+
+        self.assertIsNone(annotator.annotate(np.zeros((8, 8, 3), dtype=np.uint8), make_detections()))
+
+    def test_labels_include_tracker_id(self):
+        self.assertEqual(FrameAnnotator._labels(make_detections()), ['#7 0'])
+
+
+class TestStageTimer(unittest.TestCase):
+    def test_summary_breaks_time_down_per_stage(self):
+        stage_timer = StageTimer()
+        for _ in range(2):
+            with stage_timer.stage('infer'):
+                time.sleep(0.01)
+            stage_timer.frame_done()
+
+        summary = stage_timer.summary()
+
+        self.assertEqual(summary['frames'], 2)
+        self.assertGreaterEqual(summary['stages']['infer']['ms_per_frame'], 10)
+        self.assertEqual(summary['stages']['decode']['total_ms'], 0.0)
+        self.assertAlmostEqual(summary['stages']['infer']['share'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+import supervision as sv
+from src.entity.config_entity import VideoPipelineConfig
+from src.video.motion import MotionGate, BoxPropagator, evaluate_drift
+from src.video.pipeline import VideoPipeline
+
+
+def textured_frame(offset_x=0, offset_y=0, size=(120, 160)):
+    frame = np.zeros((*size, 3), dtype=np.uint8)
+    rng = np.random.default_rng(0)
+    frame[40 + offset_y:80 + offset_y, 40 + offset_x:100 + offset_x] = rng.integers(0, 255, (40, 60, 3))
+    return frame
+
+
+class CountingDetector:
+    def __init__(self):
+        self.frames = 0
+
+    def detect_batch(self, frames):
+        self.frames += len(frames)
+        return [sv.Detections(xyxy=np.array([[40, 40, 100, 80]], dtype=np.float32),
+                              confidence=np.array([0.9]), class_id=np.array([0])) for _ in frames]
+
+
+class TestMotionGate(unittest.TestCase):
+    def test_static_scene_runs_detector_every_n_frames(self):
+        motion_gate = MotionGate(detect_every=5, motion_threshold=0.02)
+        frame = textured_frame()
+
+        decisions = [motion_gate.should_detect(frame) for _ in range(10)]
+
+        self.assertEqual(decisions, [True, False, False, False, False, True, False, False, False, False])
+        self.assertAlmostEqual(motion_gate.invocation_rate, 0.2)
+
+    def test_motion_triggers_detection_early(self):
+        motion_gate = MotionGate(detect_every=100, motion_threshold=0.01)
+        motion_gate.should_detect(textured_frame())
+
+        self.assertTrue(motion_gate.should_detect(textured_frame(offset_x=15)))
+        self.assertEqual(motion_gate.stats()['motion_triggered'], 1)
+
+
+class TestBoxPropagator(unittest.TestCase):
+    def test_boxes_follow_the_moving_object(self):
+        propagator = BoxPropagator()
+        propagator.reset(textured_frame())
+
+        moved = propagator.propagate_boxes(textured_frame(offset_x=4, offset_y=2),
+                                           np.array([[40, 40, 100, 80]], dtype=np.float32))
+
+        np.testing.assert_allclose(moved[0], [44, 42, 104, 82], atol=1.0)
+
+
+class TestEvaluateDrift(unittest.TestCase):
+    def test_identical_boxes_have_no_drift(self):
+        boxes = [np.array([[0, 0, 10, 10]], dtype=np.float32)]
+
+        self.assertEqual(evaluate_drift(boxes, boxes)['recall'], 1.0)
+
+    def test_missing_boxes_count_as_misses(self):
+        drift = evaluate_drift([np.array([[0, 0, 10, 10]])], [np.empty((0, 4))])
+
+        self.assertEqual(drift['recall'], 0.0)
+
+
+class TestAdaptivePipeline(unittest.TestCase):
+    def test_detector_runs_on_a_fraction_of_frames(self):
+        detector = CountingDetector()
+        seen = []
+        pipeline = VideoPipeline(
+            detector, VideoPipelineConfig(batch_size=2, inference_workers=1, adaptive=True, detect_every=4),
+            sink=lambda packet, annotated: seen.append(packet.detections)
+        )
+
+        summary = pipeline.run([textured_frame()] * 20)
+
+        self.assertEqual(detector.frames, 5)
+        self.assertEqual(summary['detector_invocation_rate'], 0.25)
+        self.assertEqual(len(seen), 20)
+        self.assertTrue(all(len(detections) == 1 for detections in seen))
+
+
+if __name__ == '__main__':
+    unittest.main()
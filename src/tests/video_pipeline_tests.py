@@ -0,0 +1,107 @@
+import time
+import random
+import threading
+import unittest
+import numpy as np
+import supervision as sv
+from src.exception import AppException
+from src.entity.config_entity import VideoPipelineConfig
+from src.video.pipeline import VideoPipeline
+
+
+class FakeDetector:
+    def __init__(self, fail_at=None, thread_safe=False):
+        self.batch_sizes = []
+        self.fail_at = fail_at
+        self.thread_safe = thread_safe
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def detect_batch(self, frames):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            return self._detect_batch(frames)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _detect_batch(self, frames):
+        self.batch_sizes.append(len(frames))
+        # jitter so several workers finish out of order
+        time.sleep(random.uniform(0, 0.005))
+        detections = []
+        for frame in frames:
+            value = int(frame[0, 0, 0])
+            if value == self.fail_at:
+                raise ValueError('inference failed')
+            detections.append(sv.Detections(
+                xyxy=np.array([[value, value, value + 10, value + 10]], dtype=np.float32),
+                confidence=np.array([0.9]),
+                class_id=np.array([0])
+            ))
+        return detections
+
+
+def make_frames(count):
+    return [np.full((32, 32, 3), index, dtype=np.uint8) for index in range(count)]
+
+
+class TestVideoPipeline(unittest.TestCase):
+    def test_frames_reach_the_sink_in_order_with_several_workers(self):
+        seen = []
+        pipeline = VideoPipeline(
+            FakeDetector(), VideoPipelineConfig(queue_size=4, batch_size=3, inference_workers=3),
+            sink=lambda packet, annotated: seen.append((packet.index, int(packet.frame[0, 0, 0])))
+        )
+
+        summary = pipeline.run(make_frames(50))
+
+        self.assertEqual([index for index, _ in seen], list(range(50)))
+        self.assertEqual([value for _, value in seen], list(range(50)))
+        self.assertEqual(summary['frames'], 50)
+
+    def test_workers_take_turns_on_a_model_that_is_not_thread_safe(self):
+        detector = FakeDetector()
+        safe_detector = FakeDetector(thread_safe=True)
+        config = VideoPipelineConfig(queue_size=8, batch_size=1, inference_workers=3)
+
+        VideoPipeline(detector, config).run(make_frames(60))
+        VideoPipeline(safe_detector, config).run(make_frames(60))
+
+        self.assertEqual(detector.max_active, 1)
+        self.assertEqual(sum(detector.batch_sizes), 60)
+        self.assertGreater(safe_detector.max_active, 1)
+
+    def test_consecutive_frames_are_batched(self):
+        detector = FakeDetector()
+        pipeline = VideoPipeline(detector, VideoPipelineConfig(queue_size=8, batch_size=4, inference_workers=1))
+
+        pipeline.run(make_frames(20))
+
+        self.assertEqual(sum(detector.batch_sizes), 20)
+        self.assertTrue(all(size <= 4 for size in detector.batch_sizes))
+
+    def test_tracker_ids_are_assigned(self):
+        tracked = []
+        pipeline = VideoPipeline(
+            FakeDetector(), VideoPipelineConfig(queue_size=4, batch_size=2, inference_workers=2),
+            tracker=sv.ByteTrack(minimum_consecutive_frames=1),
+            sink=lambda packet, annotated: tracked.append(packet.detections)
+        )
+
+        pipeline.run([np.zeros((32, 32, 3), dtype=np.uint8)] * 10)
+
+        self.assertIsNotNone(tracked[-1].tracker_id)
+
+    def test_stage_failure_stops_the_pipeline(self):
+        pipeline = VideoPipeline(FakeDetector(fail_at=5), VideoPipelineConfig(queue_size=2, batch_size=1, inference_workers=2))
+
+        with self.assertRaises(AppException):
+            pipeline.run(make_frames(100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import time
+import tempfile
+import unittest
+import cv2
+import numpy as np
+from src.entity.config_entity import VideoSourceConfig
+from src.video.sources import (FrameRingBuffer, CaptureSource, FileSource, ImageFolderSource, SyntheticSource,
+                               open_video_source)
+
+
+def write_video(path, frames=10, size=(64, 48)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, size)
+    for index in range(frames):
+        writer.write(np.full((size[1], size[0], 3), index * 20, dtype=np.uint8))
+    writer.release()
+
+
+class TestFrameRingBuffer(unittest.TestCase):
+    def test_overwrite_drops_oldest_frames(self):
+        buffer = FrameRingBuffer(2, overwrite=True)
+        for index in range(5):
+            buffer.put(np.array([index]))
+        buffer.close()
+
+        self.assertEqual(buffer.dropped, 3)
+        self.assertEqual([int(buffer.get()[0]), int(buffer.get()[0])], [3, 4])
+        self.assertIsNone(buffer.get())
+
+
+class TestVideoSources(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_synthetic_source_is_deterministic(self):
+        first = list(SyntheticSource(96, 64, frame_count=5))
+        second = list(SyntheticSource(96, 64, frame_count=5))
+
+        self.assertEqual(len(first), 5)
+        self.assertEqual(first[0].shape, (64, 96, 3))
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(a, b)
+        self.assertFalse(np.array_equal(first[0], first[1]))
+
+    def test_file_source_loops(self):
+        video_file = os.path.join(self.temp_dir.name, 'clip.avi')
+        write_video(video_file, frames=10)
+
+        self.assertEqual(len(list(FileSource(video_file))), 10)
+
+        frames = []
+        for frame in FileSource(video_file, VideoSourceConfig(loop=True)):
+            frames.append(frame)
+            if len(frames) == 25:
+                break
+        self.assertEqual(len(frames), 25)
+
+    def test_image_folder_source_skips_unreadable_files(self):
+        for index in range(3):
+            cv2.imwrite(os.path.join(self.temp_dir.name, f'{index:03d}.png'), np.full((8, 8, 3), index, np.uint8))
+        with open(os.path.join(self.temp_dir.name, '004.jpg'), 'wb') as f:
+            f.write(b'not an image')
+
+        frames = list(ImageFolderSource(self.temp_dir.name, VideoSourceConfig(buffer_size=0)))
+
+        self.assertEqual([int(frame[0, 0, 0]) for frame in frames], [0, 1, 2])
+
+    def test_target_fps_paces_frames(self):
+        source = SyntheticSource(32, 32, frame_count=10, video_source_config=VideoSourceConfig(target_fps=50))
+
+        started_at = time.perf_counter()
+        self.assertEqual(len(list(source)), 10)
+
+        # nine intervals of 20 ms after the first frame
+        self.assertGreaterEqual(time.perf_counter() - started_at, 0.17)
+
+    def test_live_source_gives_up_after_reconnect_attempts(self):
+        missing = os.path.join(self.temp_dir.name, 'missing.avi')
+        source = CaptureSource(missing, VideoSourceConfig(reconnect_attempts=2, reconnect_backoff_s=0.01))
+
+        with self.assertRaises(RuntimeError):
+            list(source)
+        self.assertEqual(source.reconnects, 2)
+
+    def test_open_video_source_picks_implementation(self):
+        self.assertIsInstance(open_video_source('0'), CaptureSource)
+        self.assertIsInstance(open_video_source('rtsp://camera/stream'), CaptureSource)
+        self.assertIsInstance(open_video_source(self.temp_dir.name), ImageFolderSource)
+        self.assertIsInstance(open_video_source('clip.mp4'), FileSource)
+        synthetic = open_video_source('synthetic:320x240')
+        self.assertEqual((synthetic.width, synthetic.height), (320, 240))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.utils.image_cache import DecodedImageCache
+
+
+class CachedImageLoader:
+    def __init__(self, dataset, image_cache: DecodedImageCache):
+        """
+        Replaces the load_image of an ultralytics dataset, so the decoded and resized image comes from
+        `image_cache` instead of the JPEG on every epoch. The mosaic buffer is kept as load_image keeps it,
+        so augmentation draws from the same recent images with and without the cache.
+
+        The dataset's own load_image is called through its class rather than stored, so a dataset with
+        this loader still pickles for data loader workers started with spawn.
+        """
+        self.dataset = dataset
+        self.image_cache = image_cache
+
+    def __call__(self, i: int, rect_mode: bool = True) -> Tuple[np.ndarray, tuple, tuple]:
+        dataset = self.dataset
+        load_image = type(dataset).load_image
+        if dataset.ims[i] is not None:
+            # still in the mosaic buffer
+            return load_image(dataset, i, rect_mode)
+
+        loaded = {}
+
+        def decode(image_path: str):
+            loaded['result'] = load_image(dataset, i, rect_mode)
+            image, (height, width), _ = loaded['result']
+            return image, {'height': height, 'width': width}
+
+        image, info = self.image_cache.get(dataset.im_files[i], decode, variant=f'rect={rect_mode}')
+        if 'result' in loaded:
+            # decoded just now, load_image already buffered it
+            return loaded['result']
+
+        # augmentations write into the image, the cached one stays as it is
+        image = np.array(image)
+        original_shape, resized_shape = (info['height'], info['width']), image.shape[:2]
+        if dataset.augment:
+            dataset.ims[i], dataset.im_hw0[i], dataset.im_hw[i] = image, original_shape, resized_shape
+            dataset.buffer.append(i)
+            if 1 < len(dataset.buffer) >= dataset.max_buffer_length:
+                j = dataset.buffer.pop(0)
+                dataset.ims[j], dataset.im_hw0[j], dataset.im_hw[j] = None, None, None
+        return image, original_shape, resized_shape
+
+
+def cache_dataset_images(dataset, memory_mb: float, disk_dir: Optional[str] = None, workers: int = 0):
+    """
+    Puts a DecodedImageCache in front of an ultralytics dataset's image loading.
+
+    Parameters:
+    dataset: An ultralytics YOLODataset.
+    memory_mb (float): The memory tier of all the loader processes together.
+    disk_dir (str): The disk tier, none when not set.
+    workers (int): The data loader workers, each of which keeps a memory tier of its own.
+
+    Returns:
+    The dataset.
+    """
+    image_cache = DecodedImageCache(
+        memory_budget_bytes=int(memory_mb * 1024 * 1024 / max(1, workers)),
+        disk_dir=disk_dir,
+        params={'imgsz': dataset.imgsz}
+    )
+    dataset.load_image = CachedImageLoader(dataset, image_cache)
+    dataset.image_cache = image_cache
+    return dataset
+
+
+def cached_trainer(memory_mb: float, disk_dir: Optional[str] = None):
+    """
+    Returns an ultralytics DetectionTrainer whose train and validation datasets load images through
+    the project's image cache; train it with cache=False, so ultralytics does not cache them a second time.
+    """
+    from ultralytics.models.yolo.detect import DetectionTrainer
+
+    class CachedDetectionTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode='train', batch=None):
+            dataset = super().build_dataset(img_path, mode, batch)
+            return cache_dataset_images(dataset, memory_mb, disk_dir, workers=self.args.workers)
+
+        def image_cache_stats(self) -> Optional[dict]:
+            dataset = getattr(getattr(self, 'train_loader', None), 'dataset', None)
+            image_cache = getattr(dataset, 'image_cache', None)
+            return image_cache.stats() if image_cache is not None else None
+
+    return CachedDetectionTrainer
@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import shutil
+import platform
+from typing import Callable, Dict, List, Optional
+
+from src.logger import logging
+from src.exception import TrainingCancelledError, TrainingError
+from src.utils.manifest import fingerprint
+
+# a probe must be this much faster than the best configuration so far to replace it, so noise does not decide
+MIN_SPEEDUP = 1.05
+
+# every probe trains on at least this many batches, so the loader workers get past their start up
+PROBE_MIN_BATCHES = 10
+
+# a cached image is about its resized pixels, the data loader keeps a few more copies around while loading
+CACHED_IMAGE_OVERHEAD = 1.5
+
+CALIBRATION_VERSION = 1
+
+
+def total_memory_bytes() -> Optional[int]:
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def available_memory_bytes() -> Optional[int]:
+    # MemAvailable counts the page cache that can be dropped, free memory alone understates it
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def machine_summary(device: str = '') -> dict:
+    return {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'memory_bytes': total_memory_bytes(),
+        'device': device
+    }
+
+
+def dataset_summary(dataset_dir: str) -> dict:
+    # the number and size of the training images change whenever the dataset does, and are cheap to read
+    images_dir = os.path.join(dataset_dir, 'train', 'images')
+    images = [entry for entry in os.scandir(images_dir) if entry.is_file()] if os.path.isdir(images_dir) else []
+    return {'images': len(images), 'bytes': sum(entry.stat().st_size for entry in images)}
+
+
+class TrainingCalibrator:
+    def __init__(self, cache_file_path: str, probe: Callable[[dict], dict], batch_sizes: List[int],
+                 fraction: float = 0.05, memory_budget_fraction: float = 0.7, memory_bytes: Optional[int] = None,
+                 running_alone: Optional[Callable[[], bool]] = None):
+        """
+        Picks the batch size, data loader workers and image cache mode that train fastest on this machine,
+        by timing short probe runs before the real one.
+
+        The batch size is grown until a probe fails, goes over the memory budget or stops getting faster;
+        then the loader workers and the cache modes that fit in memory or on disk are tried with that batch
+        size. The result is cached per machine, dataset, model and image size, so it only runs once, unless
+        something else ran during a probe: a configuration timed while other work had the cores is used
+        for this run only.
+
+        Parameters:
+        cache_file_path (str): The JSON file calibrations are cached in.
+        probe (Callable): Runs training with the given arguments and returns its report, see summarize_events.
+            The arguments' cache is the image cache mode to probe: "", "ram" or "disk".
+        batch_sizes (list): The batch sizes to try, smallest first.
+        fraction (float): The share of the training images each probe trains on.
+        memory_budget_fraction (float): The share of the available RAM a configuration may use.
+        memory_bytes (int): The available RAM, read from the machine when not set.
+        running_alone (Callable): Returns whether the probes have the machine to themselves, e.g. no other
+            pipeline stage is running; checked around every probe. Always alone when not set.
+        """
+        self.cache_file_path = cache_file_path
+        self.probe = probe
+        self.batch_sizes = sorted(batch_sizes)
+        self.fraction = fraction
+        self.memory_budget_fraction = memory_budget_fraction
+        self.memory_bytes = memory_bytes
+        self.running_alone = running_alone
+        self.budget_bytes: Optional[float] = None
+        self.probes: List[dict] = []
+        self.contended = False
+
+    def _load_cache(self) -> Dict[str, dict]:
+        if not os.path.exists(self.cache_file_path):
+            return {}
+        try:
+            with open(self.cache_file_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.info(f'Ignoring unreadable calibration cache {self.cache_file_path}: {e}')
+            return {}
+
+    def _save_cache(self, key: str, calibration: dict) -> None:
+        cache = self._load_cache()
+        cache[key] = calibration
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file_path)), exist_ok=True)
+        with open(f'{self.cache_file_path}.tmp', 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(f'{self.cache_file_path}.tmp', self.cache_file_path)
+
+    def worker_candidates(self) -> List[int]:
+        cpus = os.cpu_count() or 1
+        return sorted({0, max(1, cpus // 2), cpus})
+
+    def calibrate(self, train_arguments: dict, dataset_dir: str) -> dict:
+        """
+        Returns the fastest stable configuration for `train_arguments`, from the cache when this machine
+        already calibrated the same dataset, model and image size.
+
+        Parameters:
+        train_arguments (dict): The ultralytics train arguments, their workers are tried first.
+        dataset_dir (str): The dataset the arguments train on.
+
+        Returns:
+        dict: batch, workers and cache to train with, their images/sec and peak memory, every probe,
+            whether another stage ran during a probe and whether it came from the cache.
+
+        Raises:
+        TrainingCancelledError: If a probe is cancelled.
+        """
+        machine = machine_summary(train_arguments.get('device', ''))
+        dataset = dataset_summary(dataset_dir)
+        key = fingerprint({
+            'version': CALIBRATION_VERSION,
+            'machine': machine,
+            'dataset': dataset,
+            'model': train_arguments['model'],
+            'imgsz': train_arguments['imgsz'],
+            'batch_sizes': self.batch_sizes
+        })
+        cached = self._load_cache().get(key)
+        if cached is not None:
+            logging.info(f'Using the cached training calibration: batch {cached["batch"]}, '
+                         f'{cached["workers"]} workers, cache {cached["cache"] or "off"}')
+            return dict(cached, cached=True)
+
+        started_at = time.perf_counter()
+        available = self.memory_bytes if self.memory_bytes is not None else available_memory_bytes()
+        self.budget_bytes = available * self.memory_budget_fraction if available else None
+        self.probes = []
+        self.contended = False
+        best = None
+
+        workers = train_arguments['workers']
+        for batch in self.batch_sizes:
+            result = self._probe(train_arguments, dataset['images'], batch=batch, workers=workers, cache='')
+            if result is None:
+                # larger batches only need more memory
+                break
+            if best is not None and result['images_per_sec'] < best['images_per_sec'] * MIN_SPEEDUP:
+                break
+            best = result
+
+        if best is None:
+            logging.info('Every calibration probe failed, training with the configured batch size and workers')
+            return {'batch': train_arguments['batch'], 'workers': workers, 'cache': '', 'images_per_sec': None,
+                    'peak_memory_mb': None, 'probes': self.probes, 'contended': self.contended, 'cached': False}
+
+        for workers in self.worker_candidates():
+            if workers == best['workers']:
+                continue
+            result = self._probe(train_arguments, dataset['images'], batch=best['batch'], workers=workers, cache='')
+            if result is not None and result['images_per_sec'] >= best['images_per_sec'] * MIN_SPEEDUP:
+                best = result
+
+        for cache in self.cache_candidates(train_arguments['imgsz'], dataset['images'], dataset_dir, best):
+            result = self._probe(train_arguments, dataset['images'], batch=best['batch'], workers=best['workers'],
+                                 cache=cache)
+            if result is not None and result['images_per_sec'] >= best['images_per_sec'] * MIN_SPEEDUP:
+                best = result
+
+        calibration = {
+            'batch': best['batch'],
+            'workers': best['workers'],
+            'cache': best['cache'],
+            'images_per_sec': best['images_per_sec'],
+            'peak_memory_mb': best['peak_memory_mb'],
+            'probes': self.probes,
+            'machine': machine,
+            'dataset': dataset,
+            'seconds': time.perf_counter() - started_at
+        }
+        if self.contended:
+            logging.info('Other work ran during the calibration probes, the calibration is not cached')
+        else:
+            self._save_cache(key, calibration)
+        calibration['contended'] = self.contended
+        logging.info(f'Calibrated training in {calibration["seconds"]:.0f}s: batch {best["batch"]}, '
+                     f'{best["workers"]} workers, cache {best["cache"] or "off"} at {best["images_per_sec"]:.1f} images/sec')
+        return dict(calibration, cached=False)
+
+    def cache_candidates(self, image_size: int, images: int, dataset_dir: str, best: dict) -> List[str]:
+        # probes cache only their fraction of the images, so whether the whole dataset fits is checked up front
+        cache_bytes = images * image_size * image_size * 3 * CACHED_IMAGE_OVERHEAD
+        candidates = []
+        peak_bytes = (best['peak_memory_mb'] or 0) * 1024 * 1024
+        if self.budget_bytes is not None and peak_bytes + cache_bytes <= self.budget_bytes:
+            candidates.append('ram')
+        if shutil.disk_usage(dataset_dir).free > 2 * cache_bytes:
+            candidates.append('disk')
+        return candidates
+
+    def _check_alone(self) -> None:
+        if self.running_alone is not None and not self.running_alone():
+            self.contended = True
+
+    def _probe(self, train_arguments: dict, images: int, batch: int, workers: int, cache: str) -> Optional[dict]:
+        fraction = min(1.0, max(self.fraction, PROBE_MIN_BATCHES * batch / images)) if images else 1.0
+        # a cache only pays off from the second epoch, so cache probes train two and time the last
+        probe_arguments = dict(train_arguments, batch=batch, workers=workers, cache=cache, epochs=2 if cache else 1,
+                               fraction=fraction, val=False, plots=False, name='calibration')
+        result = {'batch': batch, 'workers': workers, 'cache': cache, 'images_per_sec': None, 'peak_memory_mb': None}
+        self._check_alone()
+        try:
+            report = self.probe(probe_arguments)
+            self._check_alone()
+        except TrainingCancelledError:
+            raise
+        except TrainingError as e:
+            # usually out of memory
+            self.probes.append(dict(result, status='failed', error=str(e)[-500:]))
+            logging.info(f'Calibration probe {result} failed: {e}')
+            return None
+        epochs = report.get('epochs')
+        result.update(images_per_sec=epochs[-1]['images_per_sec'] if epochs else report['images_per_sec'],
+                      peak_memory_mb=report.get('peak_memory_mb'))
+        peak_bytes = (result['peak_memory_mb'] or 0) * 1024 * 1024
+        if self.budget_bytes is not None and peak_bytes > self.budget_bytes:
+            self.probes.append(dict(result, status='over memory budget'))
+            logging.info(f'Calibration probe {result} used more than {self.budget_bytes / 2 ** 20:.0f} MB')
+            return None
+        self.probes.append(dict(result, status='ok'))
+        logging.info(f'Calibration probe {result}')
+        return result
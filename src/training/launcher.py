@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import signal
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from src.logger import logging
+from src.exception import TrainingCancelledError, TrainingError
+from src.training.worker import EVENT_PREFIX
+
+# the share of an epoch spent waiting for batches above which the data loader is the bottleneck
+DATA_WAIT_WARNING_FRACTION = 0.2
+
+# the repository root, so the worker module can be imported whatever the working directory is
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def worker_command(train_arguments: dict) -> List[str]:
+    return [sys.executable, '-m', 'src.training.worker', json.dumps(train_arguments)]
+
+
+def summarize_events(events: List[dict]) -> dict:
+    """
+    Builds the training report from the worker's events: every epoch, the mean images/sec and data
+    loader wait, the weights and final metrics, and a warning when the data loader starved training.
+    """
+    epochs = [event for event in events if event['event'] == 'epoch']
+    finished = next((event for event in events if event['event'] == 'finished'), {})
+    train_seconds = sum(epoch['train_seconds'] for epoch in epochs)
+    data_wait_seconds = sum(epoch['data_wait_seconds'] for epoch in epochs)
+    report = {
+        'epochs': [{name: value for name, value in epoch.items() if name not in ('event', 'time')} for epoch in epochs],
+        'images_per_sec': sum(epoch['images'] for epoch in epochs) / train_seconds if train_seconds else 0.0,
+        'data_wait_fraction': data_wait_seconds / train_seconds if train_seconds else 0.0,
+        'best': finished.get('best'),
+        'last': finished.get('last'),
+        'save_dir': finished.get('save_dir'),
+        'metrics': finished.get('metrics', epochs[-1]['metrics'] if epochs else {}),
+        'peak_memory_mb': finished.get('peak_memory_mb'),
+        'image_cache': epochs[-1].get('image_cache') if epochs else None,
+        'warnings': []
+    }
+    if report['data_wait_fraction'] > DATA_WAIT_WARNING_FRACTION:
+        report['warnings'].append(
+            f"training waited for the data loader {report['data_wait_fraction']:.0%} of the time, "
+            f"more loader workers or caching images should speed it up"
+        )
+    return report
+
+
+class TrainingLauncher:
+    def __init__(self, command: List[str], on_event: Optional[Callable[[dict], None]] = None,
+                 cancel_grace_seconds: float = 10.0, log_tail_lines: int = 50):
+        """
+        Runs a training command as a managed subprocess: its output is streamed as it is produced,
+        progress events are parsed from it, the exit code is checked, and the run can be cancelled
+        from another thread.
+
+        Parameters:
+        command (list): The command to run, usually worker_command(train_arguments).
+        on_event (Callable): Called with every progress event as it arrives.
+        cancel_grace_seconds (float): How long a cancelled run may take to stop before it is killed.
+        log_tail_lines (int): The last lines of output kept for the error message of a failed run.
+        """
+        self.command = command
+        self.on_event = on_event
+        self.cancel_grace_seconds = cancel_grace_seconds
+        self.events: List[dict] = []
+        self.log_tail = deque(maxlen=log_tail_lines)
+        self.process: Optional[subprocess.Popen] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self) -> Dict:
+        """
+        Runs the command to completion.
+
+        Returns:
+        dict: The training report, see summarize_events.
+
+        Raises:
+        TrainingError: If the run exits with an error.
+        TrainingCancelledError: If the run is cancelled.
+        """
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+        with self._lock:
+            if self._cancelled.is_set():
+                raise TrainingCancelledError('Training was cancelled before it started')
+            # a session of its own, so cancelling also stops the data loader worker processes
+            self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                            bufsize=1, env=env, start_new_session=True)
+        for line in self.process.stdout:
+            line = line.rstrip('\n')
+            if line.startswith(EVENT_PREFIX):
+                self._handle_event(json.loads(line[len(EVENT_PREFIX):]))
+            elif line:
+                self.log_tail.append(line)
+                logging.info(f'[training] {line}')
+        return_code = self.process.wait()
+
+        if self._cancelled.is_set():
+            raise TrainingCancelledError('Training was cancelled')
+        errors = [event['message'] for event in self.events if event['event'] == 'error']
+        if return_code != 0:
+            details = errors[-1] if errors else '\n'.join(self.log_tail)
+            raise TrainingError(f'Training exited with code {return_code}: {details}')
+        report = summarize_events(self.events)
+        for warning in report['warnings']:
+            logging.info(f'Training warning: {warning}')
+        return report
+
+    def _handle_event(self, event: dict) -> None:
+        self.events.append(event)
+        if event['event'] == 'epoch':
+            logging.info(f"Epoch {event['epoch']}/{event['epochs']}: {event['images_per_sec']:.1f} images/sec, "
+                         f"data loader wait {event['data_wait_fraction']:.0%}, metrics {event['metrics']}")
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def cancel(self) -> None:
+        """
+        Stops the run: SIGTERM to the run's process group, then SIGKILL once the grace period is over.
+        """
+        with self._lock:
+            self._cancelled.set()
+            process = self.process
+        if process is None or process.poll() is not None:
+            return
+        logging.info('Cancelling training')
+        self._stop(process, kill=False)
+
+        def kill_after_grace():
+            try:
+                process.wait(self.cancel_grace_seconds)
+            except subprocess.TimeoutExpired:
+                self._stop(process, kill=True)
+        threading.Thread(target=kill_after_grace, daemon=True).start()
+
+    @staticmethod
+    def _stop(process: subprocess.Popen, kill: bool) -> None:
+        if not hasattr(os, 'killpg'):
+            # no process groups on Windows, only the run itself is stopped
+            process.kill() if kill else process.terminate()
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
@@ -0,0 +1,122 @@
+"""
+Runs one ultralytics training run and reports its progress as events on stdout.
+
+Started by TrainingLauncher as `python -m src.training.worker '<json train arguments>'`. Every event is
+one line of EVENT_PREFIX followed by a JSON object; everything else on stdout is ultralytics' own log.
+"""
+import sys
+import json
+import time
+from typing import Any, Callable, List, Optional
+
+EVENT_PREFIX = '@@training-event '
+
+
+def emit(event: str, **fields: Any) -> None:
+    print(EVENT_PREFIX + json.dumps({'event': event, 'time': time.time(), **fields}, default=str), flush=True)
+
+
+def to_floats(values: Any) -> List[float]:
+    # losses arrive as tensors, a scalar tensor or None
+    if values is None:
+        return []
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+    return [float(value) for value in (values if isinstance(values, (list, tuple)) else [values])]
+
+
+def peak_memory_mb() -> Optional[float]:
+    """
+    Returns the peak resident memory of the run: the trainer plus the largest finished data loader
+    worker, an estimate since workers share most of their pages with the trainer.
+    """
+    try:
+        import resource
+    except ImportError:
+        # no resource module on Windows
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 / (1024 * 1024) if sys.platform == 'darwin' else 1 / 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss +
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+
+
+class ThroughputCallbacks:
+    def __init__(self, emit: Callable[..., None] = emit, clock: Callable[[], float] = time.perf_counter):
+        """
+        Measures every epoch from ultralytics trainer callbacks: the training time, images/sec, and how
+        long the training loop waited for the data loader, i.e. the time from the end of one batch to
+        the start of the next. A large share of waiting means the loader, not the model, is the bottleneck.
+        """
+        self.emit = emit
+        self.clock = clock
+        self.epoch = {}
+
+    def on_train_epoch_start(self, trainer) -> None:
+        now = self.clock()
+        self.epoch = {'started_at': now, 'last_batch_end': now, 'data_wait': 0.0, 'batches': 0, 'train_seconds': 0.0}
+
+    def on_train_batch_start(self, trainer) -> None:
+        self.epoch['data_wait'] += self.clock() - self.epoch['last_batch_end']
+
+    def on_train_batch_end(self, trainer) -> None:
+        self.epoch['batches'] += 1
+        self.epoch['last_batch_end'] = self.clock()
+
+    def on_train_epoch_end(self, trainer) -> None:
+        self.epoch['train_seconds'] = self.clock() - self.epoch['started_at']
+
+    def on_fit_epoch_end(self, trainer) -> None:
+        # after validation, so the epoch's metrics are known
+        images = self.epoch['batches'] * trainer.batch_size
+        dataset = getattr(getattr(trainer, 'train_loader', None), 'dataset', None)
+        if dataset is not None:
+            # the last batch of an epoch is usually smaller
+            images = min(images, len(dataset))
+        train_seconds = self.epoch['train_seconds']
+        self.emit(
+            'epoch',
+            epoch=trainer.epoch + 1,
+            epochs=trainer.epochs,
+            images=images,
+            train_seconds=train_seconds,
+            seconds=self.clock() - self.epoch['started_at'],
+            images_per_sec=images / train_seconds if train_seconds else 0.0,
+            data_wait_seconds=self.epoch['data_wait'],
+            data_wait_fraction=self.epoch['data_wait'] / train_seconds if train_seconds else 0.0,
+            loss=to_floats(getattr(trainer, 'tloss', None)),
+            metrics={name: float(value) for name, value in (getattr(trainer, 'metrics', None) or {}).items()},
+            image_cache=trainer.image_cache_stats() if hasattr(trainer, 'image_cache_stats') else None
+        )
+
+    def register(self, model) -> None:
+        for name in ('on_train_epoch_start', 'on_train_batch_start', 'on_train_batch_end',
+                     'on_train_epoch_end', 'on_fit_epoch_end'):
+            model.add_callback(name, getattr(self, name))
+
+
+def main(argv: List[str] = None) -> int:
+    train_arguments = json.loads((argv or sys.argv[1:])[0])
+    try:
+        from ultralytics import YOLO
+        model = YOLO(train_arguments.pop('model'))
+        image_cache = train_arguments.pop('image_cache', None)
+        if image_cache:
+            from src.training.cached_dataset import cached_trainer
+            train_arguments['trainer'] = cached_trainer(**image_cache)
+        ThroughputCallbacks().register(model)
+        emit('started', arguments={name: value for name, value in train_arguments.items() if name != 'trainer'},
+             image_cache=image_cache)
+        model.train(**train_arguments)
+        trainer = model.trainer
+        emit('finished', best=str(trainer.best), last=str(trainer.last), save_dir=str(trainer.save_dir),
+             metrics={name: float(value) for name, value in (trainer.metrics or {}).items()},
+             peak_memory_mb=peak_memory_mb())
+        return 0
+    except Exception as e:
+        emit('error', message=f'{type(e).__name__}: {e}')
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
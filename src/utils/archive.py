@@ -0,0 +1,275 @@
+import os
+import zlib
+import struct
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Optional
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from src.logger import logging
+
+LOCAL_FILE_HEADER = struct.Struct('<4sHHHHHIIIHH')
+LOCAL_FILE_SIGNATURE = b'PK\x03\x04'
+DATA_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+# the first record after the last member
+CENTRAL_DIRECTORY_SIGNATURES = (b'PK\x01\x02', b'PK\x05\x06', b'PK\x06\x06')
+
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+ZIP64_EXTRA_ID = 0x0001
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def open_url_stream(url: str) -> BinaryIO:
+    """
+    Opens a url for sequential reading: http(s):// through requests, file:// or a plain path from disk.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme in ('http', 'https'):
+        import requests
+        response = requests.get(url, stream=True, timeout=60)
+        response.raise_for_status()
+        # undo any transfer encoding such as gzip, the zip bytes themselves are what we parse
+        response.raw.decode_content = True
+        return response.raw
+    if parsed.scheme == 'file':
+        return open(url2pathname(parsed.path), 'rb')
+    return open(url, 'rb')
+
+
+def safe_member_path(root: str, member_name: str) -> str:
+    # the same protection as zipfile.extractall: no absolute paths and no escaping the root with ..
+    parts = [part for part in member_name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if any(part == '..' for part in parts):
+        raise ValueError(f'Refusing to extract {member_name} outside of {root}')
+    return os.path.join(root, *parts)
+
+
+def file_crc32(file_path: str) -> int:
+    crc = 0
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def is_extracted(destination: str, size: int, crc: Optional[int]) -> bool:
+    """
+    True when `destination` already holds the member: same size first, then the same CRC-32.
+    """
+    if not os.path.isfile(destination) or os.path.getsize(destination) != size:
+        return False
+    return crc is not None and file_crc32(destination) == crc
+
+
+class _StreamReader:
+    def __init__(self, stream: BinaryIO):
+        # a reader that can push back bytes read past the end of a deflate stream
+        self.stream = stream
+        self._pending = b''
+        self.position = 0
+
+    def read(self, size: int) -> bytes:
+        data = self._pending[:size]
+        self._pending = self._pending[size:]
+        while len(data) < size:
+            block = self.stream.read(min(CHUNK_SIZE, size - len(data)))
+            if not block:
+                break
+            data += block
+        self.position += len(data)
+        return data
+
+    def read_exact(self, size: int) -> bytes:
+        data = self.read(size)
+        if len(data) != size:
+            raise zipfile.BadZipFile(f'Archive ended early at byte {self.position}')
+        return data
+
+    def unread(self, data: bytes) -> None:
+        self._pending = data + self._pending
+        self.position -= len(data)
+
+
+class StreamingZipExtractor:
+    def __init__(self, destination: str):
+        """
+        Extracts a zip archive while it is being read, from the local file headers in stream order, so
+        nothing has to be downloaded in full and no copy of the archive is kept on disk.
+
+        Every member is written to a temporary file, checked against the CRC-32 in the archive and then
+        moved into place, so an interrupted run never leaves a truncated file behind. Members that already
+        exist with the same size and CRC are read past without being written.
+
+        Parameters:
+        destination (str): The directory to extract into.
+        """
+        self.destination = destination
+        self.stats: Dict[str, int] = {'members': 0, 'extracted': 0, 'skipped': 0, 'bytes_written': 0}
+
+    def extract(self, stream: BinaryIO) -> Dict[str, int]:
+        reader = _StreamReader(stream)
+        os.makedirs(self.destination, exist_ok=True)
+        while True:
+            signature = reader.read(4)
+            if len(signature) < 4 or signature in CENTRAL_DIRECTORY_SIGNATURES:
+                break
+            if signature != LOCAL_FILE_SIGNATURE:
+                raise zipfile.BadZipFile(f'Unexpected record {signature!r} at byte {reader.position - 4}')
+            self._extract_member(reader, signature + reader.read_exact(LOCAL_FILE_HEADER.size - 4))
+        logging.info(f'Streamed {self.stats} into {self.destination}')
+        return self.stats
+
+    def _extract_member(self, reader: _StreamReader, header: bytes) -> None:
+        (_, _, flags, method, _, _, crc, compressed_size, file_size,
+         name_length, extra_length) = LOCAL_FILE_HEADER.unpack(header)
+        name = reader.read_exact(name_length).decode('utf-8' if flags & 0x800 else 'cp437')
+        extra = reader.read_exact(extra_length)
+        if flags & FLAG_ENCRYPTED:
+            raise zipfile.BadZipFile(f'Encrypted member {name} is not supported')
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise zipfile.BadZipFile(f'Compression method {method} of {name} is not supported')
+
+        # a zip64 extra field also means the data descriptor, if any, holds 8 byte sizes
+        zip64, file_size, compressed_size = self._zip64_sizes(extra, file_size, compressed_size)
+        has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+        if has_descriptor and method == zipfile.ZIP_STORED:
+            # without a length a stored member's end cannot be found in a stream
+            raise zipfile.BadZipFile(f'Stored member {name} with a data descriptor cannot be streamed')
+
+        self.stats['members'] += 1
+        target = safe_member_path(self.destination, name)
+        if name.endswith('/'):
+            os.makedirs(target, exist_ok=True)
+            # a directory can still carry an empty deflate stream
+            self._decompress(reader, method, compressed_size, has_descriptor, None)
+            if has_descriptor:
+                self._read_descriptor(reader, zip64)
+            return
+
+        skip = not has_descriptor and is_extracted(target, file_size, crc)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f'{target}.part'
+        out = None if skip else open(temp_path, 'wb')
+        try:
+            try:
+                actual_crc, actual_size = self._decompress(reader, method, compressed_size, has_descriptor, out)
+            finally:
+                if out is not None:
+                    out.close()
+            if has_descriptor:
+                crc, _, file_size = self._read_descriptor(reader, zip64)
+            if actual_crc != crc or actual_size != file_size:
+                raise zipfile.BadZipFile(f'CRC or size mismatch for {name}')
+            if skip:
+                self.stats['skipped'] += 1
+            elif has_descriptor and is_extracted(target, file_size, crc):
+                # only known after reading it, the member was already in place
+                os.remove(temp_path)
+                self.stats['skipped'] += 1
+            else:
+                os.replace(temp_path, target)
+                self.stats['extracted'] += 1
+                self.stats['bytes_written'] += actual_size
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _zip64_sizes(extra: bytes, file_size: int, compressed_size: int):
+        position = 0
+        while position + 4 <= len(extra):
+            header_id, size = struct.unpack('<HH', extra[position:position + 4])
+            if header_id == ZIP64_EXTRA_ID:
+                values = extra[position + 4:position + 4 + size]
+                offset = 0
+                if file_size == 0xFFFFFFFF:
+                    file_size = struct.unpack('<Q', values[offset:offset + 8])[0]
+                    offset += 8
+                if compressed_size == 0xFFFFFFFF:
+                    compressed_size = struct.unpack('<Q', values[offset:offset + 8])[0]
+                return True, file_size, compressed_size
+            position += 4 + size
+        return False, file_size, compressed_size
+
+    @staticmethod
+    def _decompress(reader: _StreamReader, method: int, compressed_size: int, has_descriptor: bool,
+                    out: Optional[BinaryIO]):
+        crc, size = 0, 0
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if method == zipfile.ZIP_DEFLATED else None
+        remaining = None if has_descriptor else compressed_size
+        while remaining is None or remaining > 0:
+            block = reader.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not block:
+                raise zipfile.BadZipFile('Archive ended inside a member')
+            if remaining is not None:
+                remaining -= len(block)
+            data = decompressor.decompress(block) if decompressor is not None else block
+            if decompressor is not None and decompressor.eof:
+                # the deflate stream ended inside this block, the rest belongs to the next record
+                reader.unread(decompressor.unused_data)
+                remaining = 0
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            if out is not None:
+                out.write(data)
+        return crc, size
+
+    @staticmethod
+    def _read_descriptor(reader: _StreamReader, zip64: bool):
+        signature = reader.read_exact(4)
+        if signature != DATA_DESCRIPTOR_SIGNATURE:
+            # the signature is optional, then these four bytes are already the CRC
+            reader.unread(signature)
+        if zip64:
+            return struct.unpack('<IQQ', reader.read_exact(20))
+        return struct.unpack('<III', reader.read_exact(12))
+
+
+def _extract_one(zip_file_path: str, member: zipfile.ZipInfo, destination: str) -> int:
+    target = safe_member_path(destination, member.filename)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_path = f'{target}.part'
+    try:
+        # a ZipFile per task, a shared handle would serialize the reads; zipfile checks the CRC at the end
+        with zipfile.ZipFile(zip_file_path) as archive, archive.open(member) as source, open(temp_path, 'wb') as out:
+            shutil.copyfileobj(source, out, CHUNK_SIZE)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return member.file_size
+
+
+def extract_zip_parallel(zip_file_path: str, destination: str, workers: int = 4) -> Dict[str, int]:
+    """
+    Extracts a zip archive across a thread pool using its central directory, skipping members that
+    already exist with the same size and CRC-32. zlib releases the GIL, so threads decompress in parallel.
+
+    Returns:
+    dict: The number of members, how many were extracted and skipped, and the bytes written.
+    """
+    os.makedirs(destination, exist_ok=True)
+    with zipfile.ZipFile(zip_file_path) as archive:
+        members = archive.infolist()
+    stats = {'members': len(members), 'extracted': 0, 'skipped': 0, 'bytes_written': 0}
+    pending = []
+    for member in members:
+        if member.is_dir():
+            os.makedirs(safe_member_path(destination, member.filename), exist_ok=True)
+        elif is_extracted(safe_member_path(destination, member.filename), member.file_size, member.CRC):
+            stats['skipped'] += 1
+        else:
+            pending.append(member)
+
+    # largest first, so one big member does not end up running alone at the end
+    pending.sort(key=lambda member: member.compress_size, reverse=True)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for size in pool.map(lambda member: _extract_one(zip_file_path, member, destination), pending):
+            stats['extracted'] += 1
+            stats['bytes_written'] += size
+    logging.info(f'Extracted {stats} into {destination}')
+    return stats
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where downloads of the same url are not serialized across processes
+    fcntl = None
+
+from src.logger import logging
+from src.exception import DownloadError
+from src.utils.main_utils import file_sha256, link_or_copy
+
+
+class DownloadManager:
+    def __init__(self, cache_dir: str, chunk_size: int = 8 * 1024 * 1024, workers: int = 4,
+                 retries: int = 5, timeout: float = 60.0):
+        """
+        Downloads files into a content-addressed cache shared by every run on the machine.
+
+        Completed downloads are stored once under blobs/<sha256> and a url index maps each url to its
+        blob, so the same url, or a different url with a known SHA-256 that is already cached, is never
+        fetched again. Downloads go to a .part file: when the server supports ranges, large files are
+        fetched in parallel chunks whose completion is recorded next to the .part file, and an
+        interrupted download resumes from the chunks or bytes it already has. A lock file per url
+        makes a second process wait for a download in progress and then use its result.
+
+        Parameters:
+        cache_dir (str): The root of the cache.
+        chunk_size (int): The size of one ranged request, and the file size from which chunks are used.
+        workers (int): The number of chunks fetched in parallel.
+        retries (int): Attempts per request before the download fails.
+        timeout (float): The connect and read timeout of every request in seconds.
+        """
+        self.cache_dir = cache_dir
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+        self.blobs_dir = os.path.join(cache_dir, 'blobs')
+        self.urls_dir = os.path.join(cache_dir, 'urls')
+        self.partial_dir = os.path.join(cache_dir, 'partial')
+        self._local = threading.local()
+
+    # cache index
+
+    def _url_index_path(self, url: str) -> str:
+        return os.path.join(self.urls_dir, f'{hashlib.sha256(url.encode()).hexdigest()}.json')
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blobs_dir, sha256)
+
+    def cached(self, url: str, sha256: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the cached file for a url, or for an expected SHA-256 whatever url it came from.
+        """
+        if sha256:
+            return self.blob_path(sha256) if os.path.exists(self.blob_path(sha256)) else None
+        index_path = self._url_index_path(url)
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, 'r') as f:
+            blob = self.blob_path(json.load(f)['sha256'])
+        return blob if os.path.exists(blob) else None
+
+    def add_file(self, url: str, file_path: str, sha256: Optional[str] = None) -> str:
+        """
+        Moves a completed download into the cache, verifying it against `sha256` when given.
+        """
+        digest = file_sha256(file_path)
+        if sha256 and digest != sha256.lower():
+            os.remove(file_path)
+            raise DownloadError(f'SHA-256 mismatch for {url}: expected {sha256}, got {digest}')
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.urls_dir, exist_ok=True)
+        blob = self.blob_path(digest)
+        os.replace(file_path, blob)
+        index_path = self._url_index_path(url)
+        with open(f'{index_path}.tmp', 'w') as f:
+            json.dump({'url': url, 'sha256': digest, 'size': os.path.getsize(blob), 'fetched_at': time.time()}, f)
+        os.replace(f'{index_path}.tmp', index_path)
+        return blob
+
+    @contextmanager
+    def _url_lock(self, url: str) -> Iterator[None]:
+        # an exclusive lock on partial/<sha(url)>.lock, held while the url's .part file is written
+        os.makedirs(self.partial_dir, exist_ok=True)
+        with open(os.path.join(self.partial_dir, f'{hashlib.sha256(url.encode()).hexdigest()}.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    # network
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+        return session
+
+    def _with_retries(self, description: str, request):
+        delay = 0.5
+        for attempt in range(1, self.retries + 1):
+            try:
+                return request()
+            except Exception as e:
+                if attempt == self.retries:
+                    raise DownloadError(f'{description} failed after {self.retries} attempts: {e}') from e
+                logging.info(f'{description} failed ({e}), retrying in {delay:.1f}s')
+                time.sleep(delay)
+                delay = min(delay * 2, 10.0)
+
+    def _probe(self, url: str) -> Tuple[Optional[int], bool, Optional[str]]:
+        # size, whether byte ranges are supported, and a validator to detect a changed file on resume
+        response = self._with_retries(f'HEAD {url}', lambda: self._session().head(
+            url, allow_redirects=True, timeout=self.timeout))
+        if response.status_code >= 400:
+            return None, False, None
+        size = response.headers.get('Content-Length')
+        accepts_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        return (int(size) if size is not None else None), accepts_ranges, validator
+
+    def _fetch_range(self, url: str, part_path: str, start: int, end: int) -> None:
+        def request():
+            response = self._session().get(url, headers={'Range': f'bytes={start}-{end}'}, stream=True,
+                                           timeout=self.timeout)
+            if response.status_code != 206:
+                raise DownloadError(f'expected 206 for bytes {start}-{end}, got {response.status_code}')
+            data = response.content
+            if len(data) != end - start + 1:
+                raise DownloadError(f'got {len(data)} of {end - start + 1} bytes for {start}-{end}')
+            with open(part_path, 'r+b') as f:
+                f.seek(start)
+                f.write(data)
+        self._with_retries(f'GET {url} bytes {start}-{end}', request)
+
+    def _download_chunked(self, url: str, part_path: str, size: int, validator: Optional[str]) -> None:
+        state_path = f'{part_path}.json'
+        done: List[int] = []
+        if os.path.exists(state_path) and os.path.exists(part_path):
+            with open(state_path, 'r') as f:
+                state = json.load(f)
+            if state.get('validator') == validator and state.get('size') == size and state.get('chunk_size') == self.chunk_size:
+                done = state['done']
+        if not done:
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+
+        lock = threading.Lock()
+        already_done = set(done)
+        chunks = [index for index in range((size + self.chunk_size - 1) // self.chunk_size) if index not in already_done]
+        if done:
+            logging.info(f'Resuming {url}: {len(done)} chunks already downloaded, {len(chunks)} left')
+
+        def fetch(index: int) -> None:
+            start = index * self.chunk_size
+            self._fetch_range(url, part_path, start, min(start + self.chunk_size, size) - 1)
+            with lock:
+                done.append(index)
+                with open(f'{state_path}.tmp', 'w') as f:
+                    json.dump({'validator': validator, 'size': size, 'chunk_size': self.chunk_size, 'done': done}, f)
+                os.replace(f'{state_path}.tmp', state_path)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            list(pool.map(fetch, chunks))
+
+    def _download_sequential(self, url: str, part_path: str, accepts_ranges: bool, size: Optional[int],
+                             validator: Optional[str]) -> None:
+        # a .part file is only resumed when the server still reports the file it was started from
+        state_path = f'{part_path}.json'
+        if os.path.exists(part_path):
+            state = {}
+            if os.path.exists(state_path):
+                with open(state_path, 'r') as f:
+                    state = json.load(f)
+            if not (validator and state.get('validator') == validator and state.get('size') == size
+                    and 'done' not in state):
+                logging.info(f'Discarding the partial download of {url}, the file changed or cannot be checked')
+                os.remove(part_path)
+        with open(f'{state_path}.tmp', 'w') as f:
+            json.dump({'validator': validator, 'size': size}, f)
+        os.replace(f'{state_path}.tmp', state_path)
+
+        def request():
+            offset = os.path.getsize(part_path) if accepts_ranges and os.path.exists(part_path) else 0
+            headers = {'Range': f'bytes={offset}-'} if offset else {}
+            response = self._session().get(url, headers=headers, stream=True, timeout=self.timeout)
+            if response.status_code == 416:
+                # the partial file already holds everything
+                return
+            response.raise_for_status()
+            # a server that ignores the range sends the whole file again
+            mode = 'ab' if offset and response.status_code == 206 else 'wb'
+            with open(part_path, mode) as f:
+                for block in response.iter_content(64 * 1024):
+                    f.write(block)
+        self._with_retries(f'GET {url}', request)
+
+    def download(self, url: str, sha256: Optional[str] = None, destination: Optional[str] = None) -> str:
+        """
+        Returns a local copy of `url`, from the cache when possible.
+
+        Parameters:
+        url (str): The http(s) url to download.
+        sha256 (str): The expected SHA-256; the download fails when the content differs.
+        destination (str): Where to place the file; by default the cached blob itself is returned.
+
+        Returns:
+        str: The path of the downloaded file.
+
+        Raises:
+        DownloadError: If the download fails after retries or its SHA-256 does not match.
+        """
+        blob = self.cached(url, sha256)
+        if blob is None:
+            with self._url_lock(url):
+                # another process may have finished the download while this one waited for the lock
+                blob = self.cached(url, sha256)
+                if blob is None:
+                    blob = self._download(url, sha256)
+        else:
+            logging.info(f'Using cached download of {url}: {blob}')
+
+        if destination is None:
+            return blob
+        link_or_copy(blob, destination)
+        return destination
+
+    def _download(self, url: str, sha256: Optional[str]) -> str:
+        part_path = os.path.join(self.partial_dir, f'{hashlib.sha256(url.encode()).hexdigest()}.part')
+        size, accepts_ranges, validator = self._probe(url)
+        started_at = time.perf_counter()
+        if accepts_ranges and size is not None and size > self.chunk_size:
+            self._download_chunked(url, part_path, size, validator)
+        else:
+            self._download_sequential(url, part_path, accepts_ranges, size, validator)
+        elapsed = time.perf_counter() - started_at
+        downloaded = os.path.getsize(part_path)
+        if size is not None and downloaded != size:
+            # the .part file is kept, the next attempt resumes from it
+            raise DownloadError(f'Downloaded {downloaded} of {size} bytes of {url}')
+        # the resume state goes only once the .part file is known to be complete
+        if os.path.exists(f'{part_path}.json'):
+            os.remove(f'{part_path}.json')
+        logging.info(f'Downloaded {url}: {downloaded / 2 ** 20:.1f} MB in {elapsed:.1f}s '
+                     f'({downloaded / 2 ** 20 / max(elapsed, 1e-9):.1f} MB/s)')
+        return self.add_file(url, part_path, sha256)
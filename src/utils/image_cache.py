@@ -0,0 +1,181 @@
+import os
+import json
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.logger import logging
+from src.utils.manifest import fingerprint
+
+COUNTERS = ('memory_hits', 'disk_hits', 'misses', 'evictions')
+
+CachedImage = Tuple[np.ndarray, dict]
+
+
+def decode_image(image_path: str) -> CachedImage:
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f'Cannot decode {image_path}')
+    return image, {'height': image.shape[0], 'width': image.shape[1]}
+
+
+class DecodedImageCache:
+    def __init__(self, memory_budget_bytes: int, disk_dir: Optional[str] = None, params: Optional[dict] = None):
+        """
+        Keeps decoded, preprocessed images so they are decoded once rather than once per epoch.
+
+        The memory tier holds up to `memory_budget_bytes` of images and evicts the least recently used.
+        The optional disk tier keeps every image as a .npy file, so it outlives the process. Disk hits
+        are returned as read-only memory maps and not copied into the memory tier, so data loader
+        workers and later runs share the pages of the OS page cache rather than each holding a copy.
+        An entry is keyed on the source's path, size and modification time, so an edited image is
+        decoded again.
+
+        Images come back read-only, callers that modify an image copy it first. The hit and miss
+        counters live in shared memory, so they add up across forked data loader workers.
+
+        Parameters:
+        memory_budget_bytes (int): The size of the memory tier, 0 keeps nothing in memory.
+        disk_dir (str): The directory of the disk tier, no disk tier when not set.
+        params (dict): Everything besides the source that the cached images depend on, e.g. the image size;
+            the disk tier keeps each set of params apart.
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.params = params or {}
+        self.disk_dir = os.path.join(disk_dir, fingerprint(self.params)[:16]) if disk_dir else None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self.memory_bytes = 0
+        self._entries: 'OrderedDict[str, CachedImage]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = multiprocessing.Array('q', len(COUNTERS))
+
+    def __getstate__(self) -> dict:
+        # a worker started with spawn gets an empty memory tier of its own and the shared counters
+        state = dict(self.__dict__, _entries=OrderedDict(), memory_bytes=0)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _key(self, image_path: str, variant: str) -> str:
+        stat = os.stat(image_path)
+        return f'{os.path.abspath(image_path)}|{stat.st_size}|{stat.st_mtime_ns}|{variant}'
+
+    def _count(self, counter: str) -> None:
+        with self._counters.get_lock():
+            self._counters[COUNTERS.index(counter)] += 1
+
+    def get(self, image_path: str, decode: Callable[[str], CachedImage] = decode_image,
+            variant: str = '') -> CachedImage:
+        """
+        Returns the cached image of `image_path`, decoding it with `decode` on a miss.
+
+        Parameters:
+        image_path (str): The source image.
+        decode (Callable): Returns the preprocessed image and a JSON-serializable dict of information about it.
+        variant (str): Tells apart different preprocessings of the same source within one cache.
+
+        Returns:
+        tuple: The read-only image and its information.
+        """
+        key = self._key(image_path, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            self._count('memory_hits')
+            return entry
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._count('disk_hits')
+            # mapped read-only from the page cache, a copy in the memory tier would only duplicate it
+            return entry
+
+        self._count('misses')
+        image, info = decode(image_path)
+        # a copy, so the caller may go on modifying the image it decoded
+        entry = (np.array(image), dict(info or {}))
+        self._write_disk(key, entry)
+        entry[0].flags.writeable = False
+        self._put(key, entry)
+        return entry
+
+    def _put(self, key: str, entry: CachedImage) -> None:
+        size = entry[0].nbytes
+        if size > self.memory_budget_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = entry
+            self.memory_bytes += size
+            while self.memory_bytes > self.memory_budget_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.memory_bytes -= evicted.nbytes
+                self._count('evictions')
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha1(key.encode()).hexdigest())
+
+    def _read_disk(self, key: str) -> Optional[CachedImage]:
+        if not self.disk_dir:
+            return None
+        disk_path = self._disk_path(key)
+        try:
+            # the .json is written first, so a complete .npy always has its information
+            image = np.load(f'{disk_path}.npy', mmap_mode='r')
+            with open(f'{disk_path}.json', 'r') as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return image, info
+
+    def _write_disk(self, key: str, entry: CachedImage) -> None:
+        if not self.disk_dir:
+            return
+        disk_path = self._disk_path(key)
+        # pid in the temporary names, so loader workers decoding the same image do not collide
+        suffix = f'{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(f'{disk_path}.json.{suffix}', 'w') as f:
+                json.dump(entry[1], f)
+            os.replace(f'{disk_path}.json.{suffix}', f'{disk_path}.json')
+            with open(f'{disk_path}.npy.{suffix}', 'wb') as f:
+                np.save(f, entry[0])
+            os.replace(f'{disk_path}.npy.{suffix}', f'{disk_path}.npy')
+        except OSError as e:
+            # a full disk only costs the decode next time
+            logging.info(f'Cannot write {disk_path} to the image cache: {e}')
+
+    def clear(self) -> None:
+        """
+        Empties the memory tier; the disk tier is kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the hit, miss and eviction counts of every process sharing the cache, and the entries
+        and bytes held by this process's memory tier.
+        """
+        with self._counters.get_lock():
+            counts = dict(zip(COUNTERS, self._counters[:]))
+        lookups = counts['memory_hits'] + counts['disk_hits'] + counts['misses']
+        return dict(
+            counts,
+            hit_rate=(counts['memory_hits'] + counts['disk_hits']) / lookups if lookups else 0.0,
+            entries=len(self._entries),
+            memory_bytes=self.memory_bytes
+        )
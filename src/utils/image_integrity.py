@@ -0,0 +1,206 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# dHash bits are compared in this many bands; two hashes within BANDS - 1 bits of each other always
+# share at least one band exactly, so near duplicates are found without comparing every pair
+HASH_BANDS = 4
+
+
+def read_image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Reads the width and height of a JPEG, PNG, BMP or WebP image from its header, without decoding it.
+
+    Returns:
+    tuple: (width, height), or None when the header cannot be parsed.
+    """
+    if data[:2] == b'\xff\xd8':
+        return _jpeg_size(data)
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+        return int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+    if data[:2] == b'BM' and len(data) >= 26:
+        if int.from_bytes(data[14:18], 'little') == 12:
+            return int.from_bytes(data[18:20], 'little'), int.from_bytes(data[20:22], 'little')
+        # a negative height marks a top-down bitmap
+        return (int.from_bytes(data[18:22], 'little', signed=True),
+                abs(int.from_bytes(data[22:26], 'little', signed=True)))
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            return int.from_bytes(data[26:28], 'little') & 0x3FFF, int.from_bytes(data[28:30], 'little') & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    return None
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    position = 2
+    while position + 9 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:
+            # fill byte before a marker
+            position += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # markers without a length
+            position += 2
+            continue
+        # every start of frame marker except DHT, JPG and DAC, which share the range
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return int.from_bytes(data[position + 7:position + 9], 'big'), int.from_bytes(data[position + 5:position + 7], 'big')
+        position += 2 + int.from_bytes(data[position + 2:position + 4], 'big')
+    return None
+
+
+def dhash(gray: np.ndarray) -> str:
+    """
+    Returns the 64 bit difference hash of a grayscale image as 16 hex digits: whether each pixel of a
+    9x8 thumbnail is brighter than its right neighbour. Re-encoding, resizing and small colour changes
+    leave it (nearly) unchanged.
+    """
+    thumbnail = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).flatten()
+    return f'{int("".join("1" if bit else "0" for bit in bits), 2):016x}'
+
+
+def inspect_image(file_path: str, decode: str = 'header', with_hash: bool = True) -> dict:
+    """
+    Inspects one image from a single read of the file.
+
+    Parameters:
+    file_path (str): The image to inspect.
+    decode (str): "header" reads the size from the header, and only decodes at 1/8 scale when the
+        perceptual hash is needed; "full" decodes the whole image, which catches corrupt image data.
+    with_hash (bool): Whether to compute the perceptual hash used to find duplicates.
+
+    Returns:
+    dict: The file's SHA-256, width, height, perceptual hash and the problem found, if any.
+    """
+    data = np.fromfile(file_path, dtype=np.uint8)
+    result = {'sha256': hashlib.sha256(data).hexdigest(), 'width': None, 'height': None, 'dhash': None,
+              'problem': None}
+    if decode == 'full':
+        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if image is None:
+            result['problem'] = 'image data could not be decoded'
+            return result
+        result['height'], result['width'] = image.shape[:2]
+        if with_hash:
+            result['dhash'] = dhash(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+        return result
+
+    # the frame header follows the APP segments, an EXIF thumbnail can push it past 64 KB
+    size = read_image_size(data[:256 * 1024].tobytes())
+    if size is None or min(size) <= 0:
+        result['problem'] = 'image size could not be read from the header'
+        return result
+    result['width'], result['height'] = size
+    if with_hash:
+        # JPEGs decode at 1/8 scale almost for free, which is plenty for a 9x8 thumbnail
+        thumbnail = cv2.imdecode(data, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if thumbnail is not None and (thumbnail.shape[0] < 8 or thumbnail.shape[1] < 9):
+            # too small to scale down, decode it at full size
+            thumbnail = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+        if thumbnail is None:
+            result['problem'] = 'image data could not be decoded'
+            return result
+        result['dhash'] = dhash(thumbnail)
+    return result
+
+
+def check_labels_against_image(label_path: str, width: int, height: int, nc: Optional[int],
+                               min_box_pixels: float = 2.0) -> List[Tuple[str, str]]:
+    """
+    Checks the rows of a YOLO label file against its image: the class must be below `nc`, a box must
+    lie inside the image and be at least `min_box_pixels` wide and high. Rows that are malformed are
+    left to the label format check.
+
+    Returns:
+    list: (check, message) for every problem found.
+    """
+    problems = []
+    with open(label_path, 'r') as f:
+        for line_number, line in enumerate(f, start=1):
+            values = line.split()
+            try:
+                class_id = int(values[0])
+                coordinates = [float(value) for value in values[1:]]
+            except (ValueError, IndexError):
+                continue
+            if nc is not None and class_id >= nc:
+                problems.append(('label_class', f'line {line_number}: class {class_id} is not below nc={nc}'))
+            if len(coordinates) != 4:
+                # a polygon, its points are already checked to lie in [0, 1]
+                continue
+            x, y, w, h = coordinates
+            # half a pixel of slack for rounding in the exporter
+            tolerance_x, tolerance_y = 0.5 / width, 0.5 / height
+            if (x - w / 2 < -tolerance_x or x + w / 2 > 1 + tolerance_x
+                    or y - h / 2 < -tolerance_y or y + h / 2 > 1 + tolerance_y):
+                problems.append(('label_bounds', f'line {line_number}: box extends outside the {width}x{height} image'))
+            if w * width < min_box_pixels or h * height < min_box_pixels:
+                problems.append(('label_box_size', f'line {line_number}: box is {w * width:.1f}x{h * height:.1f} '
+                                                   f'pixels, smaller than {min_box_pixels}'))
+    return problems
+
+
+def find_duplicates(hashes: Dict[str, str], max_distance: int = 2) -> List[List[str]]:
+    """
+    Groups keys whose perceptual hashes differ in at most `max_distance` bits, which must be below
+    HASH_BANDS. Identical hashes are collapsed first, then only hashes sharing a band are compared.
+
+    Returns:
+    list: The groups of two or more keys, each sorted, largest group first.
+    """
+    if max_distance >= HASH_BANDS:
+        raise ValueError(f'max_distance must be below {HASH_BANDS}, got {max_distance}')
+    by_hash: Dict[str, List[str]] = {}
+    for key, value in hashes.items():
+        by_hash.setdefault(value, []).append(key)
+    unique = list(by_hash)
+    parents = list(range(len(unique)))
+
+    def root(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    if max_distance > 0:
+        values = [int(value, 16) for value in unique]
+        band_bits = 64 // HASH_BANDS
+        for band in range(HASH_BANDS):
+            buckets: Dict[int, List[int]] = {}
+            for index, value in enumerate(values):
+                buckets.setdefault((value >> (band * band_bits)) & ((1 << band_bits) - 1), []).append(index)
+            for members in buckets.values():
+                for position, first in enumerate(members):
+                    for second in members[position + 1:]:
+                        if bin(values[first] ^ values[second]).count('1') <= max_distance:
+                            parents[root(second)] = root(first)
+
+    groups: Dict[int, List[str]] = {}
+    for index, value in enumerate(unique):
+        groups.setdefault(root(index), []).extend(by_hash[value])
+    return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+
+def wilson_upper_bound(failures: int, total: int, z: float = 1.96) -> float:
+    """
+    Returns the upper end of the Wilson score interval of a failure rate measured on a sample, 95% by
+    default: with that confidence the rate over the whole dataset is no higher.
+    """
+    if total == 0:
+        return 1.0
+    rate = failures / total
+    denominator = 1 + z * z / total
+    centre = rate + z * z / (2 * total)
+    margin = z * np.sqrt(rate * (1 - rate) / total + z * z / (4 * total * total))
+    return float(min(1.0, (centre + margin) / denominator))
@@ -2,6 +2,8 @@ import os.path
 import sys
 import yaml
 import base64
+import shutil
+import hashlib
 
 from src.logger import logging
 from src.exception import AppException
@@ -39,4 +41,46 @@ def decode_image(img_string, filename):
 def encode_into_base64(cropped_image_path):
     with open(cropped_image_path, "rb") as image_file:
         encoded_image = base64.b64encode(image_file.read())
-        return encoded_image.decode("utf-8")
\ No newline at end of file
+        return encoded_image.decode("utf-8")
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ioctl request that makes a file share another file's blocks (btrfs, XFS, overlayfs on those)
+FICLONE = 0x40049409
+
+
+def link_or_copy(source_path: str, destination_path: str) -> str:
+    """
+    Places `source_path` at `destination_path` without duplicating its data where the filesystem
+    allows it: a hard link first, then a reflink (copy on write clone), and a full copy only when the
+    two paths are on filesystems that support neither.
+
+    Returns:
+    str: "hardlink", "reflink" or "copy", whichever was used.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(destination_path)), exist_ok=True)
+    if os.path.lexists(destination_path):
+        os.remove(destination_path)
+    try:
+        os.link(source_path, destination_path)
+        return "hardlink"
+    except OSError:
+        pass
+    try:
+        import fcntl
+        with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+            fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+        shutil.copystat(source_path, destination_path)
+        return "reflink"
+    except (ImportError, OSError):
+        if os.path.exists(destination_path):
+            os.remove(destination_path)
+    shutil.copy2(source_path, destination_path)
+    return "copy"
@@ -0,0 +1,82 @@
+import os
+import json
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+from src.logger import logging
+from src.utils.main_utils import file_sha256
+
+
+def fingerprint(params: dict) -> str:
+    # sort_keys so the same parameters always give the same fingerprint
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class FileManifest:
+    def __init__(self, manifest_path: str, params: dict):
+        """
+        Remembers which source files an output directory was built from and with which parameters.
+
+        Every entry stores the source's size, modification time and SHA-256. A file whose size and
+        mtime are unchanged is trusted without reading it; otherwise it is hashed, so a file that was
+        only touched or copied over with identical content is not processed again. A change to the
+        parameters invalidates every entry.
+
+        Parameters:
+        manifest_path (str): The JSON file the manifest is kept in.
+        params (dict): Everything besides the source content that the outputs depend on.
+        """
+        self.manifest_path = manifest_path
+        self.params_fingerprint = fingerprint(params)
+        self.entries: Dict[str, dict] = {}
+        self.params_changed = False
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.info(f'Ignoring unreadable manifest {self.manifest_path}: {e}')
+            return
+        if manifest.get('params_fingerprint') != self.params_fingerprint:
+            self.params_changed = True
+            return
+        self.entries = manifest.get('entries', {})
+
+    def is_fresh(self, name: str, source_path: str) -> bool:
+        """
+        Returns True when `source_path` matches the entry recorded for `name`.
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            return False
+        stat = os.stat(source_path)
+        if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return True
+        if entry['size'] != stat.st_size:
+            return False
+        if file_sha256(source_path) != entry['sha256']:
+            return False
+        # same content under a new mtime, remember it so the next run takes the fast path again
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+
+    def record(self, name: str, source_path: str, digest: Optional[str] = None) -> None:
+        stat = os.stat(source_path)
+        self.entries[name] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': digest or file_sha256(source_path)
+        }
+
+    def forget(self, names: Iterable[str]) -> List[str]:
+        return [name for name in names if self.entries.pop(name, None) is not None]
+
+    def save(self) -> None:
+        temp_path = f'{self.manifest_path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'params_fingerprint': self.params_fingerprint, 'entries': self.entries}, f)
+        os.replace(temp_path, self.manifest_path)
@@ -0,0 +1,211 @@
+import os
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.logger import logging
+
+SHARD_INDEX_FILE = 'shards.json'
+
+# one row per sample: where its pixels start in the .bin file, its shape and its rows in the labels array
+INDEX_DTYPE = np.dtype([
+    ('offset', np.int64),
+    ('height', np.int32),
+    ('width', np.int32),
+    ('channels', np.int32),
+    ('label_start', np.int64),
+    ('label_count', np.int32)
+])
+
+# pixels are aligned so every image can be viewed without copying
+ALIGNMENT = 64
+
+
+def label_path_for(image_path: str) -> str:
+    """
+    Returns the YOLO label file for an image: images/x.jpg -> labels/x.txt, as ultralytics resolves it,
+    or x.txt next to the image when the dataset has no images/ directory.
+    """
+    directory, file_name = os.path.split(image_path)
+    label_name = f'{os.path.splitext(file_name)[0]}.txt'
+    parent, leaf = os.path.split(directory)
+    if leaf == 'images':
+        return os.path.join(parent, 'labels', label_name)
+    return os.path.join(directory, label_name)
+
+
+def read_yolo_labels(label_path: str) -> np.ndarray:
+    # rows of class, x_center, y_center, width, height; a missing file is an image without objects
+    if not os.path.exists(label_path):
+        return np.empty((0, 5), dtype=np.float32)
+    with open(label_path, 'r') as f:
+        rows = [line.split()[:5] for line in f if line.strip()]
+    return np.asarray(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def write_shard(shard_path: str, samples: Iterable[Tuple[str, np.ndarray, np.ndarray]]) -> dict:
+    """
+    Writes one shard: `<shard_path>.bin` with the raw pixels of every image, `<shard_path>.idx.npy` with
+    their offsets and shapes, `<shard_path>.labels.npy` with every label row and `<shard_path>.names.json`.
+
+    Parameters:
+    shard_path (str): The path of the shard without extension.
+    samples (Iterable): (name, uint8 image, (N, 5) YOLO labels) tuples.
+
+    Returns:
+    dict: The shard's file name prefix, number of samples and size of its pixel data in bytes.
+    """
+    index, labels, names = [], [], []
+    label_start = 0
+    offset = 0
+    with open(f'{shard_path}.bin', 'wb') as f:
+        for name, image, image_labels in samples:
+            image = np.ascontiguousarray(image, dtype=np.uint8)
+            if image.ndim == 2:
+                image = image[:, :, None]
+            padding = -offset % ALIGNMENT
+            if padding:
+                f.write(b'\0' * padding)
+                offset += padding
+            f.write(image.data)
+            height, width, channels = image.shape
+            index.append((offset, height, width, channels, label_start, len(image_labels)))
+            labels.append(np.asarray(image_labels, dtype=np.float32).reshape(-1, 5))
+            names.append(name)
+            offset += image.nbytes
+            label_start += len(image_labels)
+
+    np.save(f'{shard_path}.idx.npy', np.array(index, dtype=INDEX_DTYPE))
+    np.save(f'{shard_path}.labels.npy', np.concatenate(labels) if labels else np.empty((0, 5), dtype=np.float32))
+    with open(f'{shard_path}.names.json', 'w') as f:
+        json.dump(names, f)
+    return {'name': os.path.basename(shard_path), 'samples': len(names), 'bytes': offset}
+
+
+def write_shard_index(output_dir: str, shards: List[dict]) -> str:
+    # written last, so a reader never sees a dataset whose shards are still being written
+    index_path = os.path.join(output_dir, SHARD_INDEX_FILE)
+    temp_path = f'{index_path}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump({'shards': sorted(shards, key=lambda shard: shard['name'])}, f)
+    os.replace(temp_path, index_path)
+    return index_path
+
+
+class ShardWriter:
+    def __init__(self, output_dir: str, max_shard_bytes: int = 256 * 1024 * 1024, prefix: str = 'shard'):
+        """
+        Packs samples into shards of about `max_shard_bytes` of pixel data each.
+
+        Parameters:
+        output_dir (str): The directory the shards and their index are written to.
+        max_shard_bytes (int): The pixel data size after which the next shard is started.
+        prefix (str): The file name prefix of the shards.
+        """
+        self.output_dir = output_dir
+        self.max_shard_bytes = max_shard_bytes
+        self.prefix = prefix
+        self.shards: List[dict] = []
+        self._pending: List[Tuple[str, np.ndarray, np.ndarray]] = []
+        self._pending_bytes = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, name: str, image: np.ndarray, labels: Optional[np.ndarray] = None) -> None:
+        labels = labels if labels is not None else np.empty((0, 5), dtype=np.float32)
+        self._pending.append((name, image, labels))
+        self._pending_bytes += image.nbytes
+        if self._pending_bytes >= self.max_shard_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        shard_path = os.path.join(self.output_dir, f'{self.prefix}-{len(self.shards):05d}')
+        self.shards.append(write_shard(shard_path, self._pending))
+        self._pending = []
+        self._pending_bytes = 0
+
+    def close(self) -> str:
+        self.flush()
+        return write_shard_index(self.output_dir, self.shards)
+
+    def __enter__(self) -> 'ShardWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+
+
+class ShardReader:
+    def __init__(self, shard_dir: str):
+        """
+        Random access and streaming over the shards written by ShardWriter or write_shard.
+
+        The pixel files are memory-mapped, so images are read-only views into the page cache rather than
+        copies: opening a dataset costs a few file opens however many samples it has, and the OS reads
+        ahead when the shards are streamed in order.
+
+        Parameters:
+        shard_dir (str): The directory holding the shards and their index.
+        """
+        self.shard_dir = shard_dir
+        with open(os.path.join(shard_dir, SHARD_INDEX_FILE), 'r') as f:
+            self.shards = json.load(f)['shards']
+
+        self._data: List[np.memmap] = []
+        self._index: List[np.ndarray] = []
+        self._labels: List[np.ndarray] = []
+        self.names: List[str] = []
+        for shard in self.shards:
+            shard_path = os.path.join(shard_dir, shard['name'])
+            size = os.path.getsize(f'{shard_path}.bin')
+            # np.memmap cannot map an empty file
+            self._data.append(np.memmap(f'{shard_path}.bin', dtype=np.uint8, mode='r') if size
+                              else np.empty(0, dtype=np.uint8))
+            self._index.append(np.load(f'{shard_path}.idx.npy'))
+            self._labels.append(np.load(f'{shard_path}.labels.npy', mmap_mode='r'))
+            with open(f'{shard_path}.names.json', 'r') as f:
+                self.names.extend(json.load(f))
+        self._starts = np.cumsum([0] + [len(index) for index in self._index])
+        logging.info(f'Opened {len(self.shards)} shards with {len(self)} samples from {shard_dir}')
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(f'Sample {position} out of range for {len(self)} samples')
+        shard = int(np.searchsorted(self._starts, position, side='right')) - 1
+        return shard, position - int(self._starts[shard])
+
+    def _sample(self, shard: int, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        entry = self._index[shard][row]
+        height, width, channels = int(entry['height']), int(entry['width']), int(entry['channels'])
+        offset = int(entry['offset'])
+        image = self._data[shard][offset:offset + height * width * channels].reshape(height, width, channels)
+        label_start = int(entry['label_start'])
+        labels = self._labels[shard][label_start:label_start + int(entry['label_count'])]
+        return image, labels
+
+    def __getitem__(self, position: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the image (H, W, C) and the (N, 5) YOLO labels of a sample as read-only views.
+        """
+        return self._sample(*self._locate(position))
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        # shard by shard, in file order, so reads are sequential
+        for shard, index in enumerate(self._index):
+            for row in range(len(index)):
+                yield self._sample(shard, row)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'shards': len(self.shards),
+            'samples': len(self),
+            'bytes': sum(shard['bytes'] for shard in self.shards)
+        }
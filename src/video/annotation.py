@@ -0,0 +1,64 @@
+import numpy as np
+import supervision as sv
+
+# BoundingBoxAnnotator was folded back into BoxAnnotator in newer supervision releases
+_BoxAnnotator = getattr(sv, 'BoundingBoxAnnotator', None) or sv.BoxAnnotator
+
+
+class FrameAnnotator:
+    def __init__(self, enabled: bool = True, draw_labels: bool = True):
+        """
+        Initialize an annotation stage that is built once and reused for every frame.
+
+        Boxes and labels are drawn into an output buffer owned by the annotator, so the input frame
+        stays untouched for tracking and the buffer is only reallocated when the frame size changes.
+        With `enabled` False, `annotate` does nothing, for headless runs that only need detections
+        and tracks.
+
+        Parameters:
+        enabled (bool): Whether to draw at all.
+        draw_labels (bool): Whether to draw class labels, with the tracker id when present.
+        """
+        self.enabled = enabled
+        self.draw_labels = draw_labels
+        self.box_annotator = _BoxAnnotator() if enabled else None
+        self.label_annotator = sv.LabelAnnotator() if enabled and draw_labels else None
+        self._buffer = None
+
+    def annotate(self, frame: np.ndarray, detections: sv.Detections) -> np.ndarray:
+        """
+        Draws detections onto a copy of the frame.
+
+        Parameters:
+        frame (np.ndarray): The BGR frame, left unmodified.
+        detections (sv.Detections): The detections to draw.
+
+        Returns:
+        np.ndarray: The annotated output buffer, overwritten by the next call, or None when disabled.
+        """
+        if not self.enabled:
+            return None
+        if self._buffer is None or self._buffer.shape != frame.shape or self._buffer.dtype != frame.dtype:
+            self._buffer = np.empty_like(frame)
+        np.copyto(self._buffer, frame)
+
+        self.box_annotator.annotate(scene=self._buffer, detections=detections)
+        if self.label_annotator is not None and len(detections) > 0:
+            self.label_annotator.annotate(scene=self._buffer, detections=detections, labels=self._labels(detections))
+        return self._buffer
+
+    @staticmethod
+    def _labels(detections: sv.Detections) -> list:
+        class_names = detections.data.get('class_name') if detections.data else None
+        labels = []
+        for index in range(len(detections)):
+            if class_names is not None:
+                label = str(class_names[index])
+            elif detections.class_id is not None:
+                label = str(detections.class_id[index])
+            else:
+                label = ''
+            if detections.tracker_id is not None:
+                label = f'#{detections.tracker_id[index]} {label}'
+            labels.append(label)
+        return labels
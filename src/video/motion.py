@@ -0,0 +1,172 @@
+from typing import List
+
+import cv2
+import numpy as np
+import supervision as sv
+
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+class MotionGate:
+    def __init__(self, detect_every: int = 5, motion_threshold: float = 0.02, downscale_width: int = 160):
+        """
+        Decides per frame whether the detector has to run.
+
+        The detector runs on the first frame, every `detect_every` frames, and whenever the mean
+        absolute difference between a downscaled greyscale copy of the frame and the last detected
+        frame exceeds `motion_threshold` (as a fraction of 255). Comparing against the last detected
+        frame rather than the previous one means slow drift still triggers a detection eventually.
+
+        Parameters:
+        detect_every (int): The maximum number of frames between two detector runs.
+        motion_threshold (float): The motion score above which the detector runs early.
+        downscale_width (int): The width frames are shrunk to before computing the motion score.
+        """
+        self.detect_every = detect_every
+        self.motion_threshold = motion_threshold
+        self.downscale_width = downscale_width
+        self.frames = 0
+        self.detections = 0
+        self.motion_triggered = 0
+        self._reference = None
+        self._since_detection = 0
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        gray = to_gray(frame)
+        height, width = gray.shape
+        if width > self.downscale_width:
+            size = (self.downscale_width, max(1, round(height * self.downscale_width / width)))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return gray
+
+    def motion_score(self, frame: np.ndarray) -> float:
+        if self._reference is None:
+            return 1.0
+        thumbnail = self._thumbnail(frame)
+        if thumbnail.shape != self._reference.shape:
+            return 1.0
+        return float(cv2.absdiff(thumbnail, self._reference).mean()) / 255.0
+
+    def should_detect(self, frame: np.ndarray) -> bool:
+        self.frames += 1
+        self._since_detection += 1
+        detect = self._reference is None or self._since_detection >= self.detect_every
+        if not detect and self.motion_score(frame) > self.motion_threshold:
+            detect = True
+            self.motion_triggered += 1
+        if detect:
+            self.detections += 1
+            self._since_detection = 0
+            self._reference = self._thumbnail(frame)
+        return detect
+
+    @property
+    def invocation_rate(self) -> float:
+        return self.detections / self.frames if self.frames else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'detector_invocations': self.detections,
+            'motion_triggered': self.motion_triggered,
+            'detector_invocation_rate': self.invocation_rate
+        }
+
+
+class BoxPropagator:
+    def __init__(self, points_per_side: int = 3):
+        """
+        Moves boxes between detector runs with pyramidal Lucas-Kanade optical flow.
+
+        A small grid of points inside every box is tracked from the previous frame and the box is
+        shifted by the median displacement of the points that were found. Boxes whose points were all
+        lost keep their position.
+
+        Parameters:
+        points_per_side (int): The grid size sampled inside each box.
+        """
+        self.points_per_side = points_per_side
+        # same settings as the Lucas-Kanade tracker in test.py
+        self.parameter_lucas_kanade = dict(winSize=(15, 15), maxLevel=4,
+                                           criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self._previous_gray = None
+
+    def reset(self, frame: np.ndarray) -> None:
+        self._previous_gray = to_gray(frame)
+
+    def _grid(self, box: np.ndarray) -> np.ndarray:
+        x1, y1, x2, y2 = box
+        # keep the samples away from the edges, which usually belong to the background
+        xs = np.linspace(x1, x2, self.points_per_side + 2, dtype=np.float32)[1:-1]
+        ys = np.linspace(y1, y2, self.points_per_side + 2, dtype=np.float32)[1:-1]
+        return np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 1, 2)
+
+    def propagate_boxes(self, frame: np.ndarray, xyxy: np.ndarray) -> np.ndarray:
+        gray = to_gray(frame)
+        if self._previous_gray is None or len(xyxy) == 0:
+            self._previous_gray = gray
+            return xyxy
+
+        points = np.concatenate([self._grid(box) for box in xyxy])
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(self._previous_gray, gray, points, None,
+                                                         **self.parameter_lucas_kanade)
+        self._previous_gray = gray
+
+        propagated = xyxy.astype(np.float32, copy=True)
+        per_box = self.points_per_side * self.points_per_side
+        found = status.reshape(-1).astype(bool)
+        motion = (new_points - points).reshape(-1, 2)
+        for index in range(len(xyxy)):
+            box_found = found[index * per_box:(index + 1) * per_box]
+            if box_found.any():
+                dx, dy = np.median(motion[index * per_box:(index + 1) * per_box][box_found], axis=0)
+                propagated[index] += (dx, dy, dx, dy)
+        return propagated
+
+    def propagate(self, frame: np.ndarray, detections: sv.Detections) -> sv.Detections:
+        return sv.Detections(
+            xyxy=self.propagate_boxes(frame, detections.xyxy),
+            confidence=detections.confidence,
+            class_id=detections.class_id,
+            data=detections.data
+        )
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+def evaluate_drift(reference: List[np.ndarray], candidate: List[np.ndarray], iou_threshold: float = 0.5) -> dict:
+    """
+    Measures how far adaptive-mode boxes drift from full-rate detections on the same clip.
+
+    Parameters:
+    reference (List[np.ndarray]): Per frame (N, 4) xyxy boxes from running the detector on every frame.
+    candidate (List[np.ndarray]): Per frame (M, 4) xyxy boxes from the adaptive mode.
+    iou_threshold (float): The IoU above which a reference box counts as recovered.
+
+    Returns:
+    dict: The mean best-match IoU, the recall at `iou_threshold` and the number of reference boxes.
+    """
+    best_ious = []
+    for reference_boxes, candidate_boxes in zip(reference, candidate):
+        if len(reference_boxes) == 0:
+            continue
+        if len(candidate_boxes) == 0:
+            best_ious.extend([0.0] * len(reference_boxes))
+            continue
+        best_ious.extend(box_iou(np.asarray(reference_boxes, dtype=np.float32),
+                                 np.asarray(candidate_boxes, dtype=np.float32)).max(axis=1).tolist())
+    best_ious = np.asarray(best_ious)
+    return {
+        'reference_boxes': int(best_ious.size),
+        'mean_iou': float(best_ious.mean()) if best_ious.size else 1.0,
+        'recall': float((best_ious >= iou_threshold).mean()) if best_ious.size else 1.0
+    }
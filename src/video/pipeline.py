@@ -0,0 +1,286 @@
+import sys
+import queue
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Union
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from src.logger import logging
+from src.exception import AppException
+from src.entity.config_entity import VideoPipelineConfig
+from src.video.annotation import FrameAnnotator
+from src.video.stage_timer import StageTimer
+from src.video.motion import MotionGate, BoxPropagator
+
+# marks the end of the stream on every queue
+_END = object()
+
+
+@dataclass
+class FramePacket:
+    index: int
+    frame: np.ndarray
+    detections: sv.Detections = None
+    run_detector: bool = True
+
+
+def iter_video_frames(video_file: Union[str, int]) -> Iterator[np.ndarray]:
+    cap = cv2.VideoCapture(video_file)
+    if not cap.isOpened():
+        raise RuntimeError(f'Could not open video source {video_file}')
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+
+def video_fps(video_file: Union[str, int], default: float = 30.0) -> float:
+    # cameras and some containers report 0, a source that does not open -1
+    cap = cv2.VideoCapture(video_file)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        return fps if fps > 0 else default
+    finally:
+        cap.release()
+
+
+class VideoWriterSink:
+    def __init__(self, output_path: str, fps: float = 30.0):
+        """
+        Writes annotated frames to a video file, opening the writer on the first frame.
+        """
+        self.output_path = output_path
+        self.fps = fps
+        self._writer = None
+
+    def __call__(self, packet: FramePacket, annotated: np.ndarray) -> None:
+        frame = annotated if annotated is not None else packet.frame
+        if self._writer is None:
+            height, width = frame.shape[:2]
+            self._writer = cv2.VideoWriter(self.output_path, cv2.VideoWriter_fourcc(*'mp4v'), self.fps, (width, height))
+        self._writer.write(frame)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+
+class VideoPipeline:
+    def __init__(self, model, video_pipeline_config: VideoPipelineConfig = VideoPipelineConfig(),
+                 tracker: sv.ByteTrack = None, annotator: FrameAnnotator = None,
+                 sink: Callable[[FramePacket, np.ndarray], Any] = None):
+        """
+        Initialize a staged producer/consumer video pipeline.
+
+        A decoder thread, `inference_workers` inference threads and a sink thread are connected by
+        bounded queues, so decode, inference and encoding overlap instead of running back to back.
+        Inference threads batch up to `batch_size` consecutive frames into one `detect_batch` call.
+        The tracking stage runs on the calling thread and restores frame order before updating the
+        tracker, because tracking is only correct when frames arrive in order.
+
+        In adaptive mode a MotionGate on the decoder thread picks the frames the detector runs on,
+        and the tracking stage moves the last detected boxes with optical flow on the other frames.
+
+        Parameters:
+        model: A DetectionModel, or anything with `detect_batch(frames) -> List[sv.Detections]`. Unless it
+            has a true `thread_safe` attribute, the inference workers take turns calling it.
+        video_pipeline_config (VideoPipelineConfig): The queue, batch and worker sizes.
+        tracker (sv.ByteTrack): The tracker to update, a new ByteTrack when not given.
+        annotator (FrameAnnotator): Draws the tracked detections, skipped when not given.
+        sink (Callable): Called as sink(packet, annotated) for every frame in order, on the sink thread.
+        """
+        self.model = model
+        # several inference workers share one model, one that is not thread-safe runs a batch at a time
+        self._model_lock = nullcontext() if getattr(model, 'thread_safe', False) else threading.Lock()
+        self.video_pipeline_config = video_pipeline_config
+        self.tracker = tracker if tracker is not None else sv.ByteTrack()
+        self.annotator = annotator
+        self.sink = sink
+        self.stage_timer = StageTimer()
+        self.motion_gate = None
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def run(self, source: Union[str, int, Iterable[np.ndarray]]) -> dict:
+        """
+        Runs every frame of a source through decode, inference, tracking and the sink.
+
+        Parameters:
+        source: A video file path or camera index for cv2.VideoCapture, or an iterable of BGR frames.
+
+        Returns:
+        dict: The StageTimer summary, including frames/sec and the per stage time breakdown.
+
+        Raises:
+        AppException: If any stage fails; the remaining stages are stopped first.
+        """
+        config = self.video_pipeline_config
+        self.stage_timer = StageTimer()
+        self.motion_gate = MotionGate(config.detect_every, config.motion_threshold) if config.adaptive else None
+        self._stop.clear()
+        self._errors = []
+        decoded = queue.Queue(maxsize=config.queue_size)
+        inferred = queue.Queue(maxsize=config.queue_size)
+        tracked = queue.Queue(maxsize=config.queue_size)
+
+        threads = [threading.Thread(target=self._guard, args=(self._decode, source, decoded), name='video-decode')]
+        threads += [
+            threading.Thread(target=self._guard, args=(self._infer, decoded, inferred), name=f'video-infer-{i}')
+            for i in range(config.inference_workers)
+        ]
+        sink_thread = threading.Thread(target=self._guard, args=(self._write, tracked), name='video-sink')
+        for thread in threads + [sink_thread]:
+            thread.start()
+
+        try:
+            self._track(inferred, tracked)
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            self._put(tracked, _END, force=True)
+            for thread in threads + [sink_thread]:
+                thread.join()
+
+        if self._errors:
+            try:
+                raise self._errors[0]
+            except BaseException as e:
+                raise AppException(e, sys)
+
+        summary = self.stage_timer.summary()
+        if self.motion_gate is not None:
+            summary.update(self.motion_gate.stats())
+        logging.info(f'Video pipeline finished:\n{self.stage_timer.report()}')
+        return summary
+
+    def _guard(self, stage: Callable, *args) -> None:
+        try:
+            stage(*args)
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _put(self, target: queue.Queue, item: Any, force: bool = False) -> bool:
+        # a bounded put that gives up once another stage failed, so no thread blocks forever
+        while force or not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if force and self._stop.is_set():
+                    try:
+                        target.get_nowait()
+                    except queue.Empty:
+                        pass
+        return False
+
+    def _get(self, source: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _decode(self, source, decoded: queue.Queue) -> None:
+        frames = iter_video_frames(source) if isinstance(source, (str, int)) else iter(source)
+        index = 0
+        try:
+            while not self._stop.is_set():
+                with self.stage_timer.stage('decode'):
+                    frame = next(frames, None)
+                if frame is None:
+                    break
+                packet = FramePacket(index, frame)
+                if self.motion_gate is not None:
+                    packet.run_detector = self.motion_gate.should_detect(frame)
+                if not self._put(decoded, packet):
+                    break
+                index += 1
+        finally:
+            for _ in range(self.video_pipeline_config.inference_workers):
+                self._put(decoded, _END, force=True)
+
+    def _infer(self, decoded: queue.Queue, inferred: queue.Queue) -> None:
+        try:
+            finished = False
+            while not finished:
+                packet = self._get(decoded)
+                if packet is _END:
+                    break
+                batch = [packet]
+                # take whatever consecutive frames are already decoded, without waiting for more
+                while len(batch) < self.video_pipeline_config.batch_size:
+                    try:
+                        packet = decoded.get_nowait()
+                    except queue.Empty:
+                        break
+                    if packet is _END:
+                        finished = True
+                        break
+                    batch.append(packet)
+
+                to_detect = [packet for packet in batch if packet.run_detector]
+                if to_detect:
+                    with self._model_lock, self.stage_timer.stage('infer'):
+                        detections = self.model.detect_batch([packet.frame for packet in to_detect])
+                    for packet, packet_detections in zip(to_detect, detections):
+                        packet.detections = packet_detections
+                for packet in batch:
+                    if not self._put(inferred, packet):
+                        return
+        finally:
+            self._put(inferred, _END, force=True)
+
+    def _track(self, inferred: queue.Queue, tracked: queue.Queue) -> None:
+        pending = {}
+        next_index = 0
+        propagator = BoxPropagator() if self.motion_gate is not None else None
+        last_detections = sv.Detections.empty()
+        running_workers = self.video_pipeline_config.inference_workers
+        while running_workers > 0:
+            packet = self._get(inferred)
+            if packet is _END:
+                if self._stop.is_set():
+                    return
+                running_workers -= 1
+                continue
+            pending[packet.index] = packet
+            # with several inference workers frames can finish out of order, release them in order
+            while next_index in pending:
+                packet = pending.pop(next_index)
+                with self.stage_timer.stage('track'):
+                    if propagator is not None:
+                        if packet.run_detector:
+                            propagator.reset(packet.frame)
+                        else:
+                            packet.detections = propagator.propagate(packet.frame, last_detections)
+                        last_detections = packet.detections
+                    packet.detections = self.tracker.update_with_detections(packet.detections)
+                if not self._put(tracked, packet):
+                    return
+                next_index += 1
+
+    def _write(self, tracked: queue.Queue) -> None:
+        while True:
+            packet = self._get(tracked)
+            if packet is _END:
+                return
+            annotated = None
+            if self.annotator is not None:
+                with self.stage_timer.stage('annotate'):
+                    annotated = self.annotator.annotate(packet.frame, packet.detections)
+            if self.sink is not None:
+                with self.stage_timer.stage('encode'):
+                    self.sink(packet, annotated)
+            self.stage_timer.frame_done()
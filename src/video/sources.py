@@ -0,0 +1,372 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Iterator, List, Optional, Union
+
+import cv2
+import numpy as np
+
+from src.logger import logging
+from src.entity.config_entity import VideoSourceConfig
+
+
+class FrameRingBuffer:
+    def __init__(self, capacity: int, overwrite: bool = True):
+        """
+        A bounded buffer of decoded frames between a reader thread and its consumer.
+
+        With `overwrite` a full buffer drops its oldest frame, so a slow consumer of a live source
+        always gets recent frames. Without it the reader waits, so no frame of a recording is lost.
+        """
+        self.capacity = max(1, capacity)
+        self.overwrite = overwrite
+        self.dropped = 0
+        self._frames = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, frame: np.ndarray) -> bool:
+        with self._condition:
+            while len(self._frames) >= self.capacity and not self._closed:
+                if self.overwrite:
+                    self._frames.popleft()
+                    self.dropped += 1
+                    break
+                self._condition.wait()
+            if self._closed:
+                return False
+            self._frames.append(frame)
+            self._condition.notify_all()
+            return True
+
+    def get(self) -> Optional[np.ndarray]:
+        """
+        Returns the oldest buffered frame, waiting for one, or None once the buffer is closed and drained.
+        """
+        with self._condition:
+            while not self._frames and not self._closed:
+                self._condition.wait()
+            if not self._frames:
+                return None
+            frame = self._frames.popleft()
+            self._condition.notify_all()
+            return frame
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._frames)
+
+
+class VideoSource:
+    # live sources reconnect when reads fail and drop stale frames when the consumer falls behind
+    live = False
+
+    def __init__(self, name: str, video_source_config: VideoSourceConfig = VideoSourceConfig()):
+        """
+        Base class for everything the video paths read frames from.
+
+        Subclasses implement open, read_frame, close and, when they can restart, rewind. The base
+        class adds target FPS pacing, looping, reconnecting with exponential backoff and an optional
+        reader thread that decodes ahead into a FrameRingBuffer. Iterating a source yields BGR frames.
+
+        Parameters:
+        name (str): Identifies the source in logs and stats.
+        video_source_config (VideoSourceConfig): The pacing, looping, reconnect and buffer settings.
+        """
+        self.name = name
+        self.video_source_config = video_source_config
+        self.frames_read = 0
+        self.reconnects = 0
+        self._failures = 0
+        self._started_at = None
+        self._stop = threading.Event()
+        self._buffer: Optional[FrameRingBuffer] = None
+        self._reader: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def open(self) -> None:
+        raise NotImplementedError
+
+    def read_frame(self) -> Optional[np.ndarray]:
+        # None at the end of the stream or when a read failed
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def rewind(self) -> bool:
+        return False
+
+    def _reconnect(self) -> bool:
+        config = self.video_source_config
+        self._failures += 1
+        if self._failures > config.reconnect_attempts:
+            raise RuntimeError(f'Video source {self.name} failed after {config.reconnect_attempts} reconnect attempts.')
+        delay = min(config.reconnect_backoff_s * 2 ** (self._failures - 1), config.reconnect_backoff_max_s)
+        logging.info(f'Video source {self.name} lost, reconnecting in {delay:.1f}s '
+                     f'(attempt {self._failures}/{config.reconnect_attempts})')
+        if self._stop.wait(delay):
+            return False
+        self.reconnects += 1
+        self.close()
+        try:
+            self.open()
+        except Exception as e:
+            logging.info(f'Reconnecting video source {self.name} failed: {e}')
+        return True
+
+    def _generate(self) -> Iterator[np.ndarray]:
+        try:
+            self.open()
+        except Exception as e:
+            if not self.live:
+                raise
+            # a camera or stream that is not up yet goes through the same backoff as a dropped one
+            logging.info(f'Opening video source {self.name} failed: {e}')
+
+        interval = 1.0 / self.video_source_config.target_fps if self.video_source_config.target_fps > 0 else 0.0
+        next_due = time.perf_counter()
+        rewound = False
+        try:
+            while not self._stop.is_set():
+                frame = self.read_frame()
+                if frame is None:
+                    if self.video_source_config.loop and not rewound and self.rewind():
+                        # only one rewind per frame read, an empty source must not spin forever
+                        rewound = True
+                        continue
+                    if self.live and self._reconnect():
+                        continue
+                    return
+                rewound = False
+                self._failures = 0
+
+                if interval:
+                    delay = next_due - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                    elif delay < -interval:
+                        # fell behind by more than a frame, do not burst to catch up
+                        next_due = time.perf_counter()
+                    next_due += interval
+
+                if self._started_at is None:
+                    self._started_at = time.perf_counter()
+                self.frames_read += 1
+                yield frame
+        finally:
+            self.close()
+
+    def _fill(self, buffer: FrameRingBuffer) -> None:
+        try:
+            for frame in self._generate():
+                if not buffer.put(frame):
+                    break
+        except Exception as e:
+            self._error = e
+        finally:
+            buffer.close()
+
+    def start(self) -> None:
+        """
+        Starts the reader thread that decodes ahead into the ring buffer.
+        """
+        if self._reader is not None and self._reader.is_alive():
+            return
+        self._stop.clear()
+        self._error = None
+        self._buffer = FrameRingBuffer(self.video_source_config.buffer_size, overwrite=self.live)
+        self._reader = threading.Thread(target=self._fill, args=(self._buffer,), name=f'video-source-{self.name}', daemon=True)
+        self._reader.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._buffer is not None:
+            self._buffer.close()
+        reader, self._reader = self._reader, None
+        if reader is not None and reader is not threading.current_thread():
+            reader.join(timeout)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        if self.video_source_config.buffer_size <= 0:
+            self._stop.clear()
+            yield from self._generate()
+            return
+
+        self.start()
+        buffer = self._buffer
+        try:
+            while True:
+                frame = buffer.get()
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            self.stop()
+        if self._error is not None:
+            raise self._error
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+        return {
+            'source': self.name,
+            'frames': self.frames_read,
+            'fps': self.frames_read / elapsed if elapsed else 0.0,
+            'reconnects': self.reconnects,
+            'dropped': self._buffer.dropped if self._buffer is not None else 0
+        }
+
+
+class CaptureSource(VideoSource):
+    live = True
+
+    def __init__(self, target: Union[int, str], video_source_config: VideoSourceConfig = VideoSourceConfig()):
+        """
+        A camera index or a network stream such as rtsp:// or http://, read through cv2.VideoCapture.
+        """
+        super().__init__(str(target), video_source_config)
+        self.target = target
+        self._capture = None
+
+    def open(self) -> None:
+        self._capture = cv2.VideoCapture(self.target)
+        if not self._capture.isOpened():
+            self.close()
+            raise RuntimeError(f'Could not open video source {self.target}')
+
+    def read_frame(self) -> Optional[np.ndarray]:
+        if self._capture is None:
+            return None
+        ok, frame = self._capture.read()
+        return frame if ok else None
+
+    def close(self) -> None:
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+
+class FileSource(CaptureSource):
+    # the end of a recording is the end of the stream, not a dropped connection
+    live = False
+
+    def rewind(self) -> bool:
+        # reopening is reliable for every container, seeking to frame 0 is not
+        self.close()
+        self.open()
+        return True
+
+
+class ImageFolderSource(VideoSource):
+    def __init__(self, directory: str, video_source_config: VideoSourceConfig = VideoSourceConfig()):
+        """
+        The images of a directory in file name order, e.g. frames exported from a recording.
+        """
+        super().__init__(directory, video_source_config)
+        self.directory = directory
+        self.image_files: List[str] = []
+        self._position = 0
+
+    def open(self) -> None:
+        extensions = self.video_source_config.image_extensions
+        self.image_files = sorted(
+            os.path.join(self.directory, file_name) for file_name in os.listdir(self.directory)
+            if os.path.splitext(file_name)[1].lower() in extensions
+        )
+        if not self.image_files:
+            raise RuntimeError(f'No images found in {self.directory}')
+        self._position = 0
+
+    def read_frame(self) -> Optional[np.ndarray]:
+        while self._position < len(self.image_files):
+            image_file = self.image_files[self._position]
+            self._position += 1
+            frame = cv2.imread(image_file)
+            if frame is not None:
+                return frame
+            logging.info(f'Skipping unreadable image {image_file}')
+        return None
+
+    def rewind(self) -> bool:
+        self._position = 0
+        return True
+
+
+class SyntheticSource(VideoSource):
+    def __init__(self, width: int = 640, height: int = 480, frame_count: int = 0, seed: int = 0,
+                 video_source_config: VideoSourceConfig = VideoSourceConfig()):
+        """
+        Generates a deterministic clip of a plate-like patch moving over a textured background, so the
+        live path can be load tested without a camera or recordings.
+
+        Parameters:
+        width (int): The frame width.
+        height (int): The frame height.
+        frame_count (int): The number of frames to generate, 0 for an endless stream.
+        seed (int): Seeds the background texture.
+        """
+        super().__init__(f'synthetic:{width}x{height}', video_source_config)
+        self.width = width
+        self.height = height
+        self.frame_count = frame_count
+        self.seed = seed
+        self._background = None
+        self._index = 0
+
+    def open(self) -> None:
+        rng = np.random.default_rng(self.seed)
+        # a coarse texture upscaled to full size, so optical flow and JPEG see realistic structure
+        coarse = rng.integers(0, 255, (max(1, self.height // 16), max(1, self.width // 16), 3), dtype=np.uint8)
+        self._background = cv2.resize(coarse, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
+        self._index = 0
+
+    def read_frame(self) -> Optional[np.ndarray]:
+        if self.frame_count and self._index >= self.frame_count:
+            return None
+        frame = self._background.copy()
+        plate_width, plate_height = max(8, self.width // 5), max(4, self.height // 12)
+        travel = max(1, self.width - plate_width)
+        x = (self._index * 4) % travel
+        y = self.height // 2
+        cv2.rectangle(frame, (x, y), (x + plate_width, y + plate_height), (255, 255, 255), -1)
+        cv2.putText(frame, f'{self._index:06d}', (x + 2, y + plate_height - 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    plate_height / 30.0, (0, 0, 0), 1)
+        self._index += 1
+        return frame
+
+    def rewind(self) -> bool:
+        self._index = 0
+        return True
+
+
+def open_video_source(source: Union[int, str], video_source_config: VideoSourceConfig = VideoSourceConfig()) -> VideoSource:
+    """
+    Builds the video source for a source string.
+
+    Parameters:
+    source: A camera index, `synthetic` or `synthetic:WIDTHxHEIGHT`, a directory of images, a stream
+    url such as rtsp://host/path, or a video file path.
+    video_source_config (VideoSourceConfig): The pacing, looping, reconnect and buffer settings.
+
+    Returns:
+    VideoSource: The matching, unopened source.
+    """
+    source = str(source)
+    if source.isdigit():
+        return CaptureSource(int(source), video_source_config)
+    if source == 'synthetic' or source.startswith('synthetic:'):
+        width, height = 640, 480
+        if ':' in source:
+            width, height = (int(size) for size in source.split(':', 1)[1].lower().split('x'))
+        return SyntheticSource(width, height, video_source_config=video_source_config)
+    if os.path.isdir(source):
+        return ImageFolderSource(source, video_source_config)
+    if '://' in source:
+        return CaptureSource(source, video_source_config)
+    return FileSource(source, video_source_config)
@@ -0,0 +1,61 @@
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+
+VIDEO_STAGES = ('decode', 'infer', 'track', 'annotate', 'encode')
+
+
+class StageTimer:
+    def __init__(self):
+        """
+        Accumulates wall time per processing stage so the frame time can be broken down into
+        decode, infer, track, annotate and encode. Safe to share between pipeline threads.
+        """
+        self._lock = threading.Lock()
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.frames = 0
+        self._started_at = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started_at)
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.totals[name] += seconds
+            self.counts[name] += 1
+
+    def frame_done(self) -> None:
+        with self._lock:
+            self.frames += 1
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self._started_at
+        timed = sum(self.totals.values())
+        stages = {}
+        for name in list(VIDEO_STAGES) + sorted(set(self.totals) - set(VIDEO_STAGES)):
+            total = self.totals.get(name, 0.0)
+            stages[name] = {
+                'total_ms': total * 1000.0,
+                'ms_per_frame': total * 1000.0 / self.frames if self.frames else 0.0,
+                'share': total / timed if timed else 0.0
+            }
+        return {
+            'frames': self.frames,
+            'elapsed_s': elapsed,
+            'fps': self.frames / elapsed if elapsed else 0.0,
+            'stages': stages
+        }
+
+    def report(self) -> str:
+        summary = self.summary()
+        lines = [f"{summary['frames']} frames at {summary['fps']:.1f} fps"]
+        for name, stage in summary['stages'].items():
+            lines.append(f"  {name:<9} {stage['ms_per_frame']:8.2f} ms/frame {stage['share']:6.1%}")
+        return '\n'.join(lines)
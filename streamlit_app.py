@@ -1,6 +1,10 @@
-# import a utility function for loading Roboflow models
-from inference import get_model
-from inference.models.utils import get_model
+# import the process-wide registry that loads the Roboflow/YOLO model once
+from src.serving.model_registry import model_registry
+from src.entity.config_entity import DetectionModelConfig, VideoPipelineConfig
+from src.video.annotation import FrameAnnotator
+from src.video.stage_timer import StageTimer
+from src.video.pipeline import VideoPipeline, VideoWriterSink, video_fps
+from src.logger import logging
 # import supervision to visualize our results
 import supervision as sv
 # import cv2 to helo load our image
@@ -14,54 +18,45 @@ box_annotator = sv.BoundingBoxAnnotator()
 names = ['number-plate']
 
 class Tracking:
-    def __init__(self):
+    def __init__(self, annotate=True):
         self.model = None
         self.confidence = 0.5
         self.save_video = False
         self.enable_gpu = False
         self.custom_classes = False
+        self.output_path = 'data/tracked_video.mp4'
+        # annotators are built once; with annotate=False only detections and tracks are produced
+        self.annotator = FrameAnnotator(enabled=annotate)
+        self.stage_timer = StageTimer()
     
     def load_model(self):
-        # load a pre-trained yolov8n model
-        self.model = get_model(model_id="np_detection-xgvjf/2", api_key="JNpKfUfRAHAT2TTAYjnW")
-        # return self.model
+        # load the pre-trained model once per process, warmed up so the first frame is not slow
+        self.model = model_registry.get(DetectionModelConfig())
     
     def model_predictions(self, image):
         # run inference on our chosen image, image can be a url, a numpy array, a PIL image, etc.
         results = self.model.infer(image)[0]
         # load the results into the supervision Detections api
-        detections = sv.Detections.from_inference(results)
-
-        # create supervision annotators
-        bounding_box_annotator = sv.BoundingBoxAnnotator()
-        label_annotator = sv.LabelAnnotator()
-
-        # annotate the image with our inference results
-        annotated_image = bounding_box_annotator.annotate(
-            scene=image, detections=detections)
-        annotated_image = label_annotator.annotate(
-            scene=annotated_image, detections=detections)
-
-        # display the image
-        # sv.plot_image(annotated_image)
-        return annotated_image, results
+        detections = self.model.to_detections(results)
+        return detections, results
     
     def load_and_process_frames(self, video_file):
-        # read the video file
-        cap = cv2.VideoCapture(video_file)
-        while cap.isOpened():
-            # read the frame
-            ok, frame = cap.read()
+        if self.model is None:
             self.load_model()
-            if ok:
-                # process the frame
-                annotated_img, results = self.model_predictions(frame)
-                # display the frame
-                # sv.plot_image(annotated_img)
-                # yield annotated_img
-                detections = sv.Detections.from_roboflow(results)
-                detections = tracker.update_with_detections(detections)
-                # work with the frame if error is detected
+        # decode, inference and encoding overlap on separate threads, tracking keeps frame order
+        sink = None
+        if self.save_video:
+            sink = VideoWriterSink(self.output_path, fps=video_fps(video_file))
+        pipeline = VideoPipeline(self.model, VideoPipelineConfig(), tracker=tracker,
+                                 annotator=self.annotator if self.annotator.enabled else None, sink=sink)
+        try:
+            summary = pipeline.run(video_file)
+        finally:
+            if sink is not None:
+                sink.close()
+        self.stage_timer = pipeline.stage_timer
+        logging.info(f'Tracking stage breakdown for {video_file}:\n{self.stage_timer.report()}')
+        return summary
 
 
 def main():
@@ -116,7 +111,9 @@ def main():
         st.sidebar.video(demo_bytes)
         # tracking 
         tracking = Tracking()
-        tracking.load_and_process_frames(demo_file)
+        timing = tracking.load_and_process_frames(demo_file)
+        st.sidebar.text('Frame time breakdown (ms/frame)')
+        st.sidebar.json({name: round(stage['ms_per_frame'], 2) for name, stage in timing['stages'].items()})
         st.video(demo_bytes,format="video/mp4")
     
     else:
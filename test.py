@@ -1,6 +1,7 @@
-# import a utility function for loading Roboflow models
-from inference import get_model
-from inference.models.utils import get_model
+# import the process-wide registry that loads the Roboflow/YOLO model once
+from src.serving.model_registry import model_registry
+from src.entity.config_entity import DetectionModelConfig
+from src.video.annotation import FrameAnnotator
 # import supervision to visualize our results
 import supervision as sv
 # import cv2 to helo load our image
@@ -42,6 +43,7 @@ class Tracking:
         # set min size of tracked object, e.g. 15x15px
         self.parameter_lucas_kanade = dict(winSize=(15, 15), maxLevel=4, criteria=(cv2.TERM_CRITERIA_EPS |
                                                                     cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self.annotator = FrameAnnotator()
 
     def select_point(self, event, x, y, flags, params):
         global point, selected_point, old_points
@@ -69,25 +71,17 @@ class Tracking:
         return canvas, frame_gray_init
     
     def load_model(self):
-        # load a pre-trained yolov8n model
-        self.model = get_model(model_id="np_detection-xgvjf/2", api_key="JNpKfUfRAHAT2TTAYjnW")
-        # return self.model
+        # load the pre-trained model once per process, warmed up so the first frame is not slow
+        self.model = model_registry.get(DetectionModelConfig())
     
     def model_predictions(self, image):
         # run inference on our chosen image, image can be a url, a numpy array, a PIL image, etc.
         results = self.model.infer(image)[0]
         # load the results into the supervision Detections api
-        detections = sv.Detections.from_roboflow(results)
+        detections = self.model.to_detections(results)
 
-        # create supervision annotators
-        bounding_box_annotator = sv.BoundingBoxAnnotator()
-        label_annotator = sv.LabelAnnotator()
-
-        # annotate the image with our inference results
-        annotated_image = bounding_box_annotator.annotate(
-            scene=image, detections=detections)
-        annotated_image = label_annotator.annotate(
-            scene=annotated_image, detections=detections)
+        # annotate a copy of the image with the annotators built once in __init__
+        annotated_image = self.annotator.annotate(image, detections)
 
         # display the image
         # sv.plot_image(annotated_image)
@@ -96,8 +90,9 @@ class Tracking:
     def load_and_process_frames(self, video_file,canvas, gray_init_frame):
         # read the video file
         cap = cv2.VideoCapture(video_file)
-        while cap.isOpened():
+        if self.model is None:
             self.load_model()
+        while cap.isOpened():
             # read the frame
             ok, frame = cap.read()
             if ok: